@@ -1,36 +1,46 @@
 # app/core/database.py
 import os
+from typing import AsyncIterator
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
 
 # 환경 변수에서 DB URL 가져오기
 _ = load_dotenv()
 DATABASE_URL = os.getenv("DB_URL")
 
-# SQLAlchemy 엔진 생성
-engine = create_engine(
-    DATABASE_URL,
+
+def _to_async_url(database_url: str) -> str:
+    # 기존 동기 드라이버 url(postgresql://, postgresql+psycopg2://)을 asyncpg로 변경
+    url = make_url(database_url)
+    if url.get_backend_name() == 'postgresql':
+        url = url.set(drivername='postgresql+asyncpg')
+    return url.render_as_string(hide_password=False)
+
+
+# SQLAlchemy 비동기 엔진 생성
+engine = create_async_engine(
+    _to_async_url(DATABASE_URL),
     pool_pre_ping=True,  # 연결이 살아있는지 확인
     # echo=True  # 실행되는 SQL 쿼리 출력
 )
 
 # 세션 클래스 생성
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# commit 후 속성 접근 시 lazy load(동기 IO)가 일어나지 않도록 expire_on_commit=False
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Base 클래스 (모델에서 상속받아서 사용)
 Base = declarative_base()
 
 
 # 의존성 함수
-def get_db() -> Session:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def create_db_tables():
-    Base.metadata.create_all(bind=engine, checkfirst=True)
+async def create_db_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, checkfirst=True)
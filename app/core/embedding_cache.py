@@ -0,0 +1,126 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_DOCUMENT_TASK_TYPE = "RETRIEVAL_DOCUMENT"
+DEFAULT_QUERY_TASK_TYPE = "RETRIEVAL_QUERY"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    (model, task_type, sha256(text)) 키로 임베딩 결과를 sqlite에 저장해두고,
+    같은 텍스트는 다시 임베딩 API를 호출하지 않도록 감싸는 래퍼.
+    저장 개수가 max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, embeddings, model: str, path: str, max_entries: int):
+        self.embeddings = embeddings
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._size = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # 여러 gunicorn worker가 같은 파일을 사용
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    PRIMARY KEY (model, task_type, text_hash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_used_at "
+                         "ON embedding_cache (last_used_at)")
+            conn.commit()
+            self._size = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _lookup(self, task_type: str, hashes: list[str]) -> dict[str, list[float]]:
+        conn = self._connect()
+        placeholders = ",".join("?" * len(hashes))
+        rows = conn.execute(
+            f"SELECT text_hash, vector FROM embedding_cache "
+            f"WHERE model = ? AND task_type = ? AND text_hash IN ({placeholders})",
+            [self.model, task_type, *hashes]
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE embedding_cache SET last_used_at = ? WHERE model = ? AND task_type = ? AND text_hash = ?",
+                [(time.time(), self.model, task_type, text_hash) for text_hash, _ in rows]
+            )
+            conn.commit()
+        return {text_hash: array('f', vector).tolist() for text_hash, vector in rows}
+
+    def _store(self, task_type: str, vectors: dict[str, list[float]]):
+        conn = self._connect()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (model, task_type, text_hash, vector, last_used_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(self.model, task_type, text_hash, array('f', vector).tobytes(), now)
+             for text_hash, vector in vectors.items()]
+        )
+        self._size += len(vectors)
+        if self._size > self.max_entries:
+            # 한 번에 여유분(10%)까지 비워서 매 요청마다 삭제가 일어나지 않도록 함
+            target = int(self.max_entries * 0.9)
+            conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN "
+                "(SELECT rowid FROM embedding_cache ORDER BY last_used_at LIMIT "
+                "(SELECT MAX(COUNT(*) - ?, 0) FROM embedding_cache))",
+                (target,)
+            )
+            self._size = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        conn.commit()
+
+    def embed_documents(self, texts: list[str], task_type: Optional[str] = None) -> list[list[float]]:
+        task_type = task_type or DEFAULT_DOCUMENT_TASK_TYPE
+        if not texts:
+            return []
+        hashes = [_text_hash(text) for text in texts]
+        with self._lock:
+            cached = self._lookup(task_type, list(set(hashes)))
+            # 캐시에 없는 텍스트만 (중복 제거 후) 임베딩
+            missing = {text_hash: text for text_hash, text in zip(hashes, texts) if text_hash not in cached}
+            # 여러 thread에서 호출되므로 집계도 lock 안에서 갱신
+            self.hits += len(texts) - sum(1 for text_hash in hashes if text_hash in missing)
+            self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()), task_type=task_type)
+            embedded = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(task_type, embedded)
+            cached.update(embedded)
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text], task_type=DEFAULT_QUERY_TASK_TYPE)[0]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': self._size,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,221 @@
+import fcntl
+import math
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from app.utils.keyword_extractor import tokenize
+
+# RRF 점수 = sum(1 / (RRF_K + 순위)), 논문과 일반적인 구현의 기본값 사용
+RRF_K = 60
+
+
+@dataclass
+class IndexedDocument:
+    text: str
+    term_freqs: Counter
+    length: int
+    metadata: dict  # vector DB 문서와 같은 metadata (cover_letter_id, item_id, chunk_index)
+
+
+class BM25Index:
+    """
+    유저 한 명의 자소서 항목 텍스트에 대한 in-memory 역색인입니다.
+    기술 이름, 프로젝트 이름처럼 dense 검색이 놓치는 키워드 일치를 BM25로 점수화합니다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._documents: dict[str, IndexedDocument] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: str, text: str, metadata: Optional[dict] = None):
+        # 같은 id가 다시 들어오면 교체
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        document = IndexedDocument(text, Counter(tokens), len(tokens), metadata or {})
+        self._documents[doc_id] = document
+        self._total_length += document.length
+        for term in document.term_freqs:
+            self._postings.setdefault(term, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        self._total_length -= document.length
+        for term in document.term_freqs:
+            postings = self._postings[term]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[term]
+
+    def remove_cover_letter(self, cover_letter_id: int):
+        for doc_id in [doc_id for doc_id, document in self._documents.items()
+                       if document.metadata.get('cover_letter_id') == cover_letter_id]:
+            self.remove(doc_id)
+
+    def get_document(self, doc_id: str) -> IndexedDocument:
+        return self._documents[doc_id]
+
+    def search(self, query: str, k: int) -> list[str]:
+        """점수가 높은 순서로 최대 k개의 문서 id를 반환합니다. (키워드가 하나도 겹치지 않는 문서는 제외)"""
+        if not self._documents:
+            return []
+        n = len(self._documents)
+        avg_length = self._total_length / n or 1
+        scores: Counter = Counter()
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id in postings:
+                document = self._documents[doc_id]
+                tf = document.term_freqs[term]
+                norm = self.k1 * (1 - self.b + self.b * document.length / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [doc_id for doc_id, _ in scores.most_common(k)]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[list[str]], k: int, rrf_k: int = RRF_K) -> list[str]:
+    """여러 검색 결과 순위를 RRF로 합쳐서 상위 k개의 id를 반환합니다."""
+    scores: Counter = Counter()
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1 / (rrf_k + rank)
+    return [doc_id for doc_id, _ in scores.most_common(k)]
+
+
+class RevisionStore:
+    """
+    유저별 문서 revision을 파일로 기록합니다. (API 서버, embedding outbox worker 등 여러 프로세스가 공유)
+    문서를 저장/삭제할 때마다 새 revision으로 바꾸므로, 문서 수가 같아도 내용이 바뀐 것을 알 수 있고
+    확인은 작은 파일 하나를 읽는 것으로 끝납니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _revision_path(self, user_id: int) -> str:
+        return os.path.join(self.path, str(user_id))
+
+    def get(self, user_id: int) -> Optional[str]:
+        try:
+            with open(self._revision_path(user_id), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def bump(self, user_id: int) -> tuple[Optional[str], str]:
+        """새 revision을 기록하고 (이전 revision, 새 revision)을 반환합니다."""
+        revision = uuid.uuid4().hex
+        with open(os.path.join(self.path, '.lock'), 'w') as lock_file:
+            # 읽고 바꾸는 사이에 다른 프로세스가 끼어들지 않도록 직렬화
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            previous = self.get(user_id)
+            tmp_path = f'{self._revision_path(user_id)}-{revision}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(revision)
+            os.replace(tmp_path, self._revision_path(user_id))
+        return previous, revision
+
+
+class KeywordIndexCache:
+    """
+    유저별 BM25Index를 LRU로 보관합니다.
+    처음 사용할 때 vector DB의 문서로 만들고, 만들 때 본 revision과 현재 revision이 다르면
+    (다른 worker 프로세스에서 저장/삭제한 경우) 다시 만듭니다.
+    """
+
+    def __init__(self,
+                 load_documents: Callable[[int], Iterable[tuple[str, str, Optional[dict]]]],
+                 revisions: RevisionStore,
+                 max_size: int):
+        self.load_documents = load_documents
+        self.revisions = revisions
+        self.max_size = max_size
+        # user_id -> (만들 때 본 revision, 역색인)
+        self._indexes: OrderedDict[int, tuple[Optional[str], BM25Index]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def _get_index(self, user_id: int, revision: Optional[str]) -> BM25Index:
+        # self._lock을 잡은 상태에서 호출
+        cached = self._indexes.get(user_id)
+        if cached is not None and cached[0] == revision:
+            self._indexes.move_to_end(user_id)
+            self.hits += 1
+            return cached[1]
+
+        # revision은 문서를 읽기 전에 확인한 값을 기록 (읽는 도중 바뀌면 다음 검색에서 다시 만듦)
+        self.rebuilds += 1
+        index = BM25Index()
+        for doc_id, text, metadata in self.load_documents(user_id):
+            index.add(doc_id, text, metadata)
+        self._indexes[user_id] = (revision, index)
+        self._indexes.move_to_end(user_id)
+        if len(self._indexes) > self.max_size:
+            self._indexes.popitem(last=False)
+        return index
+
+    def search_batch(self, user_id: int, queries: list[str], k: int) -> list[list[tuple[str, str, dict]]]:
+        """쿼리마다 (문서 id, 텍스트, metadata) 목록을 점수 순서대로 반환합니다."""
+        revision = self.revisions.get(user_id)
+        with self._lock:
+            index = self._get_index(user_id, revision)
+            results = []
+            for query in queries:
+                documents = [(doc_id, index.get_document(doc_id)) for doc_id in index.search(query, k)]
+                results.append([(doc_id, document.text, document.metadata) for doc_id, document in documents])
+            return results
+
+    def _update(self, user_id: int, update: Callable[[BM25Index], None]):
+        """vector DB에 반영한 뒤 호출, revision을 올리고 보관 중인 역색인도 같이 고칩니다."""
+        with self._lock:
+            previous, revision = self.revisions.bump(user_id)
+            cached = self._indexes.get(user_id)
+            # 아직 만들지 않은 유저는 처음 검색할 때 vector DB에서 읽으므로 건너뜀
+            if cached is None:
+                return
+            if cached[0] != previous:
+                # 그 사이 다른 프로세스가 바꾼 내용이 빠져 있으므로 다음 검색에서 다시 만듦
+                del self._indexes[user_id]
+                return
+            update(cached[1])
+            self._indexes[user_id] = (revision, cached[1])
+
+    def add_documents(self, user_id: int, documents: Iterable[tuple[str, str, Optional[dict]]]):
+        def update(index: BM25Index):
+            for doc_id, text, metadata in documents:
+                index.add(doc_id, text, metadata)
+
+        self._update(user_id, update)
+
+    def remove_documents(self, user_id: int, doc_ids: Iterable[str]):
+        def update(index: BM25Index):
+            for doc_id in doc_ids:
+                index.remove(doc_id)
+
+        self._update(user_id, update)
+
+    def remove_cover_letter(self, user_id: int, cover_letter_id: int):
+        self._update(user_id, lambda index: index.remove_cover_letter(cover_letter_id))
+
+    def get_stats(self) -> dict:
+        return {
+            'size': len(self._indexes),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'rebuilds': self.rebuilds,
+        }
@@ -1,10 +1,15 @@
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 from fastapi import HTTPException, Depends
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from starlette.requests import Request
 
@@ -39,7 +44,7 @@ def get_current_user_id(request: Request) -> int:
     return user_session.get('username')
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
     user_session = request.session.get('user', None)
     if user_session is None:
         raise HTTPException(
@@ -47,7 +52,7 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
             detail=str('로그인이 필요한 서비스입니다.')
         )
     user_id = user_session.get('username')
-    user = db.get(User, user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise ValueError('user not found')
     # 유저 밴
@@ -75,3 +80,101 @@ def encrypt_text(plain_text: str) -> str:
 
 def decrypt_text(cipher_text: str) -> str:
     return fernet.decrypt(cipher_text.encode()).decode()
+
+
+def encrypt_texts(plain_texts: list[str]) -> list[str]:
+    return [encrypt_text(plain_text) for plain_text in plain_texts]
+
+
+def decrypt_texts(cipher_texts: list[str]) -> list[str]:
+    return [decrypt_text(cipher_text) for cipher_text in cipher_texts]
+
+
+# bcrypt, Fernet 연산 전용 thread pool 크기
+CRYPTO_EXECUTOR_WORKERS = int(os.getenv('CRYPTO_EXECUTOR_WORKERS', '4'))
+
+T = TypeVar('T')
+
+
+class CryptoExecutor:
+    """
+    bcrypt 해싱, Fernet 암복호화처럼 CPU를 쓰는 작업을 event loop 밖의 전용 thread pool에서 실행합니다.
+    bcrypt와 cryptography는 연산 중 GIL을 놓기 때문에 thread pool로도 병렬 실행됩니다.
+    크기를 정할 수 있도록 대기열 길이와 대기 시간을 기록합니다.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crypto')
+        self._lock = threading.Lock()
+        self.queued = 0  # 제출됐지만 아직 실행되지 않은 작업 수
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def task():
+            wait_ms = (time.perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queued': self.queued,
+                'running': self.running,
+                'max_queued': self.max_queued,
+                'completed': self.completed,
+                'avg_wait_ms': round(self.total_wait_ms / self.completed, 2) if self.completed else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+crypto_executor = CryptoExecutor(CRYPTO_EXECUTOR_WORKERS)
+
+
+async def hash_password_async(password: str) -> str:
+    return await crypto_executor.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await crypto_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def encrypt_text_async(plain_text: str) -> str:
+    return await crypto_executor.run(encrypt_text, plain_text)
+
+
+async def decrypt_text_async(cipher_text: str) -> str:
+    return await crypto_executor.run(decrypt_text, cipher_text)
+
+
+async def encrypt_texts_async(plain_texts: list[str]) -> list[str]:
+    # 항목별로 나누지 않고 한 번에 제출해서 thread 전환 비용을 줄임
+    return await crypto_executor.run(encrypt_texts, plain_texts)
+
+
+async def decrypt_texts_async(cipher_texts: list[str]) -> list[str]:
+    return await crypto_executor.run(decrypt_texts, cipher_texts)
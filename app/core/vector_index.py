@@ -0,0 +1,277 @@
+import fcntl
+import json
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# (문서 id, 텍스트, metadata)
+Hit = tuple[str, str, dict]
+
+
+class VectorIndex(ABC):
+    """
+    유저 단위로 문서 벡터를 저장/검색하는 인터페이스입니다.
+    임베딩은 호출하는 쪽에서 계산해서 넘기고, where는 metadata 값이 모두 같은 문서만 고르는 조건입니다.
+    """
+
+    @abstractmethod
+    def upsert(self, user_id: int, ids: list[str], texts: list[str], metadatas: list[dict],
+               embeddings: list[list[float]]):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: int, ids: list[str]):
+        ...
+
+    @abstractmethod
+    def get(self, user_id: int, where: Optional[dict] = None, include_texts: bool = True) -> list[Hit]:
+        ...
+
+    @abstractmethod
+    def count(self, user_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def exists(self, user_id: int) -> bool:
+        """유저의 문서가 저장된 적이 있는지 (확인하면서 저장소를 만들지 않음)"""
+
+    @abstractmethod
+    def query(self, user_id: int, query_embeddings: list[list[float]], k: int) -> list[list[Hit]]:
+        """쿼리마다 유사도가 높은 순서로 최대 k개의 문서를 반환합니다."""
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        ...
+
+
+def _matches(metadata: dict, where: Optional[dict]) -> bool:
+    return where is None or all(metadata.get(key) == value for key, value in where.items())
+
+
+@dataclass
+class _UserVectors:
+    version: tuple[int, int]  # documents.json (inode, 수정 시각), 다른 프로세스가 바꾸면 다시 읽음
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict]
+    dtype: str  # 저장할 때 사용한 벡터 타입 (float16|int8)
+    vectors: np.ndarray  # (문서 수, 차원), float16 또는 int8, 디스크에서 memory-map
+    scales: Optional[np.ndarray]  # int8일 때 행별 scale
+
+
+class NumpyVectorIndex(VectorIndex):
+    """
+    유저 한 명의 문서 벡터를 정규화한 뒤 float16(또는 int8) 행렬 하나로 저장하고,
+    검색은 행렬-벡터 곱 한 번으로 정확한 top-k를 구합니다. (유저당 문서가 수십 개라 ANN 인덱스가 필요 없음)
+
+    - 유저별 디렉토리: documents.json(id, 텍스트, metadata, dtype) + vectors-{version}.npy (+ scales-{version}.npy)
+    - dtype 설정이 바뀌어도 저장된 타입 그대로 검색하고, 다음에 저장할 때 기존 벡터를 새 타입으로 다시 양자화
+    - 벡터 파일은 새 이름으로 쓴 뒤 documents.json을 교체하므로, 읽는 쪽은 항상 짝이 맞는 파일을 봄
+    - 여러 프로세스(API 서버, embedding outbox worker)가 쓰는 경우를 위해 쓰기는 파일 lock으로 직렬화
+    """
+
+    def __init__(self, path: str, dtype: str = 'float16', cache_size: int = 1024):
+        if dtype not in ('float16', 'int8'):
+            raise ValueError(f'지원하지 않는 dtype입니다: {dtype}')
+        self.path = path
+        self.dtype = dtype
+        self.cache_size = cache_size
+        self._cache: OrderedDict[int, _UserVectors] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _user_dir(self, user_id: int) -> str:
+        return os.path.join(self.path, str(user_id))
+
+    def _documents_path(self, user_id: int) -> str:
+        return os.path.join(self._user_dir(user_id), 'documents.json')
+
+    def _read(self, user_id: int) -> Optional[_UserVectors]:
+        documents_path = self._documents_path(user_id)
+        try:
+            stat = os.stat(documents_path)
+            with open(documents_path, encoding='utf-8') as f:
+                documents = json.load(f)
+            user_dir = self._user_dir(user_id)
+            vectors = np.load(os.path.join(user_dir, documents['vectors']), mmap_mode='r')
+            scales = np.load(os.path.join(user_dir, documents['scales'])) if documents.get('scales') else None
+        except FileNotFoundError:
+            return None
+        # dtype을 기록하기 전에 저장된 파일은 벡터 파일의 타입을 사용
+        dtype = documents.get('dtype', str(vectors.dtype))
+        if dtype != str(vectors.dtype) or (dtype == 'int8') != (scales is not None):
+            raise ValueError(f'저장된 벡터 타입이 documents.json과 다릅니다: user_id: {user_id}, '
+                             f'documents.json: {dtype}, 벡터 파일: {vectors.dtype}')
+        return _UserVectors((stat.st_ino, stat.st_mtime_ns), documents['ids'], documents['texts'],
+                            documents['metadatas'], dtype, vectors, scales)
+
+    def _load(self, user_id: int) -> Optional[_UserVectors]:
+        try:
+            stat = os.stat(self._documents_path(user_id))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached.version == (stat.st_ino, stat.st_mtime_ns):
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return cached
+
+        # 읽는 도중 다른 프로세스가 새 버전을 쓰면서 이전 벡터 파일을 지운 경우 한 번 더 읽음
+        loaded = self._read(user_id) or self._read(user_id)
+        if loaded is None:
+            return None
+        with self._lock:
+            self.loads += 1
+            self._cache[user_id] = loaded
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return loaded
+
+    def _quantize(self, embeddings: np.ndarray) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        normalized = embeddings / np.maximum(norms, 1e-12)
+        if self.dtype == 'float16':
+            return normalized.astype(np.float16), None
+        # 행별 대칭 양자화: 값 = int8 * scale
+        scales = np.maximum(np.abs(normalized).max(axis=1), 1e-12) / 127
+        return np.round(normalized / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _kept_vectors(self, current: _UserVectors, rows: list[int]) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """남길 행의 벡터를 현재 dtype 설정으로 반환합니다. (저장된 타입이 다르면 다시 양자화)"""
+        vectors = np.asarray(current.vectors[rows])
+        scales = current.scales[rows] if current.scales is not None else None
+        if current.dtype == self.dtype:
+            return vectors, scales
+        restored = vectors.astype(np.float32)
+        if scales is not None:
+            restored *= scales[:, None]
+        return self._quantize(restored)
+
+    def _write(self, user_id: int, ids: list[str], texts: list[str], metadatas: list[dict],
+               vectors: np.ndarray, scales: Optional[np.ndarray]):
+        user_dir = self._user_dir(user_id)
+        suffix = uuid.uuid4().hex
+        documents = {'ids': ids, 'texts': texts, 'metadatas': metadatas, 'dtype': str(vectors.dtype),
+                     'vectors': f'vectors-{suffix}.npy', 'scales': f'scales-{suffix}.npy' if scales is not None else None}
+        np.save(os.path.join(user_dir, documents['vectors']), vectors)
+        if scales is not None:
+            np.save(os.path.join(user_dir, documents['scales']), scales)
+        tmp_path = os.path.join(user_dir, f'documents-{suffix}.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(documents, f, ensure_ascii=False)
+        os.replace(tmp_path, self._documents_path(user_id))
+        # 이전 버전 파일 정리 (이미 memory-map으로 연 쪽은 파일이 지워져도 계속 읽을 수 있음)
+        for name in os.listdir(user_dir):
+            if name.endswith('.npy') and name not in (documents['vectors'], documents['scales']):
+                os.remove(os.path.join(user_dir, name))
+
+    def _update(self, user_id: int, update):
+        """유저 파일 lock을 잡고 현재 문서를 읽어서 update(현재 상태) 결과로 다시 씁니다."""
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        with open(os.path.join(user_dir, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            current = self._load(user_id)
+            if current is None:
+                current = _UserVectors((0, 0), [], [], [], self.dtype, np.empty((0, 0), dtype=self.dtype), None)
+            ids, texts, metadatas, vectors, scales = update(current)
+            if ids:
+                self._write(user_id, ids, texts, metadatas, vectors, scales)
+            else:
+                # 문서가 모두 삭제되면 lock 파일만 남김
+                for name in os.listdir(user_dir):
+                    if name != '.lock':
+                        os.remove(os.path.join(user_dir, name))
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    @staticmethod
+    def _keep_rows(current: _UserVectors, removed_ids: set[str]) -> list[int]:
+        return [row for row, doc_id in enumerate(current.ids) if doc_id not in removed_ids]
+
+    def upsert(self, user_id: int, ids: list[str], texts: list[str], metadatas: list[dict],
+               embeddings: list[list[float]]):
+        if not ids:
+            return
+        new_vectors, new_scales = self._quantize(np.asarray(embeddings, dtype=np.float32))
+
+        def update(current: _UserVectors):
+            rows = self._keep_rows(current, set(ids))
+            if not rows:
+                vectors, scales = new_vectors, new_scales
+            else:
+                kept_vectors, kept_scales = self._kept_vectors(current, rows)
+                vectors = np.concatenate([kept_vectors, new_vectors])
+                scales = np.concatenate([kept_scales, new_scales]) if new_scales is not None else None
+            return ([current.ids[row] for row in rows] + list(ids),
+                    [current.texts[row] for row in rows] + list(texts),
+                    [current.metadatas[row] for row in rows] + list(metadatas),
+                    vectors, scales)
+
+        self._update(user_id, update)
+
+    def delete(self, user_id: int, ids: list[str]):
+        if not ids or not self.exists(user_id):
+            return
+
+        def update(current: _UserVectors):
+            rows = self._keep_rows(current, set(ids))
+            return ([current.ids[row] for row in rows],
+                    [current.texts[row] for row in rows],
+                    [current.metadatas[row] for row in rows],
+                    *self._kept_vectors(current, rows))
+
+        self._update(user_id, update)
+
+    def get(self, user_id: int, where: Optional[dict] = None, include_texts: bool = True) -> list[Hit]:
+        current = self._load(user_id)
+        if current is None:
+            return []
+        return [(doc_id, text if include_texts else '', metadata)
+                for doc_id, text, metadata in zip(current.ids, current.texts, current.metadatas)
+                if _matches(metadata, where)]
+
+    def count(self, user_id: int) -> int:
+        current = self._load(user_id)
+        return len(current.ids) if current is not None else 0
+
+    def exists(self, user_id: int) -> bool:
+        return os.path.exists(self._documents_path(user_id))
+
+    def query(self, user_id: int, query_embeddings: list[list[float]], k: int) -> list[list[Hit]]:
+        current = self._load(user_id)
+        if current is None or not current.ids:
+            return [[] for _ in query_embeddings]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        # 정규화된 벡터의 내적 = cosine 유사도
+        scores = queries @ current.vectors.astype(np.float32).T
+        if current.scales is not None:
+            scores *= current.scales
+        k = min(k, len(current.ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, rows in zip(scores, top):
+            rows = rows[np.argsort(-query_scores[rows])]
+            results.append([(current.ids[row], current.texts[row], current.metadatas[row]) for row in rows])
+        return results
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': 'numpy',
+            'dtype': self.dtype,
+            'size': len(self._cache),
+            'max_size': self.cache_size,
+            'hits': self.hits,
+            'loads': self.loads,
+        }
@@ -1,26 +1,295 @@
 import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
 
+import chromadb
+from chromadb.errors import ChromaError
 from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
+from app.core.embedding_cache import CachedEmbeddings, DEFAULT_QUERY_TASK_TYPE
+from app.core.keyword_index import KeywordIndexCache, RevisionStore, reciprocal_rank_fusion
+from app.core.vector_index import VectorIndex, NumpyVectorIndex, Hit
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 EMBEDDING_MODEL = "gemini-embedding-001"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CHROMA_DB_PATH = os.path.join(BASE_DIR, "chroma_db")
+# 벡터 저장/검색 backend
+# - chroma: chroma collection (HNSW)
+# - numpy: 유저별 float16/int8 행렬을 memory-map으로 열고 정확한 top-k 검색 (NUMPY_INDEX_PATH)
+# backend를 바꾸면 python -m app.services.embedding_reconcile_service 로 새 backend를 채움
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "chroma")
+# chroma collection 구성
+# - per_user: 유저별 collection (cover_letters_{user_id})
+# - sharded: hash(user_id)로 고른 VECTORSTORE_SHARDS개의 collection (cover_letters_shard_{n})을 공유하고
+#            metadata의 user_id로 필터링 (유저가 많아져도 HNSW 인덱스 수가 고정)
+# 기존 데이터는 python -m app.core.vectorstore_migration 으로 옮긴 뒤 변경
+VECTORSTORE_LAYOUT = os.getenv("VECTORSTORE_LAYOUT", "per_user")
+VECTORSTORE_SHARDS = int(os.getenv("VECTORSTORE_SHARDS", 16))
+# 프로세스에서 열어둘 collection 핸들 최대 개수
+CHROMA_COLLECTION_CACHE_SIZE = int(os.getenv("CHROMA_COLLECTION_CACHE_SIZE", 256))
+# numpy backend 저장 경로와 벡터 타입(float16|int8), 프로세스에서 열어둘 유저 행렬 최대 개수
+# (벡터 타입을 바꾸면 기존 파일은 저장된 타입으로 검색하고, 유저 문서를 다음에 저장할 때 새 타입으로 다시 양자화)
+NUMPY_INDEX_PATH = os.path.join(CHROMA_DB_PATH, "numpy_index")
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float16")
+NUMPY_INDEX_CACHE_SIZE = int(os.getenv("NUMPY_INDEX_CACHE_SIZE", 1024))
+# 임베딩 캐시 (chroma_db 볼륨에 함께 저장)
+EMBEDDING_CACHE_PATH = os.path.join(CHROMA_DB_PATH, "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100_000))
+# 프로세스에서 보관할 유저별 BM25 역색인 최대 개수
+KEYWORD_INDEX_CACHE_SIZE = int(os.getenv("KEYWORD_INDEX_CACHE_SIZE", 256))
+# 유저별 문서 revision (프로세스끼리 BM25 역색인이 최신인지 확인하는 용도, chroma_db 볼륨에 함께 저장)
+KEYWORD_INDEX_REVISION_PATH = os.path.join(CHROMA_DB_PATH, "keyword_index_revisions")
+# dense, BM25 검색에서 각각 가져올 chunk 후보 수 (RRF로 합치고 항목별로 묶은 뒤 k개 선택)
+HYBRID_CANDIDATE_K = int(os.getenv("HYBRID_CANDIDATE_K", 10))
+
+os.makedirs(CHROMA_DB_PATH, exist_ok=True)
 
-# 임베딩 모델 선언
-gemini_embeddings = GoogleGenerativeAIEmbeddings(
+# 임베딩 모델 선언, 같은 텍스트는 캐시된 임베딩 사용
+gemini_embeddings = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        google_api_key=GEMINI_API_KEY
+    ),
     model=EMBEDDING_MODEL,
-    google_api_key=GEMINI_API_KEY
+    path=EMBEDDING_CACHE_PATH,
+    max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
 )
 
 
-def get_vectorstore(user_id: int) -> Chroma:
-    collection_name = f'cover_letters_{user_id}'
-    # vector db 선언
-    return Chroma(
-        collection_name=collection_name,
-        embedding_function=gemini_embeddings,  # 변경된 임베딩 객체를 사용
-        persist_directory=CHROMA_DB_PATH,
-    )
+class VectorStoreCache:
+    """
+    하나의 chroma client 위에서 유저별 collection 핸들을 LRU로 재사용합니다.
+    요청마다 client와 collection 메타데이터를 다시 여는 비용을 없애기 위함입니다.
+    """
+
+    def __init__(self, client: chromadb.ClientAPI, embedding_function: Embeddings, max_size: int):
+        self.client = client
+        self.embedding_function = embedding_function
+        self.max_size = max_size
+        self._vectorstores: OrderedDict[str, Chroma] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection_name: str) -> Chroma:
+        with self._lock:
+            vectorstore = self._vectorstores.get(collection_name)
+            if vectorstore is not None:
+                self._vectorstores.move_to_end(collection_name)
+                self.hits += 1
+                return vectorstore
+
+            self.misses += 1
+            vectorstore = Chroma(
+                collection_name=collection_name,
+                embedding_function=self.embedding_function,
+                client=self.client,
+            )
+            self._vectorstores[collection_name] = vectorstore
+            if len(self._vectorstores) > self.max_size:
+                self._vectorstores.popitem(last=False)
+            return vectorstore
+
+    def exists(self, collection_name: str) -> bool:
+        # get()은 collection이 없으면 만들기 때문에, 만들지 않고 확인만 할 때 사용
+        with self._lock:
+            if collection_name in self._vectorstores:
+                return True
+        try:
+            self.client.get_collection(collection_name)
+            return True
+        except (ValueError, ChromaError):
+            return False
+
+    def get_stats(self) -> dict:
+        return {
+            'size': len(self._vectorstores),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+_vectorstore_cache: VectorStoreCache | None = None
+_vectorstore_cache_lock = threading.Lock()
+
+
+def get_vectorstore_cache() -> VectorStoreCache:
+    global _vectorstore_cache
+    if _vectorstore_cache is None:
+        with _vectorstore_cache_lock:
+            if _vectorstore_cache is None:
+                _vectorstore_cache = VectorStoreCache(chromadb.PersistentClient(path=CHROMA_DB_PATH),
+                                                      gemini_embeddings,
+                                                      CHROMA_COLLECTION_CACHE_SIZE)
+    return _vectorstore_cache
+
+
+def shard_of(user_id: int, shards: int = VECTORSTORE_SHARDS) -> int:
+    # 프로세스/배포가 달라도 같은 shard가 나오도록 고정된 hash 사용 (파이썬 hash()는 사용 X)
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+def collection_name(user_id: int, layout: str = VECTORSTORE_LAYOUT, shards: int = VECTORSTORE_SHARDS) -> str:
+    if layout == 'sharded':
+        return f'cover_letters_shard_{shard_of(user_id, shards)}'
+    return f'cover_letters_{user_id}'
+
+
+def user_where(user_id: int, where: Optional[dict] = None, layout: str = VECTORSTORE_LAYOUT) -> Optional[dict]:
+    """유저의 문서만 조회하도록 where 조건을 만듭니다. (유저별 collection에서는 그대로 사용)"""
+    if layout != 'sharded':
+        return where
+    if where is None:
+        return {'user_id': user_id}
+    return {'$and': [{'user_id': user_id}, where]}
+
+
+class ChromaVectorIndex(VectorIndex):
+    """
+    chroma collection(유저별 또는 shard)을 사용하는 VectorIndex
+    sharded 구성에서는 다른 유저와 collection을 공유하므로 조회할 때 항상 user_where로 필터링합니다.
+    (문서 id는 항목 id 기준이라 유저끼리 겹치지 않으므로 id로 저장/삭제하는 것은 그대로 사용 가능)
+    """
+
+    def __init__(self, cache: VectorStoreCache, layout: str = VECTORSTORE_LAYOUT, shards: int = VECTORSTORE_SHARDS):
+        self.cache = cache
+        self.layout = layout
+        self.shards = shards
+
+    def _collection(self, user_id: int):
+        return self.cache.get(collection_name(user_id, self.layout, self.shards))._collection
+
+    def _where(self, user_id: int, where: Optional[dict] = None) -> Optional[dict]:
+        return user_where(user_id, where, self.layout)
+
+    def upsert(self, user_id: int, ids: list[str], texts: list[str], metadatas: list[dict],
+               embeddings: list[list[float]]):
+        if ids:
+            self._collection(user_id).upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, user_id: int, ids: list[str]):
+        if ids:
+            self._collection(user_id).delete(ids=ids)
+
+    def get(self, user_id: int, where: Optional[dict] = None, include_texts: bool = True) -> list[Hit]:
+        include = ['documents', 'metadatas'] if include_texts else ['metadatas']
+        result = self._collection(user_id).get(where=self._where(user_id, where), include=include)
+        texts = result['documents'] if include_texts else [''] * len(result['ids'])
+        return [(doc_id, text, metadata or {})
+                for doc_id, text, metadata in zip(result['ids'], texts, result['metadatas'])]
+
+    def count(self, user_id: int) -> int:
+        collection = self._collection(user_id)
+        if self.layout != 'sharded':
+            return collection.count()
+        # 공유 collection은 유저별 count가 없으므로 id만 조회
+        return len(collection.get(where=self._where(user_id), include=[])['ids'])
+
+    def exists(self, user_id: int) -> bool:
+        if not self.cache.exists(collection_name(user_id, self.layout, self.shards)):
+            return False
+        if self.layout != 'sharded':
+            return True
+        return bool(self._collection(user_id).get(where=self._where(user_id), limit=1, include=[])['ids'])
+
+    def query(self, user_id: int, query_embeddings: list[list[float]], k: int) -> list[list[Hit]]:
+        result = self._collection(user_id).query(query_embeddings=query_embeddings,
+                                                 n_results=k,
+                                                 where=self._where(user_id),
+                                                 include=['documents', 'metadatas'])
+        return [[(doc_id, text, metadata or {}) for doc_id, text, metadata in zip(ids, documents, metadatas)]
+                for ids, documents, metadatas in zip(result['ids'], result['documents'], result['metadatas'])]
+
+    def get_stats(self) -> dict:
+        return {'backend': 'chroma', 'layout': self.layout, **self.cache.get_stats()}
+
+
+_vector_index: VectorIndex | None = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    global _vector_index
+    if _vector_index is None:
+        with _vector_index_lock:
+            if _vector_index is None:
+                if VECTOR_INDEX_BACKEND == 'numpy':
+                    _vector_index = NumpyVectorIndex(NUMPY_INDEX_PATH, NUMPY_INDEX_DTYPE, NUMPY_INDEX_CACHE_SIZE)
+                else:
+                    _vector_index = ChromaVectorIndex(get_vectorstore_cache())
+    return _vector_index
+
+
+def has_vectorstore(user_id: int) -> bool:
+    return get_vector_index().exists(user_id)
+
+
+def embed_queries(queries: list[str]) -> list[list[float]]:
+    """여러 검색 쿼리를 한 번의 임베딩 요청으로 임베딩합니다."""
+    return gemini_embeddings.embed_documents(queries, task_type=DEFAULT_QUERY_TASK_TYPE)
+
+
+def group_by_item(hits: list[tuple[str, str, dict | None]], k: int) -> list[str]:
+    """
+    chunk 단위 검색 결과를 부모 자소서 항목(item_id)별로 묶어서 상위 k개 항목을 반환합니다.
+    항목 순서는 가장 먼저 검색된 chunk의 순위를 따르고, 한 항목에서 찾은 chunk들은 원문 순서대로 이어 붙입니다.
+    (chunk로 나누기 전에 저장된 문서는 문서 하나를 항목 하나로 봄)
+    """
+    groups: OrderedDict[str, dict[int, str]] = OrderedDict()
+    for doc_id, text, metadata in hits:
+        metadata = metadata or {}
+        key = str(metadata.get('item_id', doc_id))
+        if key not in groups:
+            if len(groups) == k:
+                continue
+            groups[key] = {}
+        groups[key][metadata.get('chunk_index', 0)] = text
+    return [' '.join(chunks[index] for index in sorted(chunks)) for chunks in groups.values()]
+
+
+def similarity_search_batch(user_id: int, queries: list[str], k: int) -> list[list[str]]:
+    """
+    여러 쿼리를 한 번에 임베딩하고, 한 번의 index 검색으로 찾습니다.
+    chunk 결과는 항목별로 묶으며, 결과는 쿼리 순서대로 반환합니다.
+    """
+    if not queries:
+        return []
+    hits = get_vector_index().query(user_id, embed_queries(queries), max(k, HYBRID_CANDIDATE_K))
+    return [group_by_item(query_hits, k) for query_hits in hits]
+
+
+def _load_keyword_documents(user_id: int) -> list[tuple[str, str, dict | None]]:
+    return get_vector_index().get(user_id)
+
+
+keyword_index_cache = KeywordIndexCache(_load_keyword_documents, RevisionStore(KEYWORD_INDEX_REVISION_PATH),
+                                        KEYWORD_INDEX_CACHE_SIZE)
+
+
+def hybrid_search_batch(user_id: int, queries: list[str], k: int) -> list[list[str]]:
+    """
+    dense 검색(chroma)과 BM25 키워드 검색 결과를 쿼리별로 RRF로 합친 뒤, 항목별로 묶어서 상위 k개를 반환합니다.
+    결과는 쿼리 순서대로 반환합니다.
+    """
+    if not queries:
+        return []
+    candidate_k = max(k, HYBRID_CANDIDATE_K)
+    dense = get_vector_index().query(user_id, embed_queries(queries), candidate_k)
+    sparse = keyword_index_cache.search_batch(user_id, queries, candidate_k)
+
+    results = []
+    for dense_hits, sparse_hits in zip(dense, sparse):
+        documents = {doc_id: (text, metadata) for doc_id, text, metadata in sparse_hits}
+        documents.update({doc_id: (text, metadata) for doc_id, text, metadata in dense_hits})
+        # 후보 전체를 RRF 순서로 정렬한 뒤 항목별로 묶음
+        fused_ids = reciprocal_rank_fusion([[doc_id for doc_id, _, _ in dense_hits],
+                                            [doc_id for doc_id, _, _ in sparse_hits]], len(documents))
+        results.append(group_by_item([(doc_id, *documents[doc_id]) for doc_id in fused_ids], k))
+    return results
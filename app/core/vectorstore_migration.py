@@ -0,0 +1,78 @@
+# 유저별 collection(cover_letters_{user_id})의 문서를 shard collection(cover_letters_shard_{n})으로 옮기는 도구
+# - 저장된 임베딩을 그대로 복사하므로 임베딩 API를 호출하지 않음
+# - metadata에 user_id가 없는 예전 문서도 collection 이름의 user_id로 채움
+# - 옮긴 뒤 shard의 유저 문서 수가 원본과 같은지 확인하고, --delete-source일 때만 원본 collection 삭제
+#
+# 실행: GEMINI_API_KEY=dummy python -m app.core.vectorstore_migration [--dry-run] [--shards 16] [--delete-source]
+# 서버와 embedding outbox worker를 멈춘 상태에서 실행하고,
+# 옮긴 뒤 VECTORSTORE_LAYOUT=sharded, VECTORSTORE_SHARDS(같은 값)로 재시작
+# (이후 python -m app.services.embedding_reconcile_service --dry-run 으로 정합성 확인)
+
+import argparse
+import os
+import re
+import time
+
+import chromadb
+
+from app.core.vectorstore import CHROMA_DB_PATH, collection_name
+
+# 한 번에 읽고 쓸 문서 수
+PAGE_SIZE = 500
+
+_PER_USER_COLLECTION = re.compile(r'^cover_letters_(\d+)$')
+
+
+def _collection_names(client: chromadb.ClientAPI) -> list[str]:
+    # chromadb 버전에 따라 이름 또는 Collection 객체를 반환
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+
+def migrate_to_shards(client: chromadb.ClientAPI, shards: int, dry_run: bool, delete_source: bool) -> dict:
+    user_collections = sorted((int(match.group(1)), name) for name in _collection_names(client)
+                              if (match := _PER_USER_COLLECTION.match(name)))
+    stats = {'collections': len(user_collections), 'documents': 0, 'mismatched_users': [], 'deleted_collections': 0}
+    for user_id, name in user_collections:
+        source = client.get_collection(name)
+        shard_name = collection_name(user_id, 'sharded', shards)
+        count = source.count()
+        stats['documents'] += count
+        if dry_run:
+            print(f"{name} -> {shard_name}: {count}개")
+            continue
+
+        # 원본 collection과 같은 거리 함수/설정으로 생성
+        target = client.get_or_create_collection(shard_name, metadata=source.metadata)
+        for offset in range(0, count, PAGE_SIZE):
+            page = source.get(limit=PAGE_SIZE, offset=offset, include=['documents', 'metadatas', 'embeddings'])
+            metadatas = [{**(metadata or {}), 'user_id': user_id} for metadata in page['metadatas']]
+            target.upsert(ids=page['ids'], documents=page['documents'], metadatas=metadatas,
+                          embeddings=page['embeddings'])
+
+        migrated = len(target.get(where={'user_id': user_id}, include=[])['ids'])
+        if migrated != count:
+            stats['mismatched_users'].append(user_id)
+            print(f"[불일치] user_id: {user_id}, 원본 {count}개, shard {migrated}개 (원본 유지)")
+            continue
+        if delete_source:
+            client.delete_collection(name)
+            stats['deleted_collections'] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='유저별 collection -> shard collection 이전')
+    parser.add_argument('--dry-run', action='store_true', help='옮길 collection과 문서 수만 출력')
+    parser.add_argument('--shards', type=int, default=int(os.getenv('VECTORSTORE_SHARDS', 16)))
+    parser.add_argument('--delete-source', action='store_true', help='문서 수가 일치하면 원본 collection 삭제')
+    parser.add_argument('--path', default=CHROMA_DB_PATH, help='chroma db 경로')
+    args = parser.parse_args()
+
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    start = time.perf_counter()
+    result = migrate_to_shards(chromadb.PersistentClient(path=args.path), args.shards, args.dry_run,
+                               args.delete_source)
+    print("=" * 60)
+    print(f"유저 collection: {result['collections']}개, 문서: {result['documents']}개, "
+          f"불일치 유저: {len(result['mismatched_users'])}명, 삭제한 collection: {result['deleted_collections']}개 "
+          f"({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,42 @@
+import enum
+import uuid
+
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, JSON, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AiCoverLetterJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+# 진행 상황 구독용 세부 단계
+class AiCoverLetterJobStage(str, enum.Enum):
+    QUEUED = "QUEUED"
+    ANALYZING_JOB_POSTING = "ANALYZING_JOB_POSTING"
+    GENERATING = "GENERATING"
+    SAVING = "SAVING"
+    DONE = "DONE"
+
+
+class AiCoverLetterJob(Base):
+    __tablename__ = "ai_cover_letter_job"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(Enum(AiCoverLetterJobStatus), default=AiCoverLetterJobStatus.PENDING, nullable=False)
+    stage = Column(Enum(AiCoverLetterJobStage), default=AiCoverLetterJobStage.QUEUED, nullable=False)
+    # AiCoverLetterGenerationRequest 원본
+    request = Column(JSON, nullable=False)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # worker가 job을 점유하는 기한, 지나면 다른 worker가 다시 가져감 (worker 재시작 대비)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    cover_letter_id = Column(Integer, ForeignKey("cover_letter.id"), nullable=True)
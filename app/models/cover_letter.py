@@ -2,7 +2,7 @@
 
 import enum
 
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.sql import func
 
@@ -27,8 +27,20 @@ class CoverLetter(Base):
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # 1:N 관계: CoverLetter가 여러 개의 CoverLetterItem을 가짐
-    items: Mapped[list[CoverLetterItem]] = relationship("CoverLetterItem", back_populates="cover_letter", cascade="all, delete-orphan")
+    # 항목은 작성 순서(id)대로 로드 (joinedload 시 alias된 항목 테이블 기준으로 ORDER BY가 붙음)
+    items: Mapped[list[CoverLetterItem]] = relationship("CoverLetterItem", back_populates="cover_letter",
+                                                        cascade="all, delete-orphan",
+                                                        order_by=CoverLetterItem.id)
 
     # N:1 관계: 여러 CoverLetter가 한 User에 속함
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    user = relationship("User", back_populates="cover_letters")
\ No newline at end of file
+    user = relationship("User", back_populates="cover_letters")
+
+    # 유저별 자소서 목록 keyset pagination용 인덱스
+    __table_args__ = (
+        Index('ix_cover_letter_user_type_deleted_created', 'user_id', 'type', 'deleted_at',
+              created_at.desc(), id.desc()),
+    )
+
+    # INSERT 시 server default(created_at)를 RETURNING으로 함께 가져옴 (async 세션에서 refresh 불필요)
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
@@ -0,0 +1,40 @@
+import enum
+
+from sqlalchemy import Column, Integer, DateTime, Enum, Text, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class EmbeddingOutboxOperation(str, enum.Enum):
+    UPSERT = "UPSERT"  # 자소서 내용을 vector DB에 맞춤 (저장/수정/타입 변경)
+    DELETE = "DELETE"  # 자소서의 vector DB 문서 삭제
+
+
+class EmbeddingOutboxStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    FAILED = "FAILED"  # 최대 재시도 횟수 초과, 처리 완료된 event는 삭제됨
+
+
+class EmbeddingOutbox(Base):
+    """
+    vector DB에 반영할 자소서 변경 event (transactional outbox)
+    자소서 변경과 같은 commit으로 저장하고, embedding outbox worker가 처리합니다.
+    """
+    __tablename__ = "embedding_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    operation = Column(Enum(EmbeddingOutboxOperation), nullable=False)
+    status = Column(Enum(EmbeddingOutboxStatus), default=EmbeddingOutboxStatus.PENDING, nullable=False)
+    # cover_letter는 soft delete만 하지만, 삭제 event가 남아있어도 되도록 FK는 두지 않음
+    user_id = Column(Integer, nullable=False)
+    cover_letter_id = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # 이 시각 이후에 처리 (재시도 backoff, worker 점유 lease에 함께 사용)
+    next_attempt_at = Column(DateTime, server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_embedding_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
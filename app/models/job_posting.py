@@ -10,6 +10,8 @@ class JobPosting(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     url = Column(Text, nullable=False)
+    # 정규화된 채용공고 캐시 키 (예: wanted:12345, 그 외 사이트는 url:{sha256})
+    posting_key = Column(String(255), nullable=True, unique=True, index=True)
     company_name = Column(String(255), nullable=True)
     position_title = Column(String(255), nullable=True)
     experience = Column(String(50), nullable=True)
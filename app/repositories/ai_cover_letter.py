@@ -1,13 +1,98 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.models.ai_cover_letter_job import AiCoverLetterJob, AiCoverLetterJobStatus
+
+# 유저별 AI 자소서 job 접수 lock의 advisory lock 첫 번째 키 (두 번째 키는 user_id)
+JOB_SUBMISSION_LOCK_CLASS = 1
 
 
 class AiCoverLetterRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def save_job(self, job: AiCoverLetterJob) -> AiCoverLetterJob:
+        self.db.add(job)
+        await self.db.commit()
+        await self.db.refresh(job)
+        return job
+
+    async def lock_user_job_submission(self, user_id: int) -> None:
+        """transaction이 끝날 때(commit/rollback)까지 유지되는 유저 단위 advisory lock을 잡습니다."""
+        await self.db.execute(select(func.pg_advisory_xact_lock(JOB_SUBMISSION_LOCK_CLASS, user_id)))
+
+    async def find_job_by_id(self, job_id: str) -> Optional[AiCoverLetterJob]:
+        return await self.db.get(AiCoverLetterJob, job_id, populate_existing=True)
+
+    async def claim_next_job(self, lease_seconds: int, max_attempts: int) -> Optional[AiCoverLetterJob]:
+        """
+        대기 중이거나 lease가 만료된(worker가 죽은) job 하나를 점유합니다.
+        SKIP LOCKED로 여러 worker 프로세스가 같은 job을 가져가지 않도록 합니다.
+        lease가 만료된 job이 이미 max_attempts번 시도됐으면 (처리하다 worker 프로세스가 계속 죽는 경우) 실패 처리합니다.
+        """
+        while True:
+            now = datetime.now()
+            query = (
+                select(AiCoverLetterJob)
+                .filter(or_(
+                    AiCoverLetterJob.status == AiCoverLetterJobStatus.PENDING,
+                    and_(AiCoverLetterJob.status == AiCoverLetterJobStatus.RUNNING,
+                         AiCoverLetterJob.lease_expires_at < now)
+                ))
+                .order_by(AiCoverLetterJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = await self.db.scalar(query)
+            if job is None:
+                await self.db.rollback()
+                return None
+            job.updated_at = now
+            if job.status == AiCoverLetterJobStatus.RUNNING and job.attempts >= max_attempts:
+                job.status = AiCoverLetterJobStatus.FAILED
+                job.error = '처리 중 worker가 반복해서 종료되어 최대 재시도 횟수를 초과했습니다.'
+                job.lease_expires_at = None
+                await self.db.commit()
+                continue
+            job.status = AiCoverLetterJobStatus.RUNNING
+            job.attempts += 1
+            job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+            await self.db.commit()
+            return job
+
+    async def update_owned_job(self, job_id: str, attempts: int, commit: bool = True, **values) -> bool:
+        """
+        job을 점유한 시도(attempts)가 그대로일 때만 값을 바꿉니다.
+        lease가 만료되어 다른 worker가 다시 가져간 경우(attempts가 바뀜)에는 바꾸지 않고 False를 반환합니다.
+        commit=False이면 같은 transaction의 다른 변경과 함께 호출하는 쪽에서 commit 합니다.
+        """
+        result = await self.db.execute(
+            update(AiCoverLetterJob)
+            .filter(AiCoverLetterJob.id == job_id,
+                    AiCoverLetterJob.status == AiCoverLetterJobStatus.RUNNING,
+                    AiCoverLetterJob.attempts == attempts)
+            .values(**values, updated_at=datetime.now())
+        )
+        if commit:
+            await self.db.commit()
+        return result.rowcount == 1
+
+    async def extend_job_lease(self, job_id: str, attempts: int, lease_seconds: int) -> bool:
+        """처리 중인 job의 lease를 연장합니다. (다른 worker가 다시 가져간 경우 False)"""
+        return await self.update_owned_job(job_id, attempts,
+                                           lease_expires_at=datetime.now() + timedelta(seconds=lease_seconds))
+
+    async def rollback(self, job: AiCoverLetterJob) -> AiCoverLetterJob:
+        """진행 중이던 변경을 버리고 job 상태를 DB 기준으로 다시 읽어옵니다."""
+        await self.db.rollback()
+        await self.db.refresh(job)
+        return job
+
 
-def get_ai_cover_letter_repository(db: Session = Depends(get_db)) -> AiCoverLetterRepository:
+def get_ai_cover_letter_repository(db: AsyncSession = Depends(get_db)) -> AiCoverLetterRepository:
     return AiCoverLetterRepository(db)
@@ -1,44 +1,106 @@
+from datetime import datetime
 from typing import Optional
 
 from fastapi import Depends
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, select, tuple_, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
 
 from app.core.database import get_db
 from app.models.cover_letter import CoverLetter, CoverLetterType
+from app.models.cover_letter_item import CoverLetterItem
 
 
 class CoverLetterRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def save(self, cover_letter: CoverLetter) -> CoverLetter:
+    async def save(self, cover_letter: CoverLetter) -> CoverLetter:
         self.db.add(cover_letter)
-        self.db.commit()
-        self.db.refresh(cover_letter)
+        await self.db.commit()
         return cover_letter
 
-    def find_all_by_user_id(self, user_id: int, type: CoverLetterType) -> list[CoverLetter]:
+    async def add(self, cover_letter: CoverLetter) -> CoverLetter:
+        # id만 발급받고 commit은 호출하는 쪽에서 (같은 transaction에 다른 변경을 함께 저장할 때)
+        self.db.add(cover_letter)
+        await self.db.flush()
+        return cover_letter
+
+    async def find_page_by_user_id(self, user_id: int, type: CoverLetterType, limit: Optional[int] = None,
+                                   cursor: Optional[tuple[datetime, int]] = None) -> list[Row]:
+        """
+        (created_at, id) 내림차순으로 limit개(없으면 전체)의 (id, title, created_at)만 조회합니다.
+        cursor가 있으면 해당 위치 다음부터 조회하므로 페이지가 뒤로 가도 OFFSET처럼 느려지지 않습니다.
+        """
         query = (
-            self.db.query(CoverLetter)
+            select(CoverLetter.id, CoverLetter.title, CoverLetter.created_at)
             .filter(
                 CoverLetter.user_id == user_id,
                 CoverLetter.deleted_at == None,
                 CoverLetter.type == type
             )
-            .order_by(desc(CoverLetter.created_at))
+            .order_by(desc(CoverLetter.created_at), desc(CoverLetter.id))
+            .limit(limit)
         )
-        return query.all()
+        if cursor is not None:
+            query = query.filter(tuple_(CoverLetter.created_at, CoverLetter.id) < tuple_(*cursor))
+        return list(await self.db.execute(query))
 
-    def find_by_id(self, cover_letter_id) -> Optional[CoverLetter]:
-        return self.db.get(CoverLetter, cover_letter_id)
+    async def find_by_id(self, cover_letter_id) -> Optional[CoverLetter]:
+        return await self.db.get(CoverLetter, cover_letter_id)
+
+    async def find_by_id_with_items(self, cover_letter_id) -> Optional[CoverLetter]:
+        # 자소서와 삭제되지 않은 항목을 한 번의 JOIN 쿼리로 조회
+        query = (
+            select(CoverLetter)
+            .options(joinedload(CoverLetter.items.and_(CoverLetterItem.deleted_at == None)))
+            .filter(CoverLetter.id == cover_letter_id)
+        )
+        result = await self.db.execute(query)
+        return result.unique().scalar_one_or_none()
+
+    async def find_all_by_ids_with_items(self, cover_letter_ids: list[int]) -> list[CoverLetter]:
+        # 삭제된 자소서도 함께 조회 (호출하는 쪽에서 deleted_at 확인)
+        query = (
+            select(CoverLetter)
+            .options(selectinload(CoverLetter.items.and_(CoverLetterItem.deleted_at == None)))
+            .filter(CoverLetter.id.in_(cover_letter_ids))
+        )
+        return list(await self.db.scalars(query))
 
-    def delete_by_id(self, cover_letter_id) -> None:
-        cover_letter = self.find_by_id(cover_letter_id)
+    async def find_embedded_items_by_user_ids(self, user_ids: list[int]) -> list[Row]:
+        """
+        vector DB에 있어야 하는 항목(삭제되지 않은 USER 자소서의 삭제되지 않은 항목)을
+        자소서 정보와 함께 (user_id, cover_letter_id, item_id) 순서로 조회합니다.
+        """
+        query = (
+            select(CoverLetter.user_id, CoverLetter.id.label('cover_letter_id'), CoverLetter.title,
+                   CoverLetter.created_at, CoverLetter.updated_at,
+                   CoverLetterItem.id.label('item_id'), CoverLetterItem.question, CoverLetterItem.char_limit,
+                   CoverLetterItem.content)
+            .join(CoverLetterItem, CoverLetterItem.cover_letter_id == CoverLetter.id)
+            .filter(
+                CoverLetter.user_id.in_(user_ids),
+                CoverLetter.type == CoverLetterType.USER,
+                CoverLetter.deleted_at == None,
+                CoverLetterItem.deleted_at == None
+            )
+            .order_by(CoverLetter.user_id, CoverLetter.id, CoverLetterItem.id)
+        )
+        return list(await self.db.execute(query))
+
+    async def delete_by_id(self, cover_letter_id) -> None:
+        # cascade 삭제를 위해 삭제된 항목까지 모두 조회
+        query = (
+            select(CoverLetter)
+            .options(selectinload(CoverLetter.items))
+            .filter(CoverLetter.id == cover_letter_id)
+        )
+        cover_letter = await self.db.scalar(query)
         if cover_letter:
-            self.db.delete(cover_letter)
-            self.db.commit()
+            await self.db.delete(cover_letter)
+            await self.db.commit()
 
 
-def get_cover_letter_repository(db: Session = Depends(get_db)) -> CoverLetterRepository:
+def get_cover_letter_repository(db: AsyncSession = Depends(get_db)) -> CoverLetterRepository:
     return CoverLetterRepository(db)
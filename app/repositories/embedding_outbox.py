@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.embedding_outbox import EmbeddingOutbox, EmbeddingOutboxOperation, EmbeddingOutboxStatus
+
+
+class EmbeddingOutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def add(self, user_id: int, cover_letter_id: int, operation: EmbeddingOutboxOperation) -> None:
+        """
+        event를 세션에 추가만 합니다. commit은 자소서 변경과 함께 호출하는 쪽에서 합니다.
+        (자소서가 저장되면 event도 반드시 저장되도록)
+        """
+        self.db.add(EmbeddingOutbox(user_id=user_id, cover_letter_id=cover_letter_id, operation=operation))
+
+    async def claim_batch(self, batch_size: int, lease_seconds: int) -> list[EmbeddingOutbox]:
+        """
+        처리할 시각이 된 event를 최대 batch_size개 점유합니다.
+        next_attempt_at을 lease 기한으로 미뤄두므로, worker가 죽으면 기한 후 다른 worker가 다시 가져갑니다.
+        """
+        now = datetime.now()
+        query = (
+            select(EmbeddingOutbox)
+            .filter(EmbeddingOutbox.status == EmbeddingOutboxStatus.PENDING,
+                    EmbeddingOutbox.next_attempt_at <= now)
+            .order_by(EmbeddingOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        events = list(await self.db.scalars(query))
+        for event in events:
+            event.attempts += 1
+            event.next_attempt_at = now + timedelta(seconds=lease_seconds)
+        await self.db.commit()
+        return events
+
+    async def finish_batch(self, succeeded: list[EmbeddingOutbox], failed: list[EmbeddingOutbox]) -> None:
+        """처리된 event는 삭제하고, 실패한 event의 변경(재시도 시각, 상태, 에러)은 저장합니다."""
+        if succeeded:
+            await self.db.execute(delete(EmbeddingOutbox).where(EmbeddingOutbox.id.in_([e.id for e in succeeded])))
+        await self.db.commit()
+
+    async def get_backlog_stats(self) -> dict:
+        query = (
+            select(EmbeddingOutbox.status, func.count(), func.min(EmbeddingOutbox.created_at))
+            .group_by(EmbeddingOutbox.status)
+        )
+        rows = {status: (count, oldest) for status, count, oldest in await self.db.execute(query)}
+        pending_count, oldest_pending = rows.get(EmbeddingOutboxStatus.PENDING, (0, None))
+        failed_count, _ = rows.get(EmbeddingOutboxStatus.FAILED, (0, None))
+        return {
+            'pending': pending_count,
+            'failed': failed_count,
+            'oldest_pending_age_seconds':
+                round((datetime.now() - oldest_pending).total_seconds()) if oldest_pending else 0,
+        }
@@ -1,23 +1,75 @@
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, engine
 from app.models.job_posting import JobPosting
+from app.utils.logging import logger
+
+ADVISORY_LOCK_POLL_SECONDS = 0.5
+ADVISORY_LOCK_TIMEOUT_SECONDS = 120
+
+
+class AnalysisLockTimeout(Exception):
+    """다른 worker의 같은 채용공고 분석이 ADVISORY_LOCK_TIMEOUT_SECONDS 안에 끝나지 않음"""
+
+
+def _advisory_lock_key(value: str) -> int:
+    # postgres advisory lock은 bigint 키를 사용
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], 'big', signed=True)
 
 
 class JobPostingRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def find_by_url(self, url: str):
-        return self.db.query(JobPosting).filter(JobPosting.url == url).first()
+    async def find_by_url(self, url: str):
+        return await self.db.scalar(select(JobPosting).filter(JobPosting.url == url).limit(1))
+
+    async def find_by_posting_key(self, posting_key: str) -> Optional[JobPosting]:
+        return await self.db.scalar(select(JobPosting).filter(JobPosting.posting_key == posting_key))
+
+    async def find_by_id(self, job_posting_id: int) -> Optional[JobPosting]:
+        return await self.db.get(JobPosting, job_posting_id)
 
-    def save(self, job_posting: JobPosting) -> JobPosting:
+    async def save(self, job_posting: JobPosting) -> JobPosting:
         self.db.add(job_posting)
-        self.db.commit()
-        self.db.refresh(job_posting)
+        await self.db.commit()
+        await self.db.refresh(job_posting)
         return job_posting
 
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    @asynccontextmanager
+    async def analysis_lock(self, posting_key: str) -> AsyncIterator[None]:
+        """
+        여러 gunicorn worker가 같은 채용공고를 동시에 분석하지 않도록 advisory lock을 잡습니다.
+        lock 대기 중 event loop를 막지 않도록 try lock을 polling 합니다.
+        """
+        key = _advisory_lock_key(posting_key)
+        async with engine.connect() as conn:
+            waited = 0.0
+            acquired = await conn.scalar(select(func.pg_try_advisory_lock(key)))
+            while not acquired and waited < ADVISORY_LOCK_TIMEOUT_SECONDS:
+                await asyncio.sleep(ADVISORY_LOCK_POLL_SECONDS)
+                waited += ADVISORY_LOCK_POLL_SECONDS
+                acquired = await conn.scalar(select(func.pg_try_advisory_lock(key)))
+            if not acquired:
+                # lock 없이 크롤링하면 중복 분석을 막지 못하므로 호출하는 쪽에서 결과를 다시 확인하도록 실패 처리
+                logger.warning(f'채용공고 분석 lock 대기 시간 초과: {posting_key}')
+                raise AnalysisLockTimeout(posting_key)
+            try:
+                yield
+            finally:
+                await conn.execute(select(func.pg_advisory_unlock(key)))
+                await conn.commit()
+
 
-def get_job_posting_repository(db: Session = Depends(get_db)) -> JobPostingRepository:
+def get_job_posting_repository(db: AsyncSession = Depends(get_db)) -> JobPostingRepository:
     return JobPostingRepository(db)
@@ -1,49 +1,55 @@
 from typing import Type
 
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import hash_password
+from app.core.security import hash_password_async
 from app.models.users import User
 
 
 class UserRepositoryInterface:
-    def find_user_by_id(self, id: int) -> User:
+    async def find_user_by_id(self, id: int) -> User:
         pass
 
-    def find_user_by_email(self, email: str) -> User:
+    async def find_user_by_email(self, email: str) -> User:
         pass
 
-    def save_user(self, user: User) -> User:
+    async def save_user(self, user: User) -> User:
         pass
 
-    def find_user_by_oauth_id(self, oauth_id) -> User:
+    async def find_user_by_oauth_id(self, oauth_id) -> User:
         pass
 
 
 class UserRepository(UserRepositoryInterface):
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def find_user_by_id(self, id: int) -> Type[User] | None:
-        return self.db.get(User, id)
+    async def find_user_by_id(self, id: int) -> Type[User] | None:
+        return await self.db.get(User, id)
 
-    def find_user_by_oauth_id(self, oauth_id: str) -> Type[User] | None:
-        query = self.db.query(User).filter(User.oauth_id == oauth_id)
-        user = query.first()
+    async def find_user_by_oauth_id(self, oauth_id: str) -> Type[User] | None:
+        query = select(User).filter(User.oauth_id == oauth_id).limit(1)
+        user = await self.db.scalar(query)
         return user
 
-    def find_user_by_email(self, email: str) -> User:
-        return self.db.query(User).filter(User.email == email).first()
+    async def find_user_by_email(self, email: str) -> User:
+        return await self.db.scalar(select(User).filter(User.email == email).limit(1))
 
-    def save_user(self, user: User) -> User:
-        user.password = hash_password(user.password)
+    async def find_user_ids_after(self, after_id: int, limit: int) -> list[int]:
+        # id 순서로 after_id 다음부터 limit명 (전체 유저를 batch로 순회할 때 사용)
+        query = select(User.id).filter(User.id > after_id).order_by(User.id).limit(limit)
+        return list(await self.db.scalars(query))
+
+    async def save_user(self, user: User) -> User:
+        user.password = await hash_password_async(user.password)
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
 
 
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepositoryInterface:
+def get_user_repository(db: AsyncSession = Depends(get_db)) -> UserRepositoryInterface:
     return UserRepository(db)
@@ -1,12 +1,15 @@
 import uuid
 
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends
 from starlette import status
+from starlette.responses import StreamingResponse
 
 from app.core.security import get_current_user_id
 from app.models.cover_letter import CoverLetterType
-from app.schemas.ai_cover_letter import AiCoverLetterGenerationRequest
+from app.schemas.ai_cover_letter import AiCoverLetterGenerationRequest, AiCoverLetterJobResponse
+from app.services.ai_cover_letter_job_service import AiCoverLetterJobService, get_ai_cover_letter_job_service
 from app.services.ai_cover_letter_service import AiCoverLetterService, get_ai_cover_letter_service
+from app.utils.sse import SSE_HEADERS
 
 router = APIRouter(
     prefix='/api/cover-letters',
@@ -22,11 +25,44 @@ async def generate_ai_cover_letter(request: AiCoverLetterGenerationRequest,
     return await service.generate_ai_cover_letter(user_id, request)
 
 
+# AI 자소서 생성 (항목이 완성되는 대로 SSE로 전달)
+@router.post('/ai/stream', status_code=status.HTTP_200_OK)
+async def stream_ai_cover_letter(request: AiCoverLetterGenerationRequest,
+                                 user_id: int = Depends(get_current_user_id),
+                                 service: AiCoverLetterService = Depends(get_ai_cover_letter_service)):
+    events = await service.stream_ai_cover_letter(user_id, request)
+    return StreamingResponse(events, media_type='text/event-stream', headers=SSE_HEADERS)
+
+
+# AI 자소서 생성 job 접수 (비동기 처리)
+@router.post('/ai/jobs', status_code=status.HTTP_202_ACCEPTED, response_model=AiCoverLetterJobResponse)
+async def submit_ai_cover_letter_job(request: AiCoverLetterGenerationRequest,
+                                     user_id: int = Depends(get_current_user_id),
+                                     service: AiCoverLetterJobService = Depends(get_ai_cover_letter_job_service)):
+    return await service.submit_job(user_id, request)
+
+
+# AI 자소서 생성 job 상태 조회
+@router.get('/ai/jobs/{job_id}', status_code=status.HTTP_200_OK, response_model=AiCoverLetterJobResponse)
+async def get_ai_cover_letter_job(job_id: str,
+                                  user_id: int = Depends(get_current_user_id),
+                                  service: AiCoverLetterJobService = Depends(get_ai_cover_letter_job_service)):
+    return await service.get_job(user_id, job_id)
+
+
+# AI 자소서 생성 job 진행 상황 구독 (SSE)
+@router.get('/ai/jobs/{job_id}/events', status_code=status.HTTP_200_OK)
+async def subscribe_ai_cover_letter_job(job_id: str,
+                                        user_id: int = Depends(get_current_user_id),
+                                        service: AiCoverLetterJobService = Depends(get_ai_cover_letter_job_service)):
+    return StreamingResponse(await service.stream_job(user_id, job_id), media_type='text/event-stream',
+                             headers=SSE_HEADERS)
+
+
 # 자소서 타입 변경 (AI -> USER)
 @router.patch('/{cover_letter_id}/type', status_code=status.HTTP_201_CREATED)
 async def convert_cover_letter_type(cover_letter_id: int,
-                                    background_tasks: BackgroundTasks,
                                     user_id: int = Depends(get_current_user_id),
                                     service: AiCoverLetterService = Depends(get_ai_cover_letter_service)):
     cover_letter_type = CoverLetterType.USER
-    service.convert_type(user_id, cover_letter_id, cover_letter_type, background_tasks)
+    await service.convert_type(user_id, cover_letter_id, cover_letter_type)
@@ -36,7 +36,7 @@ async def google_login(request: Request,
 
         # 유저 DB 유무 확인
         oauth_provider = 'google'
-        user_detail = service.get_oauth_user(oauth_id, email, name, oauth_provider)
+        user_detail = await service.get_oauth_user(oauth_id, email, name, oauth_provider)
 
         # 세션 생성
         create_session(request, UserCredentials(username=user_detail.id,
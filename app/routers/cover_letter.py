@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from starlette import status
 
 from app.core.security import get_current_user
@@ -10,6 +10,8 @@ from app.schemas.cover_letter import CoverLetterAdditionRequest, CoverLetterSimp
     CoverLetterEditRequest
 from app.services.cover_letter_service import CoverLetterService, get_cover_letter_service
 
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
 router = APIRouter(
     prefix='/api/cover-letters',
     tags=['cover-letters']
@@ -18,31 +20,37 @@ router = APIRouter(
 
 @router.post('/user', status_code=status.HTTP_201_CREATED)
 async def add_cover_letter(request: CoverLetterAdditionRequest,
-                           background_tasks: BackgroundTasks,
                            user: User = Depends(get_current_user),
                            service: CoverLetterService = Depends(get_cover_letter_service)):
     # 임베딩 API 호출 제한 확인
     try:
-        cover_letter_id = service.create_cover_letter(user.id, request, background_tasks)
+        cover_letter_id = await service.create_cover_letter(user.id, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     return cover_letter_id
 
 
+# limit 없이 호출하면 기존처럼 전체 목록을 반환하고,
+# limit을 주면 한 페이지만 반환하면서 다음 페이지 cursor를 X-Next-Cursor 헤더로 전달 (마지막 페이지이면 헤더 없음)
 @router.get('', status_code=status.HTTP_200_OK, response_model=list[CoverLetterSimpleResponse])
-async def get_cover_letters(cv_type: Optional[CoverLetterType] = CoverLetterType.USER,
+async def get_cover_letters(response: Response,
+                            cv_type: Optional[CoverLetterType] = CoverLetterType.USER,
+                            cursor: Optional[str] = None,
+                            limit: Optional[int] = Query(default=None, ge=1, le=100),
                             user: User = Depends(get_current_user),
                             service: CoverLetterService = Depends(get_cover_letter_service)) -> list[
     CoverLetterSimpleResponse]:
-    cover_letters = service.get_cover_letters(user.id, cv_type)
-    return cover_letters
+    page = await service.get_cover_letters(user.id, cv_type, limit, cursor)
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get('/{cover_letter_id}', status_code=status.HTTP_200_OK, response_model=CoverLetterResponse)
 async def get_cover_letter(cover_letter_id: int,
                            user: User = Depends(get_current_user),
                            service: CoverLetterService = Depends(get_cover_letter_service)) -> CoverLetterResponse:
-    cover_letter = service.get_cover_letter(user.id, cover_letter_id)
+    cover_letter = await service.get_cover_letter(user.id, cover_letter_id)
     return cover_letter
 
 
@@ -51,12 +59,11 @@ async def update_cover_letter(cover_letter_id: int,
                               request: CoverLetterEditRequest,
                               user: User = Depends(get_current_user),
                               service: CoverLetterService = Depends(get_cover_letter_service)) -> None:
-    service.edit_cover_letter(user.id, cover_letter_id, request)
+    await service.edit_cover_letter(user.id, cover_letter_id, request)
 
 
 @router.delete('/{cover_letter_id}', status_code=status.HTTP_204_NO_CONTENT, response_model=None)
 async def delete_cover_letter(cover_letter_id: int,
-                              background_tasks: BackgroundTasks,
                               user: User = Depends(get_current_user),
                               service: CoverLetterService = Depends(get_cover_letter_service)) -> None:
-    service.remove_cover_letter(user.id, cover_letter_id, background_tasks)
+    await service.remove_cover_letter(user.id, cover_letter_id)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import get_current_user
@@ -16,10 +16,10 @@ router = APIRouter(
 @router.post('')
 async def created_feedback(request: FeedbackCreationRequest,
                            user: User = Depends(get_current_user),
-                           db: Session = Depends(get_db)):
+                           db: AsyncSession = Depends(get_db)):
     feedback = Feedback(content=request.content,
                         user_id=user.id)
     db.add(feedback)
-    db.commit()
-    db.refresh(feedback)
+    await db.commit()
+    await db.refresh(feedback)
     return feedback.id
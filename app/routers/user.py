@@ -14,13 +14,13 @@ router = APIRouter(
 @router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_user(request: UserRegistrationRequest,
                       service: UserService = Depends(get_user_service)):
-    return service.register_user(request)
+    return await service.register_user(request)
 
 
 @router.get('/{user_id}', status_code=status.HTTP_200_OK)
 async def get_user(user_id: int,
                    service: UserService = Depends(get_user_service)):
-    return service.get_user(user_id)
+    return await service.get_user(user_id)
 
 
 # @router.post('/login', status_code=status.HTTP_200_OK)
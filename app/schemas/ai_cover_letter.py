@@ -1,5 +1,11 @@
+import enum
+from typing import Optional
+
 from pydantic import BaseModel
 
+from app.models.ai_cover_letter_job import AiCoverLetterJobStatus, AiCoverLetterJobStage
+from app.schemas.cover_letter import CoverLetterItemDto
+
 
 class AiCoverLetterItemGenerationRequest(BaseModel):
     id: str
@@ -7,12 +13,42 @@ class AiCoverLetterItemGenerationRequest(BaseModel):
     char_limit: int
 
 
+# 참조 자소서 검색 쿼리 생성 방식
+class SearchQueryMode(str, enum.Enum):
+    LLM = "LLM"  # Gemini로 검색 쿼리 생성
+    LOCAL = "LOCAL"  # 항목 질문 + 채용공고 키워드로 로컬에서 조합 (LLM 호출 없음)
+
+
 class AiCoverLetterGenerationRequest(BaseModel):
     job_posting_url: str
     items: list[AiCoverLetterItemGenerationRequest]
+    search_query_mode: Optional[SearchQueryMode] = None  # 없으면 SEARCH_QUERY_MODE 설정을 따름
 
 
 class VectorDbQuery(BaseModel):
     id: str
     query: str
 
+
+class AiCoverLetterJobResponse(BaseModel):
+    job_id: str
+    status: AiCoverLetterJobStatus
+    stage: AiCoverLetterJobStage
+    cover_letter_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+# SSE 스트리밍 이벤트
+class AiCoverLetterItemDelta(BaseModel):
+    id: str
+    text: str
+
+
+# 스트리밍 도중 429로 중단되어 항목을 처음부터 다시 생성 (지금까지 받은 delta는 버림)
+class AiCoverLetterItemReset(BaseModel):
+    id: str
+
+
+class AiCoverLetterItemGenerated(BaseModel):
+    id: str
+    item: CoverLetterItemDto
@@ -51,6 +51,11 @@ class CoverLetterSimpleResponse(BaseModel):
         from_attributes = True
 
 
+class CoverLetterPageResponse(BaseModel):
+    items: list[CoverLetterSimpleResponse]
+    next_cursor: Optional[str]  # 마지막 페이지이면 None
+
+
 class CoverLetterItemEditRequest(BaseModel):
     id: int
     question: str
@@ -0,0 +1,220 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db, SessionLocal
+from app.models.ai_cover_letter_job import AiCoverLetterJob, AiCoverLetterJobStatus, AiCoverLetterJobStage
+from app.repositories.ai_cover_letter import AiCoverLetterRepository, get_ai_cover_letter_repository
+from app.schemas.ai_cover_letter import AiCoverLetterGenerationRequest, AiCoverLetterJobResponse
+from app.services.ai_cover_letter_service import create_ai_cover_letter_service, _check_ai_cover_letter_generation
+from app.utils.logging import logger
+from app.utils.sse import format_sse
+
+AI_COVER_LETTER_JOB_WORKERS = int(os.getenv('AI_COVER_LETTER_JOB_WORKERS', 2))
+# 이 시간 동안 lease가 연장되지 않으면 worker가 죽은 것으로 보고 다른 worker가 다시 가져감
+AI_COVER_LETTER_JOB_LEASE_SECONDS = int(os.getenv('AI_COVER_LETTER_JOB_LEASE_SECONDS', 300))
+# 처리 중인 job의 lease를 연장하는 주기 (생성이 lease보다 오래 걸려도 다른 worker가 가져가지 않도록)
+AI_COVER_LETTER_JOB_HEARTBEAT_SECONDS = int(os.getenv('AI_COVER_LETTER_JOB_HEARTBEAT_SECONDS',
+                                                      AI_COVER_LETTER_JOB_LEASE_SECONDS // 3))
+AI_COVER_LETTER_JOB_MAX_ATTEMPTS = 3
+JOB_POLL_INTERVAL_SECONDS = 1.0
+
+TERMINAL_STATUSES = (AiCoverLetterJobStatus.SUCCEEDED, AiCoverLetterJobStatus.FAILED)
+
+
+def _to_response(job: AiCoverLetterJob) -> AiCoverLetterJobResponse:
+    return AiCoverLetterJobResponse(job_id=job.id,
+                                    status=job.status,
+                                    stage=job.stage,
+                                    cover_letter_id=job.cover_letter_id,
+                                    error=job.error)
+
+
+class AiCoverLetterJobService:
+    def __init__(self, repo: AiCoverLetterRepository, db: AsyncSession):
+        self.repo = repo
+        self.db = db
+
+    async def submit_job(self, user_id: int, request: AiCoverLetterGenerationRequest) -> AiCoverLetterJobResponse:
+        # 생성 조건은 접수 시점에 먼저 확인해서 바로 실패 응답
+        # 같은 유저의 동시 접수가 모두 남은 횟수를 보고 통과하지 않도록, job 저장(commit)까지 유저 단위 lock을 잡음
+        await self.repo.lock_user_job_submission(user_id)
+        await _check_ai_cover_letter_generation(user_id, self.db)
+
+        job = await self.repo.save_job(AiCoverLetterJob(user_id=user_id,
+                                                        request=request.model_dump(),
+                                                        status=AiCoverLetterJobStatus.PENDING,
+                                                        stage=AiCoverLetterJobStage.QUEUED))
+        logger.info(f'AI 자소서 생성 job 접수: job_id: {job.id}, user_id: {user_id}')
+        return _to_response(job)
+
+    async def _get_own_job(self, user_id: int, job_id: str) -> AiCoverLetterJob:
+        job = await self.repo.find_job_by_id(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail='Job not found')
+        if job.user_id != user_id:
+            raise HTTPException(status_code=403, detail="권한이 없는 유저입니다.")
+        return job
+
+    async def get_job(self, user_id: int, job_id: str) -> AiCoverLetterJobResponse:
+        return _to_response(await self._get_own_job(user_id, job_id))
+
+    async def stream_job(self, user_id: int, job_id: str) -> AsyncIterator[str]:
+        """
+        권한을 먼저 확인한 뒤(없는 job은 404, 다른 유저의 job은 403) 진행 상황 스트림을 반환합니다.
+        """
+        await self._get_own_job(user_id, job_id)
+        return stream_job_events(job_id)
+
+
+def get_ai_cover_letter_job_service(repo: AiCoverLetterRepository = Depends(get_ai_cover_letter_repository),
+                                    db: AsyncSession = Depends(get_db)) -> AiCoverLetterJobService:
+    return AiCoverLetterJobService(repo, db)
+
+
+async def stream_job_events(job_id: str) -> AsyncIterator[str]:
+    """
+    job 상태가 바뀔 때마다 SSE로 전달하고, 종료 상태가 되면 스트림을 닫습니다.
+    스트림이 요청 scope보다 오래 살아있으므로 별도 세션을 사용합니다. (권한 검증은 AiCoverLetterJobService.stream_job에서 수행)
+    """
+    async with SessionLocal() as db:
+        repo = AiCoverLetterRepository(db)
+        last_response = None
+        while True:
+            job = await repo.find_job_by_id(job_id)
+            # 매 polling마다 새 스냅샷을 읽도록 트랜잭션 종료
+            await db.commit()
+            if job is None:
+                yield format_sse('error', {'detail': 'Job not found'})
+                return
+            response = _to_response(job)
+            if response != last_response:
+                yield format_sse('progress', response)
+                last_response = response
+            if job.status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+
+class _JobLeaseLost(Exception):
+    """lease가 만료되어 다른 worker가 job을 다시 가져감"""
+
+
+async def _heartbeat_job_lease(job_id: str, attempts: int, on_lost: Callable[[], None]):
+    # 생성에 쓰는 세션과 동시에 사용하지 않도록 별도 세션에서 연장
+    while True:
+        await asyncio.sleep(AI_COVER_LETTER_JOB_HEARTBEAT_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                extended = await AiCoverLetterRepository(db).extend_job_lease(job_id, attempts,
+                                                                              AI_COVER_LETTER_JOB_LEASE_SECONDS)
+        except Exception as e:
+            logger.error(f'AI 자소서 생성 job lease 연장 실패: job_id: {job_id}, error: {e}')
+            continue
+        if not extended:
+            on_lost()
+            return
+
+
+async def _process_job(db: AsyncSession, repo: AiCoverLetterRepository, job: AiCoverLetterJob):
+    """
+    job을 처리하고 결과를 기록합니다.
+    job 상태는 점유한 시도(attempts)가 그대로일 때만 바꾸므로, lease를 잃은 뒤에는 새로 가져간 worker의 상태를 덮어쓰지 않습니다.
+    """
+    attempts = job.attempts
+    # 이전 시도에서 자소서를 저장한 뒤 job 완료 처리 전에 worker가 죽은 경우, 다시 생성하지 않고 완료 처리
+    if job.cover_letter_id is not None:
+        logger.info(f'AI 자소서 생성 job 이미 저장됨: job_id: {job.id}, cover_letter_id: {job.cover_letter_id}')
+        await repo.update_owned_job(job.id, attempts, status=AiCoverLetterJobStatus.SUCCEEDED,
+                                    stage=AiCoverLetterJobStage.DONE, lease_expires_at=None)
+        return
+
+    service = create_ai_cover_letter_service(db)
+    processing = asyncio.current_task()
+    lease_lost = asyncio.Event()
+
+    def on_lease_lost():
+        # 다른 worker가 이미 다시 가져갔으므로 중복 생성/저장하지 않도록 처리를 중단
+        logger.warning(f'AI 자소서 생성 job lease를 잃어 처리 중단: job_id: {job.id}, attempts: {attempts}')
+        lease_lost.set()
+        processing.cancel()
+
+    async def on_progress(stage: AiCoverLetterJobStage):
+        # 단계가 넘어갈 때마다 lease도 함께 연장
+        if not await repo.update_owned_job(
+                job.id, attempts, stage=stage,
+                lease_expires_at=datetime.now() + timedelta(seconds=AI_COVER_LETTER_JOB_LEASE_SECONDS)):
+            lease_lost.set()
+            raise _JobLeaseLost(job.id)
+
+    async def on_saved(cover_letter_id: int):
+        # 자소서 저장과 같은 transaction으로 기록해서 재시도 시 중복 생성하지 않도록 함
+        # (그 사이 다른 worker가 가져갔으면 자소서도 저장하지 않음)
+        if not await repo.update_owned_job(job.id, attempts, commit=False, cover_letter_id=cover_letter_id):
+            lease_lost.set()
+            raise _JobLeaseLost(job.id)
+
+    request = AiCoverLetterGenerationRequest.model_validate(job.request)
+    heartbeat = asyncio.create_task(_heartbeat_job_lease(job.id, attempts, on_lease_lost))
+    try:
+        try:
+            cover_letter_id = await service.generate_ai_cover_letter(job.user_id, request, on_progress=on_progress,
+                                                                     on_saved=on_saved, job_id=job.id)
+        finally:
+            # 생성이 끝난 뒤에는 heartbeat가 처리를 취소하지 않도록 먼저 정리
+            heartbeat.cancel()
+        result = {'status': AiCoverLetterJobStatus.SUCCEEDED, 'stage': AiCoverLetterJobStage.DONE,
+                  'cover_letter_id': cover_letter_id, 'lease_expires_at': None}
+        logger.info(f'AI 자소서 생성 job 완료: job_id: {job.id}, cover_letter_id: {cover_letter_id}')
+    except asyncio.CancelledError:
+        await repo.rollback(job)
+        if lease_lost.is_set():
+            processing.uncancel()
+            return
+        # worker 종료 시 다른 worker가 바로 이어받을 수 있도록 반납
+        await repo.update_owned_job(job.id, attempts, status=AiCoverLetterJobStatus.PENDING,
+                                    attempts=attempts - 1, lease_expires_at=None)
+        raise
+    except Exception as e:
+        await repo.rollback(job)
+        if lease_lost.is_set():
+            logger.warning(f'AI 자소서 생성 job lease를 잃어 처리 중단: job_id: {job.id}, attempts: {attempts}')
+            return
+        # 생성 조건 미충족(4xx)은 재시도해도 실패하므로 바로 종료
+        retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+        error = str(e.detail) if isinstance(e, HTTPException) else str(e)
+        status = AiCoverLetterJobStatus.PENDING if retryable and attempts < AI_COVER_LETTER_JOB_MAX_ATTEMPTS \
+            else AiCoverLetterJobStatus.FAILED
+        result = {'status': status, 'error': error, 'lease_expires_at': None}
+        logger.error(f'AI 자소서 생성 job 실패: job_id: {job.id}, attempts: {attempts}, error: {error}')
+    if not await repo.update_owned_job(job.id, attempts, **result):
+        logger.warning(f'AI 자소서 생성 job 결과를 기록하지 못함 (다른 worker가 가져감): job_id: {job.id}')
+
+
+async def run_ai_cover_letter_job_worker(worker_id: int):
+    """DB 큐(ai_cover_letter_job)에서 job을 하나씩 가져와 처리하는 worker"""
+    logger.info(f'[AI job worker {worker_id}] 시작')
+    while True:
+        try:
+            async with SessionLocal() as db:
+                repo = AiCoverLetterRepository(db)
+                job = await repo.claim_next_job(AI_COVER_LETTER_JOB_LEASE_SECONDS,
+                                                AI_COVER_LETTER_JOB_MAX_ATTEMPTS)
+                if job is None:
+                    await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+                    continue
+                logger.info(f'[AI job worker {worker_id}] job 처리 시작: job_id: {job.id}, attempts: {job.attempts}')
+                await _process_job(db, repo, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f'[AI job worker {worker_id}] 에러 발생: {e}')
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+
+def start_ai_cover_letter_job_workers() -> list[asyncio.Task]:
+    return [asyncio.create_task(run_ai_cover_letter_job_worker(i)) for i in range(AI_COVER_LETTER_JOB_WORKERS)]
@@ -1,98 +1,316 @@
-from fastapi import Depends, BackgroundTasks, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
-from app.core.database import get_db
-from app.core.security import encrypt_text, decrypt_text
+from fastapi import Depends, HTTPException
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db, SessionLocal
+from app.core.security import encrypt_texts_async
+from app.models.ai_cover_letter_job import AiCoverLetterJob, AiCoverLetterJobStage, AiCoverLetterJobStatus
 from app.models.cover_letter import CoverLetter, CoverLetterType
 from app.models.cover_letter_item import CoverLetterItem
+from app.models.embedding_outbox import EmbeddingOutboxOperation
+from app.models.job_posting import JobPosting
 from app.models.users import User
 from app.repositories.cover_letter import CoverLetterRepository, get_cover_letter_repository
-from app.schemas.ai_cover_letter import AiCoverLetterGenerationRequest
-from app.schemas.cover_letter import CoverLetterResponse
-from app.services.cover_letter_service import save_embedding_task
+from app.repositories.embedding_outbox import EmbeddingOutboxRepository
+from app.repositories.job_posting import JobPostingRepository
+from app.schemas.ai_cover_letter import AiCoverLetterGenerationRequest, AiCoverLetterItemGenerated, \
+    AiCoverLetterItemReset, SearchQueryMode
+from app.schemas.cover_letter import CoverLetterItemDto
+from app.services.job_posting_analyze_service import JobPostingAnalyzeService
 from app.services.job_posting_service import JobPostingService, get_job_posting_service
-from app.services.rag_service import generate_cover_letters
+from app.services.rag_service import generate_cover_letters, generate_cover_letters_stream, generate_search_query2, \
+    generate_search_query_from_raw_text, search_reference_cover_letters, build_search_queries, SEARCH_QUERY_MODE
+from app.utils.sse import format_sse
 # from app.utils.api_limit_manager import get_gemini_api_limit_manager, ApiLimitManager
 from app.utils.logging import logger
+from app.utils.stage_timer import StageTimer, PipelineStats
 
 AI_COVER_LETTER_GENERATION_LIMIT = 5
 
+# AI 자소서 생성 단계별 시간 집계
+pipeline_stats = PipelineStats()
+
+# 호출한 쪽이 취소되어도 끝까지 실행하는 task (event loop는 task를 약한 참조로만 들고 있으므로 보관)
+_detached_tasks: set[asyncio.Task] = set()
+
+
+def _run_detached(coro: Awaitable) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _detached_tasks.add(task)
+
+    def on_done(done: asyncio.Task):
+        _detached_tasks.discard(done)
+        # 결과를 기다리는 쪽이 없어도 'exception was never retrieved' 경고가 남지 않도록 조회
+        if not done.cancelled():
+            done.exception()
+
+    task.add_done_callback(on_done)
+    return task
+
 
 class AiCoverLetterService:
     def __init__(self,
                  repo: CoverLetterRepository,
                  job_posting_service: JobPostingService,
-                 db: Session):
+                 db: AsyncSession):
         self.repo = repo
         self.job_posting_service = job_posting_service
         self.db = db
+        self.outbox = EmbeddingOutboxRepository(db)
+
+    async def generate_ai_cover_letter(self, user_id: int, request: AiCoverLetterGenerationRequest,
+                                       on_progress: Optional[Callable[[AiCoverLetterJobStage], Awaitable[None]]] = None,
+                                       on_saved: Optional[Callable[[int], Awaitable[None]]] = None,
+                                       job_id: Optional[str] = None) -> int:
+        """
+        on_saved는 자소서 id가 발급된 뒤 commit 전에 호출되므로, 같은 transaction에 함께 저장할 변경을 넣을 수 있습니다.
+        (job worker가 job에 cover_letter_id를 기록하는 용도)
+        job_id는 worker에서 처리 중인 job으로, 접수할 때 예약한 생성 횟수에서 이 job은 제외하고 확인합니다.
+        """
+        # 유저가 업로드한 cover letter가 있는지, AI 자소서 생성 횟수가 남았는지 확인
+        await _check_ai_cover_letter_generation(user_id, self.db, exclude_job_id=job_id)
 
-    async def generate_ai_cover_letter(self, user_id: int, request: AiCoverLetterGenerationRequest) -> int:
-        # 유저가 업로드한 cover letter가 있는지 확인
-        _check_user_uploaded_cover_letter(user_id, self.db)
-        # AI 자소서 생성 횟수 확인
-        _check_ai_cover_letter_limit(user_id, self.db)
+        async def report(stage: AiCoverLetterJobStage):
+            if on_progress is not None:
+                await on_progress(stage)
 
+        timer = StageTimer()
         try:
-            # 채용공고 가져오기
-            job_posting = await self.job_posting_service.get_job_posting(request.job_posting_url)
+            # 채용공고 가져오기 + 참조 자소서 검색
+            await report(AiCoverLetterJobStage.ANALYZING_JOB_POSTING)
+            job_posting, references = await self._prepare_generation(user_id, request, timer)
             # 자소서 생성
-            generated_items = await generate_cover_letters(user_id, job_posting, request.items)
+            await report(AiCoverLetterJobStage.GENERATING)
+            with timer.measure('generation'):
+                generated_items = await generate_cover_letters(job_posting, request.items, references)
+            _record_pipeline_timing(timer)
 
             # DB 저장
-            ai_cover_letter = CoverLetter(type=CoverLetterType.AI,
-                                          title=f'{job_posting.company_name}-{job_posting.position_title}',
-                                          user_id=user_id)
-            ai_cover_letter.items = [
-                CoverLetterItem(
-                    question=item.question,
-                    char_limit=item.char_limit,
-                    content=encrypt_text(item.content)  # 내용 암호화
-                ) for item in generated_items]
-            self.repo.save(ai_cover_letter)
+            await report(AiCoverLetterJobStage.SAVING)
+            ai_cover_letter = await self._save_ai_cover_letter(user_id, job_posting, generated_items, on_saved)
             # return
             return ai_cover_letter.id
         except Exception as e:
             logger.error(f"Error generating AI cover letter: {e}")
-            raise HTTPException(status_code=500, detail={e})
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream_ai_cover_letter(self, user_id: int,
+                                     request: AiCoverLetterGenerationRequest) -> AsyncIterator[str]:
+        """
+        생성 조건을 먼저 확인한 뒤, 항목이 완성되는 대로 SSE로 전달하는 스트림을 반환합니다.
+        모든 항목이 완성되면 자소서를 저장하고 done 이벤트로 cover_letter_id를 전달합니다.
+        (클라이언트 연결이 끊겨도 생성과 저장은 끝까지 진행)
+        """
+        await _check_ai_cover_letter_generation(user_id, self.db)
+        return _stream_ai_cover_letter_events(user_id, request)
+
+    async def _prepare_generation(self, user_id: int, request: AiCoverLetterGenerationRequest, timer: StageTimer) \
+            -> tuple[JobPosting, dict[str, list[str]]]:
+        """
+        채용공고 분석과 참조 자소서 검색을 겹쳐서 실행합니다.
+        채용공고를 새로 크롤링하는 경우 구조화 분석을 기다리지 않고 크롤링 원문으로 바로 검색 쿼리를 생성하고,
+        이미 분석된 채용공고이면 분석 결과로 검색 쿼리를 생성합니다.
+        LOCAL 모드는 쿼리 생성에 LLM을 쓰지 않으므로 원문 대신 분석된 요구 사항을 기다려서 사용합니다.
+        """
+        search_query_mode = request.search_query_mode or SEARCH_QUERY_MODE
+        raw_text_future = asyncio.get_running_loop().create_future()
+
+        def on_raw_text(raw_text: str):
+            timer.record('job_posting_crawl', 0, timer.elapsed())
+            if not raw_text_future.done():
+                raw_text_future.set_result(raw_text)
+
+        # 채용공고 분석은 같은 공고를 기다리는 다른 요청과 공유될 수 있으므로(singleflight)
+        # 이 요청이 취소되어도 취소하지 않고 별도 세션에서 끝까지 진행한 뒤 결과만 버림
+        job_posting_task = _run_detached(self._get_job_posting_in_own_session(request.job_posting_url, on_raw_text))
+        references_task = None
+        try:
+            # 크롤링 원문과 분석 결과 중 먼저 나오는 것으로 검색 시작
+            await asyncio.wait({job_posting_task, raw_text_future}, return_when=asyncio.FIRST_COMPLETED)
+            if raw_text_future.done() and search_query_mode == SearchQueryMode.LLM:
+                references_task = asyncio.create_task(
+                    _retrieve_references(user_id, request, timer, raw_text=raw_text_future.result()))
+
+            job_posting = await asyncio.shield(job_posting_task)
+            if 'job_posting_crawl' in timer.stages:
+                timer.record('job_posting_analyze', timer.stages['job_posting_crawl'][1], timer.elapsed())
+            else:
+                timer.record('job_posting_lookup', 0, timer.elapsed())
+
+            if references_task is None:
+                references = await _retrieve_references(user_id, request, timer, job_posting=job_posting)
+            else:
+                references = await references_task
+            return job_posting, references
+        except BaseException:
+            if references_task is not None:
+                references_task.cancel()
+            raise
+
+    async def _get_job_posting_in_own_session(self, job_posting_url: str,
+                                              on_raw_text: Callable[[str], None]) -> JobPosting:
+        # 호출한 쪽 세션은 요청이 끝나면 닫히므로 분석/저장은 별도 세션에서 실행
+        async with SessionLocal() as db:
+            job_posting_service = JobPostingService(JobPostingRepository(db), self.job_posting_service.analyze_service)
+            return await job_posting_service.get_job_posting(job_posting_url, on_raw_text=on_raw_text)
 
-    def convert_type(self, user_id, cover_letter_id, type, background_tasks: BackgroundTasks):
+    async def _save_ai_cover_letter(self, user_id: int, job_posting: JobPosting,
+                                    generated_items: list[CoverLetterItemDto],
+                                    on_saved: Optional[Callable[[int], Awaitable[None]]] = None) -> CoverLetter:
+        ai_cover_letter = CoverLetter(type=CoverLetterType.AI,
+                                      title=f'{job_posting.company_name}-{job_posting.position_title}',
+                                      user_id=user_id)
+        # 내용 암호화
+        encrypted_contents = await encrypt_texts_async([item.content for item in generated_items])
+        ai_cover_letter.items = [
+            CoverLetterItem(
+                question=item.question,
+                char_limit=item.char_limit,
+                content=encrypted_content
+            ) for item, encrypted_content in zip(generated_items, encrypted_contents)]
+        if on_saved is None:
+            return await self.repo.save(ai_cover_letter)
+        await self.repo.add(ai_cover_letter)
+        await on_saved(ai_cover_letter.id)
+        await self.db.commit()
+        return ai_cover_letter
+
+    async def convert_type(self, user_id, cover_letter_id, type):
         # 유저 검증
-        user = self.db.get(User, user_id)
+        user = await self.db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail='User not found')
 
         # 타입 변경 (ai -> user)
-        cover_letter = self.repo.find_by_id(cover_letter_id)
+        cover_letter = await self.repo.find_by_id_with_items(cover_letter_id)
         if cover_letter.user_id != user.id:
             raise HTTPException(status_code=401, detail='Unauthorized')
         cover_letter.type = type
-        self.db.commit()
         # 임베딩 vector db 저장
-        cover_letter_response = CoverLetterResponse.model_validate(cover_letter)
-        for item in cover_letter_response.items:
-            item.content = decrypt_text(item.content)
-        background_tasks.add_task(save_embedding_task, user_id, cover_letter_response)
+        self.outbox.add(user_id, cover_letter.id, EmbeddingOutboxOperation.UPSERT)
+        await self.db.commit()
+
+
+async def _stream_ai_cover_letter_events(user_id: int, request: AiCoverLetterGenerationRequest) -> AsyncIterator[str]:
+    # 생성/저장은 클라이언트 연결과 별개인 task에서 끝까지 진행 (연결이 끊겨도 자소서는 저장되고 생성 횟수에 포함)
+    events: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    _run_detached(_generate_and_save_streaming(user_id, request, events.put_nowait))
+    while (event := await events.get()) is not None:
+        yield event
+
 
+async def _generate_and_save_streaming(user_id: int, request: AiCoverLetterGenerationRequest,
+                                       emit: Callable[[Optional[str]], None]):
+    """SSE 이벤트를 emit으로 전달하고, 끝나면 None을 전달합니다."""
+    # 스트림 응답보다 오래 살아있을 수 있으므로 별도 세션 사용
+    async with SessionLocal() as db:
+        try:
+            service = create_ai_cover_letter_service(db)
+            timer = StageTimer()
+            emit(format_sse('stage', {'stage': AiCoverLetterJobStage.ANALYZING_JOB_POSTING}))
+            job_posting, references = await service._prepare_generation(user_id, request, timer)
+
+            emit(format_sse('stage', {'stage': AiCoverLetterJobStage.GENERATING}))
+            generated_items = {}
+            generation_start_ms = timer.elapsed()
+            async for event in generate_cover_letters_stream(job_posting, request.items, references):
+                if isinstance(event, AiCoverLetterItemGenerated):
+                    generated_items[event.id] = event.item
+                    emit(format_sse('item', event))
+                elif isinstance(event, AiCoverLetterItemReset):
+                    emit(format_sse('reset', event))
+                else:
+                    emit(format_sse('delta', event))
+            timer.record('generation', generation_start_ms, timer.elapsed())
+            _record_pipeline_timing(timer)
+
+            emit(format_sse('stage', {'stage': AiCoverLetterJobStage.SAVING}))
+            # 요청한 항목 순서대로 저장
+            ai_cover_letter = await service._save_ai_cover_letter(user_id, job_posting,
+                                                                  [generated_items[item.id] for item in request.items])
+            emit(format_sse('done', {'cover_letter_id': ai_cover_letter.id}))
+        except Exception as e:
+            logger.error(f"Error streaming AI cover letter: {e}")
+            emit(format_sse('error', {'detail': str(e)}))
+        finally:
+            emit(None)
 
-def _check_user_uploaded_cover_letter(user_id: int, db: Session):
-    user_cover_letter_count = (db.query(CoverLetter)
-                               .filter(CoverLetter.user_id == user_id,
-                                       CoverLetter.type == CoverLetterType.USER)
-                               .count())
+
+async def _retrieve_references(user_id: int, request: AiCoverLetterGenerationRequest, timer: StageTimer,
+                               job_posting: Optional[JobPosting] = None,
+                               raw_text: Optional[str] = None) -> dict[str, list[str]]:
+    # LOCAL 모드는 항목 질문 + 요구 사항 키워드로 조합
+    # LLM 모드는 크롤링 원문이 있으면 원문으로, 없으면 분석된 채용공고로 검색 쿼리 생성
+    with timer.measure('search_query'):
+        if (request.search_query_mode or SEARCH_QUERY_MODE) == SearchQueryMode.LOCAL:
+            search_queries = build_search_queries(request.items, job_posting.required_qualifications or '',
+                                                  job_posting.position_title or '')
+        elif raw_text is not None:
+            search_queries = await generate_search_query_from_raw_text(raw_text, request.items)
+        else:
+            search_queries = await generate_search_query2(job_posting, request.items)
+    with timer.measure('retrieval'):
+        return await search_reference_cover_letters(user_id, search_queries)
+
+
+def _record_pipeline_timing(timer: StageTimer):
+    # 생성 시작을 결정한 단계 (채용공고 분석과 참조 자소서 검색 중 늦게 끝난 쪽)
+    critical_stage = timer.last_finished('job_posting_lookup', 'job_posting_analyze', 'retrieval')
+    pipeline_stats.record(timer, critical_stage)
+    logger.info(f'AI 자소서 생성 단계별 시간: {timer.summary()}, 생성 시작을 결정한 단계: {critical_stage}')
+
+
+async def _check_ai_cover_letter_generation(user_id: int, db: AsyncSession, exclude_job_id: Optional[str] = None):
+    """
+    유저가 업로드한 자소서가 있는지, 오늘 AI 자소서 생성 횟수가 남았는지 한 번의 쿼리로 확인합니다.
+    삭제한 AI 자소서도 오늘 생성한 횟수에는 포함합니다.
+    접수만 되고 아직 자소서를 저장하지 않은 job(PENDING, RUNNING)도 생성 횟수를 예약한 것으로 보고 포함합니다.
+    """
+    today = func.current_date()
+    reserved_jobs = (
+        select(func.count())
+        .select_from(AiCoverLetterJob)
+        .filter(
+            AiCoverLetterJob.user_id == user_id,
+            AiCoverLetterJob.status.in_([AiCoverLetterJobStatus.PENDING, AiCoverLetterJobStatus.RUNNING]),
+            AiCoverLetterJob.cover_letter_id == None,  # 자소서를 저장한 job은 AI 자소서 수에 이미 포함
+        )
+    )
+    if exclude_job_id is not None:
+        reserved_jobs = reserved_jobs.filter(AiCoverLetterJob.id != exclude_job_id)
+    query = (
+        select(
+            func.count().filter(CoverLetter.type == CoverLetterType.USER, CoverLetter.deleted_at == None),
+            func.count().filter(CoverLetter.type == CoverLetterType.AI, CoverLetter.created_at >= today),
+            reserved_jobs.scalar_subquery(),
+        )
+        .select_from(CoverLetter)
+        .filter(
+            CoverLetter.user_id == user_id,
+            or_(
+                and_(CoverLetter.type == CoverLetterType.USER, CoverLetter.deleted_at == None),
+                and_(CoverLetter.type == CoverLetterType.AI, CoverLetter.created_at >= today),
+            )
+        )
+    )
+    user_cover_letter_count, ai_cover_letter_count, reserved_job_count = (await db.execute(query)).one()
     if user_cover_letter_count < 1:
         raise HTTPException(status_code=400, detail='at least one cover letter is required')
+    if ai_cover_letter_count + reserved_job_count >= AI_COVER_LETTER_GENERATION_LIMIT:
+        raise HTTPException(status_code=400, detail=f'AI 자소서는 하루에 최대 {AI_COVER_LETTER_GENERATION_LIMIT}번 생성할 수 있습니다.')
 
 
-def _check_ai_cover_letter_limit(user_id: int, db: Session):
-    ai_cover_letter_count = (db.query(CoverLetter)
-                             .filter(CoverLetter.user_id == user_id, CoverLetter.type == CoverLetterType.AI)
-                             .count())
-    if ai_cover_letter_count > AI_COVER_LETTER_GENERATION_LIMIT:
-        raise HTTPException(status_code=400, detail=f'AI 자소서는 하루에 최대 {AI_COVER_LETTER_GENERATION_LIMIT}번 생성할 수 있습니다.')
+def create_ai_cover_letter_service(db: AsyncSession) -> AiCoverLetterService:
+    """요청 scope 밖(worker, 스트림)에서 사용할 서비스를 만듭니다."""
+    return AiCoverLetterService(CoverLetterRepository(db),
+                                JobPostingService(JobPostingRepository(db), JobPostingAnalyzeService()),
+                                db)
 
 
 def get_ai_cover_letter_service(repo: CoverLetterRepository = Depends(get_cover_letter_repository),
                                 job_posting_service: JobPostingService = Depends(get_job_posting_service),
-                                db: Session = Depends(get_db)):
+                                db: AsyncSession = Depends(get_db)):
     return AiCoverLetterService(repo, job_posting_service,  db)
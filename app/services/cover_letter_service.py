@@ -1,40 +1,38 @@
+import base64
 from datetime import datetime, timezone
+from typing import Optional
 
-from fastapi import Depends, BackgroundTasks, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import encrypt_text, decrypt_text
+from app.core.security import encrypt_texts_async, decrypt_texts_async
 from app.models.cover_letter import CoverLetter, CoverLetterType
 from app.models.cover_letter_item import CoverLetterItem
+from app.models.embedding_outbox import EmbeddingOutboxOperation
 from app.repositories.cover_letter import CoverLetterRepository, get_cover_letter_repository
+from app.repositories.embedding_outbox import EmbeddingOutboxRepository
 from app.schemas.cover_letter import CoverLetterAdditionRequest, CoverLetterResponse, CoverLetterSimpleResponse, \
-    CoverLetterEditRequest, CoverLetterItemResponse
-from app.utils import embedding
+    CoverLetterEditRequest, CoverLetterPageResponse
 # from app.utils.api_limit_manager import get_gemini_api_limit_manager, ApiLimitManager
-from app.utils.embedding import delete_embedding
-
-
-def save_embedding_task(user_id: int, cover_letter: CoverLetterResponse):
-    embedding.save_embedding(user_id, cover_letter)
 
 
 class CoverLetterService:
     def __init__(self,
                  repo: CoverLetterRepository,
-                 db: Session):
+                 db: AsyncSession):
         self.repo = repo
         self.db = db
+        self.outbox = EmbeddingOutboxRepository(db)
 
-    def create_cover_letter(self,
-                            user_id: int,
-                            request: CoverLetterAdditionRequest,
-                            background_tasks: BackgroundTasks):
+    async def create_cover_letter(self,
+                                  user_id: int,
+                                  request: CoverLetterAdditionRequest):
         cover_letter = CoverLetter(title=request.title, user_id=user_id)
 
-        for item in request.items:
-            # 내용 암호화
-            encrypted_content = encrypt_text(item.content)
+        # 내용 암호화
+        encrypted_contents = await encrypt_texts_async([item.content for item in request.items])
+        for item, encrypted_content in zip(request.items, encrypted_contents):
             cover_letter.items.append(
                 CoverLetterItem(
                     question=item.question,
@@ -42,41 +40,35 @@ class CoverLetterService:
                     content=encrypted_content
                 )
             )
-        # cover_letter RDB 저장
-        self.repo.save(cover_letter)
-        # cover_letter vector DB 저장
-        cover_letter_response = CoverLetterResponse.model_validate(cover_letter)
-        cover_letter_response.items = [
-            CoverLetterItemResponse(
-                id=item.id,
-                question=item.question,
-                char_limit=item.char_limit,
-                content=decrypt_text(item.content)  # content만 복호화
-            )
-            for item in cover_letter_response.items
-        ]
-
-        background_tasks.add_task(save_embedding_task, user_id, cover_letter_response)
+        # cover_letter RDB 저장, vector DB 저장 event도 같은 commit으로 저장
+        await self.repo.add(cover_letter)
+        self.outbox.add(user_id, cover_letter.id, EmbeddingOutboxOperation.UPSERT)
+        await self.db.commit()
         return cover_letter.id
 
-    def get_cover_letter(self, user_id: int, cover_letter_id) -> CoverLetterResponse:
-        cover_letter = self.repo.find_by_id(cover_letter_id)
+    async def get_cover_letter(self, user_id: int, cover_letter_id) -> CoverLetterResponse:
+        cover_letter = await self.repo.find_by_id_with_items(cover_letter_id)
 
         if not cover_letter:
             raise ValueError('cover letter not found')
         if user_id != cover_letter.user_id:
             raise ValueError('403')
         cover_letter_response = CoverLetterResponse.model_validate(cover_letter)
-        for item in cover_letter_response.items:
-            item.content = decrypt_text(item.content)
+        await _decrypt_items(cover_letter_response)
         return cover_letter_response
 
-    def get_cover_letters(self, user_id: int, type: CoverLetterType) -> list[CoverLetterSimpleResponse]:
-        cover_letters = self.repo.find_all_by_user_id(user_id, type)
-        return [CoverLetterSimpleResponse.model_validate(cover_letter) for cover_letter in cover_letters]
-
-    def remove_cover_letter(self, user_id: int, cover_letter_id: int, background_tasks: BackgroundTasks) -> None:
-        cover_letter = self.db.get(CoverLetter, cover_letter_id)
+    async def get_cover_letters(self, user_id: int, type: CoverLetterType, limit: Optional[int] = None,
+                                cursor: Optional[str] = None) -> CoverLetterPageResponse:
+        """limit이 없으면 cursor 다음의 전체 목록을 반환합니다. (next_cursor 없음)"""
+        # 다음 페이지가 있는지 확인하기 위해 하나 더 조회
+        rows = await self.repo.find_page_by_user_id(user_id, type, limit + 1 if limit is not None else None,
+                                                    _decode_cursor(cursor))
+        cover_letters = [CoverLetterSimpleResponse.model_validate(row) for row in rows[:limit]]
+        next_cursor = _encode_cursor(cover_letters[-1]) if limit is not None and len(rows) > limit else None
+        return CoverLetterPageResponse(items=cover_letters, next_cursor=next_cursor)
+
+    async def remove_cover_letter(self, user_id: int, cover_letter_id: int) -> None:
+        cover_letter = await self.repo.find_by_id_with_items(cover_letter_id)
         if cover_letter is not None:
             # 유저 권한 검증
             if user_id != cover_letter.user_id:
@@ -86,12 +78,12 @@ class CoverLetterService:
             cover_letter.deleted_at = now
             for item in cover_letter.items:
                 item.deleted_at = now
-            self.db.commit()
-        # vectorstore에서 embedding 삭제
-        background_tasks.add_task(delete_embedding, user_id, cover_letter_id)
+            # vectorstore에서 embedding 삭제
+            self.outbox.add(user_id, cover_letter_id, EmbeddingOutboxOperation.DELETE)
+        await self.db.commit()
 
-    def edit_cover_letter(self, user_id: int, cover_letter_id: int, request: CoverLetterEditRequest) -> int:
-        cover_letter = self.repo.find_by_id(cover_letter_id)
+    async def edit_cover_letter(self, user_id: int, cover_letter_id: int, request: CoverLetterEditRequest) -> int:
+        cover_letter = await self.repo.find_by_id_with_items(cover_letter_id)
         if not cover_letter:
             raise HTTPException(status_code=404, detail="Cover letter not found")
         if user_id != cover_letter.user_id:
@@ -99,14 +91,40 @@ class CoverLetterService:
         # cover_letter 전체 수정
         cover_letter.title = request.title
         edit_item_dict = {item.id: item for item in request.items}
-        for item in cover_letter.items:
-            edit_item = edit_item_dict[item.id]
+        edit_items = [edit_item_dict[item.id] for item in cover_letter.items]
+        # 내용 암호화
+        encrypted_contents = await encrypt_texts_async([edit_item.content for edit_item in edit_items])
+        for item, edit_item, encrypted_content in zip(cover_letter.items, edit_items, encrypted_contents):
             item.question = edit_item.question
-            item.content = edit_item.content
-        self.db.commit()
+            item.content = encrypted_content
+        # 업로드한 자소서만 vector DB에 있으므로 바뀐 항목만 다시 임베딩
+        if cover_letter.type == CoverLetterType.USER:
+            self.outbox.add(user_id, cover_letter.id, EmbeddingOutboxOperation.UPSERT)
+        await self.db.commit()
         return cover_letter.id
 
 
+def _encode_cursor(cover_letter: CoverLetterSimpleResponse) -> str:
+    value = f'{cover_letter.created_at.isoformat()}|{cover_letter.id}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    if cursor is None:
+        return None
+    try:
+        created_at, cover_letter_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(cover_letter_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='잘못된 cursor입니다.')
+
+
+async def _decrypt_items(cover_letter_response: CoverLetterResponse) -> None:
+    contents = await decrypt_texts_async([item.content for item in cover_letter_response.items])
+    for item, content in zip(cover_letter_response.items, contents):
+        item.content = content
+
+
 def get_cover_letter_service(repo: CoverLetterRepository = Depends(get_cover_letter_repository),
-                             db: Session = Depends(get_db)):
+                             db: AsyncSession = Depends(get_db)):
     return CoverLetterService(repo, db)
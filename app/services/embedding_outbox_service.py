@@ -0,0 +1,232 @@
+# 자소서 변경과 같은 commit으로 저장된 embedding_outbox event를 vector DB에 반영하는 worker
+# - 별도 프로세스로 실행 (기본 배포): python -m app.services.embedding_outbox_service
+#   (docker-compose의 embedding-outbox-worker 서비스, gunicorn worker마다 중복 실행되지 않도록 API 서버와 분리)
+# - 개발 환경 등에서 API 서버에 함께 띄우려면 EMBEDDING_OUTBOX_WORKER_ENABLED=true
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.core.security import decrypt_texts_async
+from app.core.vectorstore import gemini_embeddings
+from app.models.cover_letter import CoverLetter, CoverLetterType
+from app.models.embedding_outbox import EmbeddingOutbox, EmbeddingOutboxOperation, EmbeddingOutboxStatus
+from app.repositories.cover_letter import CoverLetterRepository
+from app.repositories.embedding_outbox import EmbeddingOutboxRepository
+from app.schemas.cover_letter import CoverLetterResponse
+from app.utils.embedding import EmbeddingSyncPlan, plan_embedding_sync, plan_embedding_delete, apply_embedding_sync
+from app.utils.logging import logger
+
+_ = load_dotenv()
+
+EMBEDDING_OUTBOX_WORKER_ENABLED = os.getenv('EMBEDDING_OUTBOX_WORKER_ENABLED', 'false').lower() == 'true'
+# 한 번에 가져와서 처리할 event 수 (여러 유저의 event를 한 번의 임베딩 API 호출로 묶음)
+EMBEDDING_OUTBOX_BATCH_SIZE = int(os.getenv('EMBEDDING_OUTBOX_BATCH_SIZE', 50))
+EMBEDDING_OUTBOX_POLL_SECONDS = float(os.getenv('EMBEDDING_OUTBOX_POLL_SECONDS', 1.0))
+# batch 처리가 이 시간 안에 끝나지 않으면 worker가 죽은 것으로 보고 다시 가져감
+EMBEDDING_OUTBOX_LEASE_SECONDS = int(os.getenv('EMBEDDING_OUTBOX_LEASE_SECONDS', 300))
+# 재시도 간격: BACKOFF_SECONDS * 2^(attempts - 1), 최대 1시간
+EMBEDDING_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMBEDDING_OUTBOX_MAX_ATTEMPTS', 8))
+EMBEDDING_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMBEDDING_OUTBOX_BACKOFF_SECONDS', 5))
+EMBEDDING_OUTBOX_MAX_BACKOFF_SECONDS = 3600
+
+
+@dataclass
+class _Target:
+    """자소서 하나에 대해 반영할 최종 상태 (같은 자소서의 event는 마지막 event 기준으로 합침)"""
+    user_id: int
+    cover_letter_id: int
+    events: list[EmbeddingOutbox]
+    cover_letter: Optional[CoverLetterResponse] = None  # None이면 vector DB에서 삭제
+
+
+class EmbeddingOutboxStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.events = 0
+        self.coalesced = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.batch_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def record_batch(self, events: int, targets: int, succeeded: int, retried: int, failed: int, batch_ms: float,
+                     last_error: Optional[str]):
+        with self._lock:
+            self.batches += 1
+            self.events += events
+            self.coalesced += events - targets
+            self.succeeded += succeeded
+            self.retried += retried
+            self.failed += failed
+            self.batch_ms += batch_ms
+            if last_error:
+                self.last_error = last_error
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'worker_enabled': EMBEDDING_OUTBOX_WORKER_ENABLED,
+                'batch_size': EMBEDDING_OUTBOX_BATCH_SIZE,
+                'batches': self.batches,
+                'events': self.events,
+                'coalesced': self.coalesced,
+                'succeeded': self.succeeded,
+                'retried': self.retried,
+                'failed': self.failed,
+                'avg_batch_ms': round(self.batch_ms / self.batches, 1) if self.batches else 0.0,
+                'last_error': self.last_error,
+            }
+
+
+embedding_outbox_stats = EmbeddingOutboxStats()
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(EMBEDDING_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), EMBEDDING_OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def _is_embedded(cover_letter: Optional[CoverLetter]) -> bool:
+    # 업로드한(USER) 삭제되지 않은 자소서만 vector DB에 있어야 함
+    return cover_letter is not None and cover_letter.deleted_at is None and cover_letter.type == CoverLetterType.USER
+
+
+async def _build_targets(db: AsyncSession, events: list[EmbeddingOutbox]) -> list[_Target]:
+    grouped: dict[int, list[EmbeddingOutbox]] = {}
+    for event in sorted(events, key=lambda e: e.id):
+        grouped.setdefault(event.cover_letter_id, []).append(event)
+
+    # event 종류와 관계없이 처리 시점의 RDB 상태를 기준으로 맞춤 (순서가 바뀌어도 결과가 같도록)
+    upsert_ids = [cover_letter_id for cover_letter_id, group in grouped.items()
+                  if group[-1].operation == EmbeddingOutboxOperation.UPSERT]
+    cover_letters = {cover_letter.id: cover_letter
+                     for cover_letter in await CoverLetterRepository(db).find_all_by_ids_with_items(upsert_ids)}
+
+    targets = []
+    for cover_letter_id, group in grouped.items():
+        cover_letter = cover_letters.get(cover_letter_id)
+        target = _Target(group[-1].user_id, cover_letter_id, group)
+        if group[-1].operation == EmbeddingOutboxOperation.UPSERT and _is_embedded(cover_letter):
+            target.cover_letter = CoverLetterResponse.model_validate(cover_letter)
+            target.cover_letter.items.sort(key=lambda item: item.id)
+        targets.append(target)
+
+    # 모든 자소서의 항목을 한 번에 복호화
+    items = [item for target in targets if target.cover_letter for item in target.cover_letter.items]
+    contents = await decrypt_texts_async([item.content for item in items])
+    for item, content in zip(items, contents):
+        item.content = content
+    return targets
+
+
+def _apply_targets(targets: list[_Target]) -> dict[int, Exception]:
+    """
+    모든 자소서의 변경 계획을 먼저 만들고, 새로 저장할 문서를 한 번의 임베딩 호출로 캐시에 올린 뒤 반영합니다.
+    (각 자소서의 저장은 캐시된 임베딩을 사용하므로 유저가 여러 명이어도 임베딩 API 호출은 한 번)
+    실패한 자소서의 cover_letter_id -> 예외를 반환합니다.
+    """
+    errors: dict[int, Exception] = {}
+    plans: list[EmbeddingSyncPlan] = []
+    for target in targets:
+        try:
+            if target.cover_letter is not None:
+                plans.append(plan_embedding_sync(target.user_id, target.cover_letter))
+            else:
+                plans.append(plan_embedding_delete(target.user_id, target.cover_letter_id))
+        except Exception as e:
+            errors[target.cover_letter_id] = e
+
+    texts = [document.page_content for plan in plans for document in plan.upserts]
+    try:
+        gemini_embeddings.embed_documents(texts)
+    except Exception as e:
+        # 자소서별 저장에서 다시 임베딩을 시도하고, 실패하면 해당 자소서만 재시도 대상이 됨
+        logger.warning(f"embedding outbox 일괄 임베딩 실패: {e}")
+
+    for plan in plans:
+        try:
+            apply_embedding_sync(plan)
+        except Exception as e:
+            errors[plan.cover_letter_id] = e
+    return errors
+
+
+async def process_outbox_batch(db: AsyncSession, batch_size: int = EMBEDDING_OUTBOX_BATCH_SIZE) -> int:
+    """처리할 event를 최대 batch_size개 가져와서 vector DB에 반영하고, 가져온 event 수를 반환합니다."""
+    repo = EmbeddingOutboxRepository(db)
+    events = await repo.claim_batch(batch_size, EMBEDDING_OUTBOX_LEASE_SECONDS)
+    if not events:
+        return 0
+
+    start = time.perf_counter()
+    targets = await _build_targets(db, events)
+    # vector DB 반영 동안 트랜잭션을 열어두지 않음
+    await db.commit()
+    errors = await asyncio.to_thread(_apply_targets, targets)
+
+    succeeded, failed = [], []
+    now = datetime.now()
+    last_error = None
+    for target in targets:
+        error = errors.get(target.cover_letter_id)
+        if error is None:
+            succeeded.extend(target.events)
+            continue
+        last_error = f'{type(error).__name__}: {error}'
+        for event in target.events:
+            event.last_error = last_error
+            if event.attempts >= EMBEDDING_OUTBOX_MAX_ATTEMPTS:
+                event.status = EmbeddingOutboxStatus.FAILED
+            else:
+                event.next_attempt_at = now + timedelta(seconds=_backoff_seconds(event.attempts))
+            failed.append(event)
+        logger.error(f"embedding outbox 처리 실패: {last_error}, user_id: {target.user_id}, "
+                     f"cover_letter_id: {target.cover_letter_id}, attempts: {target.events[-1].attempts}")
+    await repo.finish_batch(succeeded, failed)
+
+    dead = sum(1 for event in failed if event.status == EmbeddingOutboxStatus.FAILED)
+    embedding_outbox_stats.record_batch(len(events), len(targets), len(succeeded), len(failed) - dead, dead,
+                                        (time.perf_counter() - start) * 1000, last_error)
+    return len(events)
+
+
+async def get_embedding_outbox_metrics() -> dict:
+    async with SessionLocal() as db:
+        backlog = await EmbeddingOutboxRepository(db).get_backlog_stats()
+    return {**embedding_outbox_stats.get_stats(), **backlog}
+
+
+async def run_embedding_outbox_worker():
+    logger.info('[embedding outbox worker] 시작')
+    while True:
+        try:
+            async with SessionLocal() as db:
+                processed = await process_outbox_batch(db)
+            # batch를 가득 채웠으면 밀린 event가 더 있으므로 바로 다음 batch 처리
+            if processed < EMBEDDING_OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(EMBEDDING_OUTBOX_POLL_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f'[embedding outbox worker] 에러 발생: {e}')
+            await asyncio.sleep(EMBEDDING_OUTBOX_POLL_SECONDS)
+
+
+def start_embedding_outbox_worker() -> list[asyncio.Task]:
+    if not EMBEDDING_OUTBOX_WORKER_ENABLED:
+        return []
+    return [asyncio.create_task(run_embedding_outbox_worker())]
+
+
+if __name__ == "__main__":
+    asyncio.run(run_embedding_outbox_worker())
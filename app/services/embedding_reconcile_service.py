@@ -0,0 +1,169 @@
+# vector DB(유저별 collection)와 RDB(cover_letter_item)를 비교해서 어긋난 문서를 복구하는 job
+# - 유저를 id 순서로 batch씩 읽어서 항목 id, content_hash를 collection metadata와 비교
+# - 없는 항목/바뀐 항목은 다시 임베딩하고, 삭제/AI 자소서/없어진 항목의 문서(orphan)는 삭제
+# - 임베딩 호출은 분당 문서 수로 제한 (EMBEDDING_RECONCILE_EMBEDDINGS_PER_MINUTE)
+#
+# 실행: python -m app.services.embedding_reconcile_service [--dry-run] [--batch-size 100] [--after-user-id 0]
+#                                                           [--user-id 1] [--embeddings-per-minute 1000]
+# (--dry-run은 vector DB를 바꾸지 않고 어긋난 유저와 수정할 문서 수만 출력, cron으로 매일 실행 권장)
+
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.core.database import SessionLocal
+from app.core.security import decrypt_texts_async
+from app.core.vectorstore import gemini_embeddings, has_vectorstore
+from app.repositories.cover_letter import CoverLetterRepository
+from app.repositories.user import UserRepository
+from app.schemas.cover_letter import CoverLetterResponse, CoverLetterItemResponse
+from app.services.gemini_service import TokenBucket
+from app.utils.embedding import EmbeddingSyncPlan, get_existing_documents, plan_from_existing, apply_embedding_sync
+from app.utils.logging import logger
+
+_ = load_dotenv()
+
+EMBEDDING_RECONCILE_BATCH_SIZE = int(os.getenv('EMBEDDING_RECONCILE_BATCH_SIZE', 100))
+# 분당 새로 임베딩할 최대 문서 수 (서비스의 임베딩 호출과 API 한도를 나눠 쓰므로 낮게 설정)
+EMBEDDING_RECONCILE_EMBEDDINGS_PER_MINUTE = int(os.getenv('EMBEDDING_RECONCILE_EMBEDDINGS_PER_MINUTE', 1000))
+
+
+@dataclass
+class ReconcileReport:
+    users: int = 0
+    drifted_users: int = 0
+    cover_letters: int = 0
+    items: int = 0
+    upserts: int = 0  # 다시 임베딩한(할) 문서 수
+    deletes: int = 0  # 삭제한(할) 문서 수
+    orphan_cover_letters: int = 0  # RDB에 없는(삭제/AI 타입) 자소서의 문서가 남아있던 경우
+    failed_users: list[int] = field(default_factory=list)
+    last_user_id: int = 0  # 중단 후 --after-user-id로 이어서 실행
+
+
+def _group_cover_letters(rows) -> dict[int, list[CoverLetterResponse]]:
+    # 조회 결과는 (user_id, cover_letter_id, item_id) 순서로 정렬되어 있음
+    cover_letters: dict[int, list[CoverLetterResponse]] = {}
+    for row in rows:
+        user_cover_letters = cover_letters.setdefault(row.user_id, [])
+        if not user_cover_letters or user_cover_letters[-1].id != row.cover_letter_id:
+            user_cover_letters.append(CoverLetterResponse(id=row.cover_letter_id, title=row.title,
+                                                          created_at=row.created_at, updated_at=row.updated_at,
+                                                          items=[]))
+        user_cover_letters[-1].items.append(CoverLetterItemResponse(id=row.item_id, question=row.question,
+                                                                    char_limit=row.char_limit, content=row.content))
+    return cover_letters
+
+
+def plan_user_reconcile(user_id: int, cover_letters: list[CoverLetterResponse]) -> list[EmbeddingSyncPlan]:
+    """유저의 collection 전체를 한 번 읽고, 자소서별 동기화 계획과 orphan 문서 삭제 계획을 만듭니다."""
+    # collection이 없는 유저는 조회하면서 빈 collection을 만들지 않도록 확인만 함
+    documents = get_existing_documents(user_id) if has_vectorstore(user_id) else []
+    existing: dict[Optional[int], list[tuple[str, dict]]] = {}
+    for doc_id, metadata in documents:
+        existing.setdefault(metadata.get('cover_letter_id'), []).append((doc_id, metadata))
+
+    plans = [plan_from_existing(user_id, cover_letter, existing.pop(cover_letter.id, []))
+             for cover_letter in cover_letters]
+    # RDB에 없는 자소서(삭제, AI 타입)의 문서
+    for cover_letter_id, orphan_documents in existing.items():
+        plans.append(EmbeddingSyncPlan(user_id, cover_letter_id, deletes=[doc_id for doc_id, _ in orphan_documents]))
+    return [plan for plan in plans if plan.upserts or plan.deletes]
+
+
+def _apply_plans(plans: list[EmbeddingSyncPlan], bucket: TokenBucket):
+    texts = [document.page_content for plan in plans for document in plan.upserts]
+    # 유저 단위로 한 번에 임베딩해서 캐시에 올린 뒤 반영 (분당 문서 수 제한)
+    for start in range(0, len(texts), bucket.capacity):
+        batch = texts[start:start + bucket.capacity]
+        time.sleep(bucket.wait_time(len(batch)))
+        bucket.consume(len(batch))
+        gemini_embeddings.embed_documents(batch)
+    for plan in plans:
+        apply_embedding_sync(plan)
+
+
+async def reconcile(dry_run: bool,
+                    batch_size: int = EMBEDDING_RECONCILE_BATCH_SIZE,
+                    after_user_id: int = 0,
+                    user_ids: Optional[list[int]] = None,
+                    embeddings_per_minute: int = EMBEDDING_RECONCILE_EMBEDDINGS_PER_MINUTE) -> ReconcileReport:
+    """
+    유저를 batch_size명씩 읽어서 비교/복구합니다. 메모리에는 한 batch의 항목만 올라갑니다.
+    비교 중에 자소서가 바뀌어도 embedding outbox event가 뒤이어 처리되면서 다시 맞춰집니다.
+    """
+    report = ReconcileReport(last_user_id=after_user_id)
+    bucket = TokenBucket(embeddings_per_minute)
+    pending_user_ids = sorted(user_ids) if user_ids else None
+    while True:
+        async with SessionLocal() as db:
+            if pending_user_ids is not None:
+                batch_user_ids, pending_user_ids = pending_user_ids[:batch_size], pending_user_ids[batch_size:]
+            else:
+                batch_user_ids = await UserRepository(db).find_user_ids_after(report.last_user_id, batch_size)
+            if not batch_user_ids:
+                return report
+            rows = await CoverLetterRepository(db).find_embedded_items_by_user_ids(batch_user_ids)
+
+        cover_letters = _group_cover_letters(rows)
+        items = [item for user_cover_letters in cover_letters.values()
+                 for cover_letter in user_cover_letters for item in cover_letter.items]
+        contents = await decrypt_texts_async([item.content for item in items])
+        for item, content in zip(items, contents):
+            item.content = content
+
+        for user_id in batch_user_ids:
+            user_cover_letters = cover_letters.get(user_id, [])
+            report.users += 1
+            report.cover_letters += len(user_cover_letters)
+            report.items += sum(len(cover_letter.items) for cover_letter in user_cover_letters)
+            try:
+                plans = await asyncio.to_thread(plan_user_reconcile, user_id, user_cover_letters)
+                if plans:
+                    report.drifted_users += 1
+                    report.upserts += sum(len(plan.upserts) for plan in plans)
+                    report.deletes += sum(len(plan.deletes) for plan in plans)
+                    live_ids = {cover_letter.id for cover_letter in user_cover_letters}
+                    report.orphan_cover_letters += sum(1 for plan in plans if plan.cover_letter_id not in live_ids)
+                    logger.info(f"[reconcile] user_id: {user_id}, "
+                                f"저장 {sum(len(plan.upserts) for plan in plans)}개, "
+                                f"삭제 {sum(len(plan.deletes) for plan in plans)}개, dry_run: {dry_run}")
+                    if not dry_run:
+                        await asyncio.to_thread(_apply_plans, plans, bucket)
+            except Exception as e:
+                report.failed_users.append(user_id)
+                logger.error(f"[reconcile] user_id: {user_id} 처리 중 에러 발생: {e}")
+            report.last_user_id = user_id
+
+
+def _print_report(report: ReconcileReport, dry_run: bool):
+    print("=" * 60)
+    print(f"vector DB 정합성 {'점검 (dry-run)' if dry_run else '복구'} 결과")
+    print("=" * 60)
+    print(f"유저: {report.users}명 (어긋난 유저 {report.drifted_users}명, 실패 {len(report.failed_users)}명)")
+    print(f"자소서: {report.cover_letters}개, 항목: {report.items}개")
+    print(f"{'다시 임베딩할' if dry_run else '다시 임베딩한'} 문서: {report.upserts}개")
+    print(f"{'삭제할' if dry_run else '삭제한'} 문서: {report.deletes}개 (orphan 자소서 {report.orphan_cover_letters}개)")
+    if report.failed_users:
+        print(f"실패한 유저: {report.failed_users}")
+    print(f"마지막 user_id: {report.last_user_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='vector DB와 RDB 자소서 항목 정합성 점검/복구')
+    parser.add_argument('--dry-run', action='store_true', help='vector DB를 바꾸지 않고 결과만 출력')
+    parser.add_argument('--batch-size', type=int, default=EMBEDDING_RECONCILE_BATCH_SIZE)
+    parser.add_argument('--after-user-id', type=int, default=0, help='이 user_id 다음부터 실행')
+    parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help='특정 유저만 실행 (반복 가능)')
+    parser.add_argument('--embeddings-per-minute', type=int, default=EMBEDDING_RECONCILE_EMBEDDINGS_PER_MINUTE)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    result = asyncio.run(reconcile(args.dry_run, args.batch_size, args.after_user_id, args.user_ids,
+                                   args.embeddings_per_minute))
+    _print_report(result, args.dry_run)
@@ -1,6 +1,8 @@
+import asyncio
+import math
 import os
-from asyncio import Queue
-from typing import Type, TypeVar, Union
+import time
+from typing import AsyncIterator, TypeVar, Union
 
 from dotenv import load_dotenv
 from google import genai
@@ -8,14 +10,21 @@ from google.genai.errors import ClientError
 from google.genai.types import GenerateContentConfig
 from pydantic import TypeAdapter, BaseModel
 from tenacity import retry, retry_if_exception_type
-from tenacity.wait import wait_base
+
+from app.utils.logging import logger
 
 _ = load_dotenv()
 gemini = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
 GEMINI_DEFAULT_MODEL = 'gemini-2.5-flash-lite'
 MODEL = os.getenv('GEMINI_MODEL_NAME', GEMINI_DEFAULT_MODEL)
 
-task_queue: Queue = Queue()
+# 프로세스 단위 rate limit 설정 (gunicorn worker 수만큼 나눠서 설정해야 함)
+GEMINI_RPM_LIMIT = int(os.getenv('GEMINI_RPM_LIMIT', 15))
+GEMINI_TPM_LIMIT = int(os.getenv('GEMINI_TPM_LIMIT', 250_000))
+# 한글 기준 대략 2글자당 1토큰으로 보수적으로 추정
+CHARS_PER_TOKEN = 2
+# gemini는 이미지 1장을 고정 토큰으로 계산
+IMAGE_TOKENS = 258
 
 
 class RateLimitError(Exception):
@@ -35,24 +44,108 @@ def extract_retry_delay(response: dict) -> float:
     return 1.0  # 기본값 추가
 
 
-class WaitRetryAfter(wait_base):
-    def __call__(self, retry_state):
-        exc = retry_state.outcome.exception()
-        if exc and hasattr(exc, "retry_after") and exc.retry_after is not None:
-            return exc.retry_after
-        return 1
+def estimate_tokens(contents) -> int:
+    """요청 전에 입력 토큰 수를 로컬에서 추정합니다."""
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(content) for content in contents)
+    if isinstance(contents, str):
+        return math.ceil(len(contents) / CHARS_PER_TOKEN)
+    return IMAGE_TOKENS
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, refill_period: float = 60.0):
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.refill_rate = capacity / refill_period
+        self.last_refill = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount만큼 소비할 수 있을 때까지 기다려야 하는 시간(초)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self):
+        self._refill()
+        self.tokens = 0.0
+
+
+class GeminiScheduler:
+    """
+    모든 gemini 호출이 거쳐가는 프로세스 단위 admission scheduler.
+    RPM/TPM 버킷에 여유가 생길 때까지 FIFO 순서로 대기시킨 뒤 요청을 내보냅니다.
+    429 응답을 받으면 retryDelay 동안 전체 admission을 멈춰서, 재시도 요청들이 한꺼번에 몰리지 않게 합니다.
+    """
 
+    def __init__(self, rpm_limit: int, tpm_limit: int):
+        self.request_bucket = TokenBucket(rpm_limit)
+        self.token_bucket = TokenBucket(tpm_limit)
+        self._lock = asyncio.Lock()
+        self._blocked_until = 0.0
+        self.waiting = 0
+        self.admitted = 0
+        self.rate_limited = 0
+
+    async def acquire(self, estimated_tokens: int):
+        self.waiting += 1
+        try:
+            # lock 대기열이 FIFO이므로 먼저 들어온 요청이 먼저 admission 됨
+            async with self._lock:
+                while True:
+                    delay = max(self._blocked_until - time.monotonic(),
+                                self.request_bucket.wait_time(1),
+                                self.token_bucket.wait_time(estimated_tokens))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.request_bucket.consume(1)
+                self.token_bucket.consume(estimated_tokens)
+                self.admitted += 1
+        finally:
+            self.waiting -= 1
+
+    def penalize(self, retry_after: float):
+        """429 응답 시 retry_after 동안 admission을 멈추고 RPM 버킷을 비웁니다."""
+        self.rate_limited += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self.request_bucket.drain()
+        logger.warning(f'gemini rate limit 초과, {retry_after}초 동안 요청 중단 (대기 중: {self.waiting})')
+
+    def get_stats(self) -> dict:
+        return {
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'rate_limited': self.rate_limited,
+            'rpm_available': self.request_bucket.tokens,
+            'tpm_available': self.token_bucket.tokens,
+        }
+
+
+scheduler = GeminiScheduler(GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT)
 
 T = TypeVar("T", bound=BaseModel)
 
 
+# 대기 시간은 scheduler가 관리하므로 재시도는 곧바로 admission 대기열로 돌아감
 @retry(
     retry=retry_if_exception_type(RateLimitError),
-    wait=WaitRetryAfter(),
     # before_sleep=before_sleep_log(logger, logging.WARNING),
     reraise=True
 )
 async def generate_content(contents: Union[list[str], str], response_schema):
+    await scheduler.acquire(estimate_tokens(contents))
     try:
         response = await gemini.aio.models.generate_content(
             model=MODEL,
@@ -66,6 +159,40 @@ async def generate_content(contents: Union[list[str], str], response_schema):
     except ClientError as e:
         if e.code == 429:
             retry_after = extract_retry_delay(e.details)
+            scheduler.penalize(retry_after)
             raise RateLimitError("Rate limit exceeded", retry_after=retry_after) from e
         else:
             raise
+
+
+async def stream_content(contents: Union[list[str], str], response_schema) -> AsyncIterator[str]:
+    """
+    gemini 응답을 토큰 스트리밍으로 받아 텍스트 조각을 순서대로 반환합니다.
+    첫 조각을 받기 전에 429가 발생한 경우에만 재시도합니다.
+    첫 조각 이후의 429는 이미 전달한 조각을 되돌릴 수 없으므로 RateLimitError를 발생시키고,
+    호출하는 쪽에서 처음부터 다시 요청합니다.
+    """
+    while True:
+        await scheduler.acquire(estimate_tokens(contents))
+        started = False
+        try:
+            stream = await gemini.aio.models.generate_content_stream(
+                model=MODEL,
+                contents=contents,
+                config=GenerateContentConfig(
+                    response_schema=response_schema,
+                    response_mime_type="application/json"
+                )
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    started = True
+                    yield chunk.text
+            return
+        except ClientError as e:
+            if e.code != 429:
+                raise
+            retry_after = extract_retry_delay(e.details)
+            scheduler.penalize(retry_after)
+            if started:
+                raise RateLimitError("Rate limit exceeded while streaming", retry_after=retry_after) from e
@@ -1,4 +1,6 @@
+import asyncio
 import os
+from typing import Callable, Optional
 
 from dotenv import load_dotenv
 from google import genai
@@ -67,11 +69,16 @@ class JobPostingAnalyzeService:
     def __init__(self):
         pass
 
-    async def analyze_job_posting(self, job_posting_url: str) -> JobPostingAnalyzeResponse:
+    async def analyze_job_posting(self, job_posting_url: str,
+                                  on_raw_text: Optional[Callable[[str], None]] = None) -> JobPostingAnalyzeResponse:
         try:
             # 1. 채용공고 크롤링
             crawler = JobPostingCrawlerFactory.get_crawler(job_posting_url)
-            raw_data = crawler.crawl(job_posting_url)
+            # 크롤링은 blocking 작업이므로 thread에서 실행 (동시 실행 수는 webdriver pool이 제한)
+            raw_data = await asyncio.to_thread(crawler.crawl, job_posting_url)
+            # 크롤링 원문이 필요한 후속 작업은 분석을 기다리지 않고 바로 시작할 수 있도록 전달
+            if on_raw_text is not None:
+                on_raw_text(raw_data)
             # 2. llm으로 채용공고 분석
             job_posting_analyzing_response = await analyze_job_posting_from_text2(raw_data)
             logger.info(f'채용공고 분석 완료: {job_posting_url}')
@@ -1,8 +1,21 @@
-from fastapi import Depends
+import asyncio
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 
 from app.models.job_posting import JobPosting
-from app.repositories.job_posting import JobPostingRepository, get_job_posting_repository
+from app.repositories.job_posting import JobPostingRepository, get_job_posting_repository, AnalysisLockTimeout
 from app.services.job_posting_analyze_service import JobPostingAnalyzeService, get_job_posting_analyze_service
+from app.utils.job_posting_crawlers.job_posting_url import canonicalize_job_posting_url, extract_posting_key
+from app.utils.logging import logger
+
+# 프로세스 내에서 진행 중인 채용공고 분석 (posting_key -> 저장된 job_posting id)
+_inflight_analyses: dict[str, asyncio.Future] = {}
+
+
+class _AnalysisAbandoned(Exception):
+    """분석하던 요청이 취소되어 결과 없이 끝남 (기다리던 요청은 직접 다시 분석)"""
 
 
 class JobPostingService:
@@ -11,14 +24,76 @@ class JobPostingService:
         self.repo = repo
         self.analyze_service = analyze_service
 
-    async def get_job_posting(self, job_posting_url: str) -> JobPosting:
-        job_posting = self.repo.find_by_url(job_posting_url)
-        if not job_posting:
-            # 채용공고 분석
-            analyze_result = await self.analyze_service.analyze_job_posting(job_posting_url)
-            # 채용공고 DB 저장
-            job_posting = self.repo.save(JobPosting(
+    async def get_job_posting(self, job_posting_url: str,
+                              on_raw_text: Optional[Callable[[str], None]] = None) -> JobPosting:
+        """
+        분석된 채용공고를 반환합니다. 새로 크롤링하는 경우 크롤링 원문이 나오는 즉시 on_raw_text로 전달합니다.
+        (이미 분석된 채용공고이거나 다른 요청의 분석 결과를 기다리는 경우에는 호출되지 않음)
+        """
+        job_posting_url = canonicalize_job_posting_url(job_posting_url)
+        posting_key = extract_posting_key(job_posting_url)
+        while True:
+            job_posting = await self.repo.find_by_posting_key(posting_key)
+            if job_posting:
+                return job_posting
+
+            # 같은 채용공고를 이미 분석 중이면 그 결과를 기다림 (singleflight)
+            inflight = _inflight_analyses.get(posting_key)
+            if inflight is None:
+                return await self._lead_analysis(job_posting_url, posting_key, on_raw_text)
+            logger.info(f'진행 중인 채용공고 분석 결과 대기: {posting_key}')
+            try:
+                job_posting_id = await asyncio.shield(inflight)
+            except _AnalysisAbandoned:
+                # 분석하던 요청이 취소된 경우 캐시를 다시 확인하고 직접 분석
+                continue
+            return await self.repo.find_by_id(job_posting_id)
+
+    async def _lead_analysis(self, job_posting_url: str, posting_key: str,
+                             on_raw_text: Optional[Callable[[str], None]]) -> JobPosting:
+        future = asyncio.get_running_loop().create_future()
+        _inflight_analyses[posting_key] = future
+        try:
+            job_posting = await self._analyze_and_save(job_posting_url, posting_key, on_raw_text)
+            future.set_result(job_posting.id)
+            return job_posting
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # 취소(CancelledError)로 끝나도 기다리는 요청이 멈추지 않도록 항상 future를 완료
+            if not future.done():
+                future.set_exception(_AnalysisAbandoned(posting_key))
+            # 기다리는 요청이 없어도 'exception was never retrieved' 경고가 남지 않도록 조회
+            future.exception()
+            if _inflight_analyses.get(posting_key) is future:
+                del _inflight_analyses[posting_key]
+
+    async def _analyze_and_save(self, job_posting_url: str, posting_key: str,
+                                on_raw_text: Optional[Callable[[str], None]]) -> JobPosting:
+        try:
+            async with self.repo.analysis_lock(posting_key):
+                return await self._analyze_and_save_locked(job_posting_url, posting_key, on_raw_text)
+        except AnalysisLockTimeout:
+            # 다른 worker가 그 사이에 저장했으면 사용하고, 아직 분석 중이면 중복 크롤링하지 않고 실패
+            job_posting = await self.repo.find_by_posting_key(posting_key)
+            if job_posting:
+                return job_posting
+            raise HTTPException(status_code=503, detail='채용공고 분석이 지연되고 있습니다. 잠시 후 다시 시도해주세요.')
+
+    async def _analyze_and_save_locked(self, job_posting_url: str, posting_key: str,
+                                       on_raw_text: Optional[Callable[[str], None]]) -> JobPosting:
+        # lock을 기다리는 동안 다른 worker가 저장했을 수 있으므로 다시 확인
+        job_posting = await self.repo.find_by_posting_key(posting_key)
+        if job_posting:
+            return job_posting
+        # 채용공고 분석
+        analyze_result = await self.analyze_service.analyze_job_posting(job_posting_url, on_raw_text)
+        # 채용공고 DB 저장
+        try:
+            return await self.repo.save(JobPosting(
                 url=job_posting_url,
+                posting_key=posting_key,
                 company_name=analyze_result.company,
                 position_title=analyze_result.position_name,
                 position_detail=analyze_result.position_detail,
@@ -26,7 +101,10 @@ class JobPostingService:
                 required_qualifications=analyze_result.requirements,
                 preferred_qualifications=analyze_result.preferred
             ))
-        return job_posting
+        except IntegrityError:
+            # lock 연결이 끊기는 등으로 다른 worker와 동시에 저장한 경우 먼저 저장된 것을 사용
+            await self.repo.rollback()
+            return await self.repo.find_by_posting_key(posting_key)
 
     def process_job_posting(self, job_posting_url: str):
         pass
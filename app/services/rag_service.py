@@ -1,16 +1,22 @@
 import asyncio
 import os
+import time
+from typing import AsyncIterator
 
 from dotenv import load_dotenv
 from google import genai
 from google.genai.types import GenerateContentConfig
 from pydantic import TypeAdapter
 
-from app.core.vectorstore import get_vectorstore
+from app.core.vectorstore import similarity_search_batch, hybrid_search_batch
 from app.models.job_posting import JobPosting
-from app.schemas.ai_cover_letter import AiCoverLetterItemGenerationRequest, VectorDbQuery
+from app.schemas.ai_cover_letter import AiCoverLetterItemGenerationRequest, VectorDbQuery, AiCoverLetterItemDelta, \
+    AiCoverLetterItemGenerated, AiCoverLetterItemReset, SearchQueryMode
 from app.schemas.cover_letter import CoverLetterItemDto
-from app.services.gemini_service import generate_content
+from app.services.gemini_service import generate_content, stream_content, estimate_tokens, RateLimitError
+from app.services.reference_packer import pack_references, reference_packing_stats, REFERENCE_TOKEN_BUDGET, \
+    REFERENCE_PACKING_ENABLED
+from app.utils.keyword_extractor import extract_keywords
 
 _ = load_dotenv()
 
@@ -18,6 +24,19 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 gemini = genai.Client(api_key=GEMINI_API_KEY)
 
+# 항목별로 참조할 자소서 수
+REFERENCE_K = 3
+
+# 요청에 검색 쿼리 생성 방식이 없을 때 사용할 기본값 (LLM, LOCAL)
+SEARCH_QUERY_MODE = SearchQueryMode(os.getenv('SEARCH_QUERY_MODE', SearchQueryMode.LLM.value).upper())
+# 참조 자소서 검색 방식 (hybrid: dense + BM25 RRF, dense: chroma 검색만)
+RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'hybrid').lower()
+# LOCAL 모드에서 항목 질문, 채용공고에서 뽑을 키워드 수
+LOCAL_QUERY_QUESTION_KEYWORDS = 5
+LOCAL_QUERY_POSTING_KEYWORDS = 8
+# 스트리밍 생성 도중 429로 끊긴 항목을 처음부터 다시 생성할 최대 횟수
+STREAM_RATE_LIMIT_RETRIES = 3
+
 
 def _get_search_query_prompt(job_posting: JobPosting, items: list[AiCoverLetterItemGenerationRequest]):
     # 여러 개의 CoverLetterItem을 하나의 문자열로 결합
@@ -113,6 +132,53 @@ def _get_search_query_prompt_v2(job_posting: JobPosting, items: list[AiCoverLett
     return template
 
 
+def _get_search_query_prompt_from_raw_text(raw_text: str, items: list[AiCoverLetterItemGenerationRequest]):
+    # 채용공고 구조화 분석을 기다리지 않고 크롤링 원문으로 검색 쿼리를 만들 때 사용
+    cover_letter_items_text = "\n".join([
+        f"- 항목 ID: {item.id}\n- 항목 질문: {item.question}" for item in items
+    ])
+
+    template = f"""
+        너는 지원자의 과거 경험 라이브러리(벡터 DB)에서, 특정 채용 공고와 자기소개서 질문에 가장 적합한 경험을 찾아내기 위한 '최적의 검색 쿼리'를 설계하는 AI 전략가야.
+
+        **[너의 임무]**
+        주어진 <채용 공고 원문>과 <자기소개서 항목들>을 깊이 분석해서, 각 항목에 대한 최적의 검색 쿼리를 생성해야 해.
+        채용 공고 원문에는 회사 소개, 복지 등 직무와 관계없는 내용도 섞여 있으니, 직무와 요구 역량에 해당하는 부분만 참고해.
+        생성된 쿼리의 목표는, 지원자의 경험들 중에서 아래 기준을 만족하는 가장 강력한 사례를 찾아내는 것이야:
+        1. 채용 공고의 직무와 요구 역량에 직접적으로 관련된 경험
+        2. 지원자의 문제 해결 능력, 구체적인 성과, 또는 성장 과정이 잘 드러나는 경험
+
+        ---
+
+        **<채용 공고 원문>**
+        {raw_text}
+
+        ---
+
+        **<자기소개서 항목들>**
+        {cover_letter_items_text}
+
+        ---
+
+        **[쿼리 생성 가이드라인]**
+        1. **분석:** 먼저, 각 자기소개서 항목 질문의 핵심 의도(예: 협업 능력, 주도성, 기술 이해도)를 파악해.
+        2. **연결:** 그 다음, 채용 공고의 직무 상세와 요구 사항에서 핵심 키워드와 역량을 추출해.
+        3. **융합:** 마지막으로, 질문의 의도와 공고의 핵심 역량을 자연스럽게 **융합**하여 검색 쿼리를 만들어. 단순한 단어 조합이 아니라, "어떤 상황에서 어떤 기술을 사용해 어떤 문제를 해결한 경험"과 같이 구체적인 시나리오 형태의 쿼리를 생성해야 해.
+
+        ---
+
+        위에 제시된 <자기소개서 항목들>의 개수만큼, 각 항목의 ID와 위 가이드라인에 따라 생성한 검색 쿼리를 아래 JSON list 형식으로만 응답해줘.
+
+        [
+            {{
+                "id": "항목의 고유 식별자(ID)",
+                "query": "생성한 질의"
+            }}
+        ]
+        """
+    return template
+
+
 def generate_search_query(job_posting: JobPosting,
                           items: list[AiCoverLetterItemGenerationRequest]) -> list[VectorDbQuery]:
     prompt = _get_search_query_prompt_v2(job_posting, items)
@@ -134,6 +200,28 @@ async def generate_search_query2(job_posting: JobPosting,
     return await generate_content(prompt, list[VectorDbQuery])
 
 
+async def generate_search_query_from_raw_text(raw_text: str,
+                                              items: list[AiCoverLetterItemGenerationRequest]) -> list[VectorDbQuery]:
+    prompt = _get_search_query_prompt_from_raw_text(raw_text, items)
+    return await generate_content(prompt, list[VectorDbQuery])
+
+
+def build_search_queries(items: list[AiCoverLetterItemGenerationRequest], posting_text: str,
+                         position_title: str = '') -> list[VectorDbQuery]:
+    """
+    LLM 호출 없이 항목 질문과 채용공고 텍스트(요구 사항 또는 크롤링 원문)의 키워드로 검색 쿼리를 조합합니다.
+    같은 입력에는 항상 같은 쿼리를 반환합니다.
+    """
+    posting_keywords = extract_keywords(posting_text, LOCAL_QUERY_POSTING_KEYWORDS)
+    queries = []
+    for item in items:
+        question_keywords = extract_keywords(item.question, LOCAL_QUERY_QUESTION_KEYWORDS)
+        keywords = list(dict.fromkeys([*question_keywords, *posting_keywords]))  # 순서 유지 중복 제거
+        query = f"{position_title} {' '.join(keywords)}".strip()
+        queries.append(VectorDbQuery(id=item.id, query=query))
+    return queries
+
+
 def get_cover_letter_generation_prompt(job_posting: JobPosting, references: list[str],
                                        item: AiCoverLetterItemGenerationRequest) -> str:
     prompt = f"""
@@ -194,19 +282,33 @@ def get_cover_letter_generation_prompt(job_posting: JobPosting, references: list
     return prompt
 
 
-# 참조할 자소서 내용 검색
-async def retrieve_reference_cover_letters(user_id: int,
-                                     job_posting: JobPosting,
-                                     items: list[AiCoverLetterItemGenerationRequest]) -> dict[str, list[str]]:
+def build_generation_prompt(job_posting: JobPosting, references: list[str],
+                            item: AiCoverLetterItemGenerationRequest) -> str:
+    """참조 자소서를 토큰 예산 안으로 줄여서 항목 생성 프롬프트를 만듭니다."""
+    prompt = get_cover_letter_generation_prompt(job_posting, references, item)
+    if not REFERENCE_PACKING_ENABLED:
+        return prompt
+
+    start = time.perf_counter()
+    query = f"{item.question} {job_posting.position_title or ''} {job_posting.required_qualifications or ''}"
+    packed_references = pack_references(references, query, REFERENCE_TOKEN_BUDGET)
+    pack_ms = (time.perf_counter() - start) * 1000
+
+    packed_prompt = get_cover_letter_generation_prompt(job_posting, packed_references, item)
+    reference_packing_stats.record_packing(estimate_tokens(prompt), estimate_tokens(packed_prompt), pack_ms)
+    return packed_prompt
+
+
+# 검색 쿼리로 참조할 자소서 내용 검색
+async def search_reference_cover_letters(user_id: int, search_queries: list[VectorDbQuery]) -> dict[str, list[str]]:
     try:
-        references = {}
-        # 검색 쿼리 생성
-        search_queries = await generate_search_query2(job_posting, items)
-        vectorstore = get_vectorstore(user_id)
-        # 쿼리로 references 검색
-        for query in search_queries:
-            search_results = vectorstore.similarity_search(query=query.query, k=3)
-            references[query.id] = [doc.page_content for doc in search_results]
+        # 모든 쿼리를 한 번에 임베딩 + 검색
+        search = hybrid_search_batch if RETRIEVAL_MODE == 'hybrid' else similarity_search_batch
+        search_results = await asyncio.to_thread(search,
+                                                 user_id,
+                                                 [query.query for query in search_queries],
+                                                 REFERENCE_K)
+        references = {query.id: documents for query, documents in zip(search_queries, search_results)}
 
         # print(f'참조 자소서 검색 완료: {references}')
         return references
@@ -232,16 +334,17 @@ async def generate_cover_letter(job_posting, references, item) -> CoverLetterIte
 
 # retry를 적용한 응답 생선 적용 버전
 async def generate_cover_letter2(job_posting, references, item) -> CoverLetterItemDto:
-    prompt = get_cover_letter_generation_prompt(job_posting, references, item)
-    return await generate_content(prompt, CoverLetterItemDto)  # 리스트로 감싸서 전달
-
+    prompt = build_generation_prompt(job_posting, references, item)
+    start = time.perf_counter()
+    generated = await generate_content(prompt, CoverLetterItemDto)  # 리스트로 감싸서 전달
+    reference_packing_stats.record_generation(estimate_tokens(prompt), (time.perf_counter() - start) * 1000)
+    return generated
 
-# rag 수행 (검색 + 생성)
-async def generate_cover_letters(user_id: int,
-                                 job_posting: JobPosting,
-                                 items: list[AiCoverLetterItemGenerationRequest]) -> list[CoverLetterItemDto]:
-    references_dict = await retrieve_reference_cover_letters(user_id, job_posting, items)
 
+# 검색한 참조 자소서로 항목 생성
+async def generate_cover_letters(job_posting: JobPosting,
+                                 items: list[AiCoverLetterItemGenerationRequest],
+                                 references_dict: dict[str, list[str]]) -> list[CoverLetterItemDto]:
     async def generate_one(item):
         references = references_dict[item.id]
         return await generate_cover_letter2(job_posting, references, item)
@@ -249,3 +352,52 @@ async def generate_cover_letters(user_id: int,
     tasks = [generate_one(item) for item in items]
     cover_letter_items = await asyncio.gather(*tasks)
     return cover_letter_items
+
+
+# 항목이 완성되는 대로 이벤트를 반환하는 스트리밍 버전
+# delta: 생성 중인 항목의 텍스트 조각, reset: 429로 끊겨서 처음부터 다시 생성, item: 완성된 항목
+async def generate_cover_letters_stream(job_posting: JobPosting,
+                                        items: list[AiCoverLetterItemGenerationRequest],
+                                        references_dict: dict[str, list[str]]) \
+        -> AsyncIterator[AiCoverLetterItemDelta | AiCoverLetterItemReset | AiCoverLetterItemGenerated]:
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def generate_one(item):
+        prompt = build_generation_prompt(job_posting, references_dict[item.id], item)
+        start = time.perf_counter()
+        for attempt in range(STREAM_RATE_LIMIT_RETRIES + 1):
+            chunks = []
+            try:
+                async for text in stream_content(prompt, CoverLetterItemDto):
+                    chunks.append(text)
+                    await queue.put(AiCoverLetterItemDelta(id=item.id, text=text))
+                break
+            except RateLimitError:
+                # 이미 보낸 조각은 이어 붙일 수 없으므로 버리도록 알리고 처음부터 다시 생성
+                if attempt == STREAM_RATE_LIMIT_RETRIES:
+                    raise
+                await queue.put(AiCoverLetterItemReset(id=item.id))
+        reference_packing_stats.record_generation(estimate_tokens(prompt), (time.perf_counter() - start) * 1000)
+        generated = TypeAdapter(CoverLetterItemDto).validate_json("".join(chunks))
+        await queue.put(AiCoverLetterItemGenerated(id=item.id, item=generated))
+
+    tasks = [asyncio.create_task(generate_one(item)) for item in items]
+    pending = set(tasks)
+    try:
+        while pending or not queue.empty():
+            if queue.empty():
+                # 큐에 이벤트가 들어오거나 작업이 끝날 때까지 대기
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+                for task in done - {getter}:
+                    pending.discard(task)
+                    task.result()  # 생성 실패 시 예외 전파
+            else:
+                yield queue.get_nowait()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,113 @@
+import math
+import os
+import threading
+from dataclasses import dataclass
+
+from app.services.gemini_service import estimate_tokens
+from app.utils.keyword_extractor import tokenize
+from app.utils.text_chunker import split_sentences
+
+# 항목 하나의 생성 프롬프트에 넣을 참조 자소서 토큰 예산
+REFERENCE_TOKEN_BUDGET = int(os.getenv('REFERENCE_TOKEN_BUDGET', 1200))
+# 끄면 검색된 자소서 전체를 그대로 사용 (packing 전후 지연 비교용)
+REFERENCE_PACKING_ENABLED = os.getenv('REFERENCE_PACKING_ENABLED', 'true').lower() == 'true'
+# 토큰 Jaccard 유사도가 이 값 이상이면 중복 문장으로 보고 제외
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+
+@dataclass
+class _Sentence:
+    rank: int  # 검색 결과 순위
+    position: int  # 문서 안에서의 순서
+    text: str
+    tokens: set[str]
+    score: float = 0.0
+
+
+def _is_duplicate(sentence: _Sentence, kept: list[_Sentence]) -> bool:
+    for other in kept:
+        if sentence.text == other.text:
+            return True
+        union = sentence.tokens | other.tokens
+        if union and len(sentence.tokens & other.tokens) / len(union) >= NEAR_DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def pack_references(references: list[str], query: str, token_budget: int) -> list[str]:
+    """
+    검색된 참조 자소서에서 중복 문장을 제거하고, query와 관련 높은 문장만 token_budget 안에서 고릅니다.
+    고른 문장은 원래 문서와 문장 순서대로 다시 이어 붙여서 반환합니다.
+    """
+    sentences: list[_Sentence] = []
+    for rank, reference in enumerate(references):
+        for position, text in enumerate(split_sentences(reference)):
+            sentence = _Sentence(rank, position, text, set(tokenize(text)))
+            if not _is_duplicate(sentence, sentences):
+                sentences.append(sentence)
+
+    query_tokens = set(tokenize(query))
+    for sentence in sentences:
+        # 키워드 일치 점수 + 검색 순위가 높은 문서일수록 가산점
+        overlap = len(sentence.tokens & query_tokens) / math.sqrt(len(sentence.tokens) + 1)
+        sentence.score = overlap + 1 / (sentence.rank + 1)
+
+    selected = []
+    remaining = token_budget
+    for sentence in sorted(sentences, key=lambda s: (-s.score, s.rank, s.position)):
+        tokens = estimate_tokens(sentence.text)
+        if tokens <= remaining:
+            selected.append(sentence)
+            remaining -= tokens
+
+    packed = []
+    for rank in range(len(references)):
+        texts = [s.text for s in sorted(selected, key=lambda s: s.position) if s.rank == rank]
+        if texts:
+            packed.append(' '.join(texts))
+    return packed
+
+
+class ReferencePackingStats:
+    """packing 전후 프롬프트 토큰 수와 packing, 생성 지연을 집계합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.packed = 0
+        self.prompt_tokens_before = 0
+        self.prompt_tokens_after = 0
+        self.pack_ms = 0.0
+        self.generations = 0
+        self.generation_prompt_tokens = 0
+        self.generation_ms = 0.0
+
+    def record_packing(self, prompt_tokens_before: int, prompt_tokens_after: int, pack_ms: float):
+        with self._lock:
+            self.packed += 1
+            self.prompt_tokens_before += prompt_tokens_before
+            self.prompt_tokens_after += prompt_tokens_after
+            self.pack_ms += pack_ms
+
+    def record_generation(self, prompt_tokens: int, generation_ms: float):
+        with self._lock:
+            self.generations += 1
+            self.generation_prompt_tokens += prompt_tokens
+            self.generation_ms += generation_ms
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': REFERENCE_PACKING_ENABLED,
+                'token_budget': REFERENCE_TOKEN_BUDGET,
+                'packed': self.packed,
+                'avg_prompt_tokens_before': round(self.prompt_tokens_before / self.packed) if self.packed else 0,
+                'avg_prompt_tokens_after': round(self.prompt_tokens_after / self.packed) if self.packed else 0,
+                'avg_pack_ms': round(self.pack_ms / self.packed, 2) if self.packed else 0.0,
+                'generations': self.generations,
+                'avg_generation_prompt_tokens':
+                    round(self.generation_prompt_tokens / self.generations) if self.generations else 0,
+                'avg_generation_ms': round(self.generation_ms / self.generations, 1) if self.generations else 0.0,
+            }
+
+
+reference_packing_stats = ReferencePackingStats()
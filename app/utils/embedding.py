@@ -1,38 +1,140 @@
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
 from langchain_core.documents import Document
 
-from app.core.vectorstore import get_vectorstore
-from app.schemas.cover_letter import CoverLetterResponse
+from app.core.vectorstore import gemini_embeddings, get_vector_index, keyword_index_cache
+from app.schemas.cover_letter import CoverLetterResponse, CoverLetterItemResponse
 from app.utils.logging import logger
+from app.utils.text_chunker import chunk_text
+
+# 자소서 항목을 나눌 chunk 최대 글자 수, 이웃 chunk와 겹칠 문장 수
+EMBEDDING_CHUNK_MAX_CHARS = int(os.getenv('EMBEDDING_CHUNK_MAX_CHARS', 500))
+EMBEDDING_CHUNK_OVERLAP_SENTENCES = int(os.getenv('EMBEDDING_CHUNK_OVERLAP_SENTENCES', 1))
+
+
+def content_hash(item: CoverLetterItemResponse) -> str:
+    return hashlib.sha256(f'{item.question}\n{item.content}'.encode()).hexdigest()
+
+
+def document_id(item_id: int, chunk_index: int) -> str:
+    # 항목별로 고정된 vector id (같은 항목을 다시 저장하면 덮어씀)
+    return f'{item_id}:{chunk_index}'
+
+
+def build_item_documents(user_id: int, cover_letter: CoverLetterResponse,
+                         item: CoverLetterItemResponse) -> list[Document]:
+    """자소서 항목을 문장 단위 chunk로 나누고, 부모 항목을 찾을 수 있도록 item_id, chunk_index를 함께 저장합니다."""
+    item_hash = content_hash(item)
+    chunks = chunk_text(item.content, EMBEDDING_CHUNK_MAX_CHARS, EMBEDDING_CHUNK_OVERLAP_SENTENCES)
+    return [Document(
+        id=document_id(item.id, chunk_index),
+        page_content=chunk,
+        metadata={
+            'user_id': user_id,
+            'title': cover_letter.title,
+            'question': item.question,
+            'cover_letter_id': cover_letter.id,
+            'item_id': item.id,
+            'chunk_index': chunk_index,
+            'content_hash': item_hash,
+        }
+    ) for chunk_index, chunk in enumerate(chunks)]
+
+
+def build_documents(user_id: int, cover_letter: CoverLetterResponse) -> list[Document]:
+    return [document for item in cover_letter.items for document in build_item_documents(user_id, cover_letter, item)]
+
+
+def _upsert_documents(user_id: int, documents: list[Document]):
+    if not documents:
+        return
+    texts = [document.page_content for document in documents]
+    get_vector_index().upsert(user_id, [document.id for document in documents], texts,
+                              [document.metadata for document in documents], gemini_embeddings.embed_documents(texts))
+    keyword_index_cache.add_documents(user_id, [(document.id, document.page_content, document.metadata)
+                                                for document in documents])
+
+
+def _delete_documents(user_id: int, ids: list[str]):
+    if not ids:
+        return
+    get_vector_index().delete(user_id, ids)
+    keyword_index_cache.remove_documents(user_id, ids)
 
 
-def save_embedding(user_id: int, cover_letter: CoverLetterResponse):
-    vectorstore = get_vectorstore(user_id)
+@dataclass
+class EmbeddingSyncPlan:
+    """자소서 하나를 vector DB와 맞추기 위해 저장할 문서와 삭제할 문서 id"""
+    user_id: int
+    cover_letter_id: int
+    upserts: list[Document] = field(default_factory=list)
+    deletes: list[str] = field(default_factory=list)
 
-    documents = []
+
+def get_existing_documents(user_id: int, cover_letter_id: Optional[int] = None) -> list[tuple[str, dict]]:
+    """vector DB에 저장된 (문서 id, metadata) 목록, cover_letter_id가 없으면 유저의 모든 문서"""
+    where = {'cover_letter_id': cover_letter_id} if cover_letter_id is not None else None
+    return [(doc_id, metadata) for doc_id, _, metadata in get_vector_index().get(user_id, where, include_texts=False)]
+
+
+def plan_from_existing(user_id: int, cover_letter: CoverLetterResponse,
+                       existing: list[tuple[str, dict]]) -> EmbeddingSyncPlan:
+    """
+    항목별 content_hash를 비교해서 질문/내용이 바뀐 항목만 다시 임베딩하고,
+    줄어든 chunk와 없어진 항목의 문서는 삭제하도록 계획합니다.
+    existing은 이 자소서의 기존 문서이고, 비어있으면 모든 항목을 저장합니다.
+    """
+    plan = EmbeddingSyncPlan(user_id, cover_letter.id)
+    # item_id -> (content_hash 목록, 문서 id 목록)
+    existing_items: dict[int, tuple[set[str], list[str]]] = {}
+    for doc_id, metadata in existing:
+        if 'item_id' not in metadata or 'content_hash' not in metadata:
+            # 항목 정보 없이 저장된 예전 문서는 지우고 다시 저장
+            plan.deletes.append(doc_id)
+            continue
+        hashes, ids = existing_items.setdefault(metadata['item_id'], (set(), []))
+        hashes.add(metadata['content_hash'])
+        ids.append(doc_id)
 
     for item in cover_letter.items:
-        document = Document(
-            page_content=item.content,
-            metadata={
-                'user_id': user_id,
-                'title': cover_letter.title,
-                'question': item.question,
-                'cover_letter_id': cover_letter.id
-            }
-        )
-
-        documents.append(document)
-    try:
-        vectorstore.add_documents(documents)
-        logger.info(f"벡터 저장 완료: {len(documents)}개, user_id: {user_id}, cover_letter_id: {cover_letter.id}")
-    except Exception as e:
-        logger.error(f"벡터 저장 중 에러 발생: {e}, user_id: {user_id}, cover_letter_id: {cover_letter.id}")
-
-
-async def delete_embedding(user_id: int, cover_letter_id: int):
-    vectorstore = get_vectorstore(user_id)
-    try:
-        vectorstore.delete(where={'cover_letter_id': cover_letter_id})
-        logger.info(f"벡터 삭제 완료: user_id: {user_id}, cover_letter_id: {cover_letter_id}")
-    except Exception as e:
-        logger.error(f"벡터 삭제 중 에러 발생: {e}, user_id: {user_id}, cover_letter_id: {cover_letter_id}")
+        hashes, ids = existing_items.pop(item.id, (set(), []))
+        if ids and hashes == {content_hash(item)}:
+            continue
+        documents = build_item_documents(user_id, cover_letter, item)
+        plan.upserts.extend(documents)
+        # 새 chunk 수보다 많았던 이전 chunk 삭제
+        new_ids = {document.id for document in documents}
+        plan.deletes.extend(doc_id for doc_id in ids if doc_id not in new_ids)
+    # 수정 후 없어진 항목
+    for _, ids in existing_items.values():
+        plan.deletes.extend(ids)
+    return plan
+
+
+def plan_embedding_sync(user_id: int, cover_letter: CoverLetterResponse) -> EmbeddingSyncPlan:
+    return plan_from_existing(user_id, cover_letter, get_existing_documents(user_id, cover_letter.id))
+
+
+def plan_embedding_delete(user_id: int, cover_letter_id: int) -> EmbeddingSyncPlan:
+    ids = [doc_id for doc_id, _ in get_existing_documents(user_id, cover_letter_id)]
+    return EmbeddingSyncPlan(user_id, cover_letter_id, deletes=ids)
+
+
+def apply_embedding_sync(plan: EmbeddingSyncPlan):
+    _upsert_documents(plan.user_id, plan.upserts)
+    _delete_documents(plan.user_id, plan.deletes)
+    logger.info(f"벡터 동기화 완료: 저장 {len(plan.upserts)}개, 삭제 {len(plan.deletes)}개, "
+                f"user_id: {plan.user_id}, cover_letter_id: {plan.cover_letter_id}")
+
+
+def sync_embedding(user_id: int, cover_letter: CoverLetterResponse):
+    """자소서를 vector DB와 맞춥니다. 실패하면 예외를 그대로 전달합니다."""
+    apply_embedding_sync(plan_embedding_sync(user_id, cover_letter))
+
+
+def delete_embedding(user_id: int, cover_letter_id: int):
+    """자소서의 vector DB 문서를 모두 삭제합니다. 실패하면 예외를 그대로 전달합니다."""
+    apply_embedding_sync(plan_embedding_delete(user_id, cover_letter_id))
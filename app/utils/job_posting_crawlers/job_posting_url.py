@@ -0,0 +1,48 @@
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_WANTED_PATTERN = re.compile(r'^(?:www\.|m\.)?wanted\.co\.kr$')
+_WANTED_JOB_PATH = re.compile(r'^/wd/(\d+)')
+_ZIGHANG_PATTERN = re.compile(r'^(?:www\.)?zighang\.com$')
+_ZIGHANG_JOB_PATH = re.compile(r'^/(?:recruitment|recruit)/([^/]+)')
+
+# 캐시 키에 영향을 주지 않아야 하는 추적용 쿼리 파라미터
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'ref', 'referer', 'referrer', 'source', 'share', 'shared'}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith('utm_') or name in _TRACKING_PARAMS
+
+
+def canonicalize_job_posting_url(job_posting_url: str) -> str:
+    """
+    같은 채용공고를 가리키는 url을 하나의 형태로 통일합니다.
+    원티드/직행은 공고 id만 남기고, 그 외 사이트는 추적용 파라미터, fragment, 끝 슬래시를 제거합니다.
+    """
+    scheme, netloc, path, query, _ = urlsplit(job_posting_url.strip())
+    host = netloc.lower()
+
+    if _WANTED_PATTERN.match(host) and (match := _WANTED_JOB_PATH.match(path)):
+        return f'https://www.wanted.co.kr/wd/{match.group(1)}'
+    if _ZIGHANG_PATTERN.match(host) and (match := _ZIGHANG_JOB_PATH.match(path)):
+        return f'https://zighang.com/recruitment/{match.group(1)}'
+
+    params = sorted((name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+                    if not _is_tracking_param(name))
+    return urlunsplit((scheme.lower() or 'https', host, path.rstrip('/'), urlencode(params), ''))
+
+
+def extract_posting_key(job_posting_url: str) -> str:
+    """
+    채용공고 캐시 키. 원티드/직행은 `사이트:공고id`, 그 외는 `url:{정규화된 url의 sha256}`
+    (url이 길어도 posting_key 컬럼(VARCHAR(255)) 길이를 넘지 않도록 고정 길이 hash 사용)
+    """
+    canonical_url = canonicalize_job_posting_url(job_posting_url)
+    _, _, path, _, _ = urlsplit(canonical_url)
+    if canonical_url.startswith('https://www.wanted.co.kr/wd/'):
+        return f'wanted:{_WANTED_JOB_PATH.match(path).group(1)}'
+    if canonical_url.startswith('https://zighang.com/recruitment/'):
+        return f'zighang:{_ZIGHANG_JOB_PATH.match(path).group(1)}'
+    return f'url:{hashlib.sha256(canonical_url.encode()).hexdigest()}'
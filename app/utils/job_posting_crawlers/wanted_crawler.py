@@ -1,21 +1,32 @@
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
 
-from app.utils.job_posting_crawlers.job_posting_crawler_interface import JobPostingCrawlerInterface, selenium_options
+from app.utils.job_posting_crawlers.job_posting_crawler_interface import JobPostingCrawlerInterface
+from app.utils.job_posting_crawlers.wanted_page_parser import fetch_wanted_job_text
+from app.utils.job_posting_crawlers.webdriver_pool import WebDriverPool, webdriver_pool
+from app.utils.logging import logger
 
 
 class WantedCrawler(JobPostingCrawlerInterface):
-    def __init__(self):
-        self.driver = webdriver.Chrome(service=Service(), options=selenium_options)
+    def __init__(self, pool: WebDriverPool = webdriver_pool):
+        self.pool = pool
 
     # 원티드는 모든 채용공고가 동일한 구조를 가지고 있으므로, URL에 따라 크롤링 로직이 달라지지 않습니다.
     # 따라서 llm이 크롤링 결과를 분석할 필요가 없습니다.
     def crawl(self, url: str):
-        self.driver.get(url)
-        more_button = WebDriverWait(self.driver, 10).until(
+        # 페이지에 포함된 데이터를 http로 바로 파싱하고, 실패했을 때만 selenium 사용
+        try:
+            return fetch_wanted_job_text(url)
+        except Exception as e:
+            logger.warning(f'원티드 http 크롤링 실패, selenium으로 재시도: {url}, error: {e}')
+        with self.pool.checkout() as driver:
+            return self._crawl(driver, url)
+
+    def _crawl(self, driver: webdriver.Chrome, url: str):
+        driver.get(url)
+        more_button = WebDriverWait(driver, 10).until(
             ec.element_to_be_clickable(
                 (By.XPATH, '/html/body/div[1]/main/div[1]/div/section/section/article[1]/div/button'))
         )
@@ -24,21 +35,21 @@ class WantedCrawler(JobPostingCrawlerInterface):
 
         results = {}
 
-        target_element = self.driver.find_element(By.XPATH,
-                                                  '/html/body/div[1]/main/div[1]/div/section/header/div/div[1]/a')
+        target_element = driver.find_element(By.XPATH,
+                                             '/html/body/div[1]/main/div[1]/div/section/header/div/div[1]/a')
         results['company'] = target_element.get_attribute("data-company-name")
         results['position_name'] = target_element.get_attribute("data-position-name")
 
-        target_element = self.driver.find_element(By.XPATH,
-                                                  '//*[@id="__next"]/main/div[1]/div/section/header/div/div[1]/span[4]')
+        target_element = driver.find_element(By.XPATH,
+                                             '//*[@id="__next"]/main/div[1]/div/section/header/div/div[1]/span[4]')
         results['experience'] = target_element.text
 
-        target_element = self.driver.find_element(By.XPATH,
-                                                  '/html/body/div[1]/main/div[1]/div/section/section/article[1]/div/span/span')
+        target_element = driver.find_element(By.XPATH,
+                                             '/html/body/div[1]/main/div[1]/div/section/section/article[1]/div/span/span')
         results['position_detail'] = target_element.text
 
         # 모든 항목 블록 찾기 (주요업무, 자격요건, 우대사항 등)
-        sections = self.driver.find_elements(By.CSS_SELECTOR, 'div.JobDescription_JobDescription__paragraph__87w8I')
+        sections = driver.find_elements(By.CSS_SELECTOR, 'div.JobDescription_JobDescription__paragraph__87w8I')
 
         for section in sections:
             try:
@@ -0,0 +1,153 @@
+import json
+import re
+from typing import Optional
+
+import httpx
+
+from app.utils.job_posting_crawlers.job_posting_url import extract_posting_key
+
+WANTED_JOB_API_URL = 'https://www.wanted.co.kr/api/v4/jobs/{job_id}'
+HTTP_TIMEOUT_SECONDS = 5.0
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/114.0.0.0 Safari/537.36',
+    'Accept-Language': 'ko-KR,ko;q=0.9',
+}
+
+_NEXT_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__" type="application/json"[^>]*>(.*?)</script>', re.S)
+_CAMEL_PATTERN = re.compile(r'(?<!^)(?=[A-Z])')
+_TAG_PATTERN = re.compile(r'<br\s*/?>', re.I)
+
+# 상세 항목 -> selenium 크롤러가 읽던 섹션 제목(h3)
+SECTION_TITLES = {
+    'main_tasks': '주요업무',
+    'requirements': '자격요건',
+    'preferred_points': '우대사항',
+    'benefits': '혜택 및 복지',
+    'hire_rounds': '채용 전형',
+}
+
+
+class WantedPageParseError(Exception):
+    pass
+
+
+def extract_job_id(url: str) -> Optional[str]:
+    # 원티드 url 판별은 채용공고 캐시 키와 같은 규칙 사용 (wanted:{공고 id})
+    posting_key = extract_posting_key(url)
+    return posting_key.removeprefix('wanted:') if posting_key.startswith('wanted:') else None
+
+
+def _snake(key: str) -> str:
+    return _CAMEL_PATTERN.sub('_', key).lower()
+
+
+def _normalize(obj):
+    """camelCase/snake_case가 섞인 응답을 snake_case로 통일합니다."""
+    if isinstance(obj, dict):
+        return {_snake(key): _normalize(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_normalize(value) for value in obj]
+    return obj
+
+
+def _find_job(obj) -> Optional[dict]:
+    """페이지 데이터에서 채용공고 상세(주요업무 등)를 가진 dict를 찾습니다."""
+    if isinstance(obj, dict):
+        detail = obj.get('detail') if isinstance(obj.get('detail'), dict) else obj
+        if 'main_tasks' in detail and 'requirements' in detail:
+            return obj
+        children = obj.values()
+    elif isinstance(obj, list):
+        children = obj
+    else:
+        return None
+    for child in children:
+        job = _find_job(child)
+        if job is not None:
+            return job
+    return None
+
+
+def _experience(job: dict) -> str:
+    annual_from, annual_to = job.get('annual_from'), job.get('annual_to')
+    if job.get('is_newbie') and not annual_to:
+        return '신입'
+    if annual_from is None and annual_to is None:
+        return ''
+    if annual_to is None or annual_to >= 100:
+        return f'경력 {annual_from}년 이상' if annual_from is not None else '경력 무관'
+    if not annual_from and job.get('is_newbie'):
+        return f'경력 신입-{annual_to}년'
+    if annual_from is None:
+        # 최소 경력 없이 상한만 있는 공고
+        return f'경력 {annual_to}년 이하'
+    prefix = '신입-' if job.get('is_newbie') else ''
+    return f'경력 {prefix}{annual_from}-{annual_to}년'
+
+
+def _company_name(job: dict) -> str:
+    company = job.get('company')
+    if isinstance(company, dict):
+        return company.get('name') or company.get('company_name') or ''
+    return job.get('company_name') or company or ''
+
+
+def format_wanted_job(job: dict) -> str:
+    """채용공고 데이터를 selenium 크롤러와 같은 `[title] content` 텍스트로 변환합니다."""
+    job = _normalize(job)
+    detail = job.get('detail') if isinstance(job.get('detail'), dict) else job
+    if not detail.get('main_tasks') or not detail.get('requirements'):
+        raise WantedPageParseError('채용공고 상세 정보가 없습니다.')
+
+    results = {
+        'company': _company_name(job),
+        'position_name': job.get('position') or job.get('position_name') or '',
+        'experience': _experience(job),
+        'position_detail': detail.get('intro') or '',
+    }
+    for key, title in SECTION_TITLES.items():
+        content = detail.get(key)
+        if content:
+            results[title] = _TAG_PATTERN.sub('\n', str(content)).strip()
+    return " ".join(f"[{title}] {content}" for title, content in results.items())
+
+
+def parse_wanted_job_html(html: str) -> str:
+    """채용공고 페이지 html에 포함된 __NEXT_DATA__를 파싱합니다."""
+    match = _NEXT_DATA_PATTERN.search(html)
+    if match is None:
+        raise WantedPageParseError('__NEXT_DATA__를 찾을 수 없습니다.')
+    job = _find_job(_normalize(json.loads(match.group(1))))
+    if job is None:
+        raise WantedPageParseError('__NEXT_DATA__에 채용공고 상세 정보가 없습니다.')
+    return format_wanted_job(job)
+
+
+def parse_wanted_job_json(data: dict) -> str:
+    """원티드 채용공고 상세 API 응답을 파싱합니다."""
+    job = _find_job(_normalize(data))
+    if job is None:
+        raise WantedPageParseError('API 응답에 채용공고 상세 정보가 없습니다.')
+    return format_wanted_job(job)
+
+
+def fetch_wanted_job_text(url: str) -> str:
+    """브라우저 없이 http 요청만으로 원티드 채용공고를 가져옵니다. 실패하면 WantedPageParseError"""
+    with httpx.Client(headers=HTTP_HEADERS, timeout=HTTP_TIMEOUT_SECONDS, follow_redirects=True) as client:
+        try:
+            response = client.get(url)
+            response.raise_for_status()
+            return parse_wanted_job_html(response.text)
+        except (httpx.HTTPError, WantedPageParseError, ValueError):
+            pass
+
+        job_id = extract_job_id(url)
+        if job_id is None:
+            raise WantedPageParseError(f'채용공고 id를 찾을 수 없습니다: {url}')
+        try:
+            response = client.get(WANTED_JOB_API_URL.format(job_id=job_id))
+            response.raise_for_status()
+            return parse_wanted_job_json(response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            raise WantedPageParseError(str(e)) from e
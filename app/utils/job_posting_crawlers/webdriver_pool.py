@@ -0,0 +1,118 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from app.utils.job_posting_crawlers.job_posting_crawler_interface import selenium_options
+from app.utils.logging import logger
+
+# 프로세스당 동시에 띄울 수 있는 최대 chrome 수 (메모리 상한)
+WEBDRIVER_POOL_SIZE = int(os.getenv('WEBDRIVER_POOL_SIZE', 2))
+# 서버 시작 시 미리 띄워둘 chrome 수
+WEBDRIVER_POOL_PREWARM = int(os.getenv('WEBDRIVER_POOL_PREWARM', 1))
+# 한 driver를 재사용할 최대 횟수, 넘으면 새로 띄움 (chrome 메모리 누수 대비)
+WEBDRIVER_MAX_USES = int(os.getenv('WEBDRIVER_MAX_USES', 50))
+# 사용 가능한 driver를 기다리는 최대 시간(초)
+WEBDRIVER_CHECKOUT_TIMEOUT = float(os.getenv('WEBDRIVER_CHECKOUT_TIMEOUT', 30))
+
+
+class PooledDriver:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.uses = 0
+
+
+class WebDriverPool:
+    """
+    크롤러들이 공유하는 headless chrome pool.
+    checkout()으로 driver를 빌려 쓰고, 반납 시 상태를 초기화해서 다음 요청에 재사용합니다.
+    실패했거나 max_uses만큼 사용한 driver는 종료하고, 필요할 때 새로 띄웁니다.
+    """
+
+    def __init__(self, size: int, max_uses: int, options: Options):
+        self.size = size
+        self.max_uses = max_uses
+        self.options = options
+        # 최근에 반납된 driver부터 재사용 (LIFO)
+        self._idle: queue.LifoQueue[PooledDriver] = queue.LifoQueue()
+        # 동시에 checkout 가능한 driver 수 = 살아있는 driver 수의 상한
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _create(self) -> PooledDriver:
+        logger.info('webdriver 생성')
+        return PooledDriver(webdriver.Chrome(service=Service(), options=self.options))
+
+    @staticmethod
+    def _is_healthy(pooled: PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f'webdriver 종료 중 에러 발생: {e}')
+
+    def _take(self) -> PooledDriver:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._is_healthy(pooled):
+                return pooled
+            self._quit(pooled)
+
+    def _give_back(self, pooled: PooledDriver, failed: bool):
+        pooled.uses += 1
+        if failed or pooled.uses >= self.max_uses:
+            self._quit(pooled)
+            return
+        try:
+            # 이전 요청의 상태가 다음 요청에 남지 않도록 초기화
+            pooled.driver.delete_all_cookies()
+            pooled.driver.get('about:blank')
+            self._idle.put(pooled)
+        except Exception:
+            self._quit(pooled)
+
+    @contextmanager
+    def checkout(self, timeout: float = WEBDRIVER_CHECKOUT_TIMEOUT) -> Iterator[webdriver.Chrome]:
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError('사용 가능한 webdriver가 없습니다.')
+        pooled = None
+        failed = False
+        try:
+            pooled = self._take()
+            yield pooled.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if pooled is not None:
+                self._give_back(pooled, failed)
+            self._slots.release()
+
+    def prewarm(self, count: int):
+        count = min(count, self.size) - self._idle.qsize()
+        for _ in range(count):
+            self._idle.put(self._create())
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+webdriver_pool = WebDriverPool(WEBDRIVER_POOL_SIZE, WEBDRIVER_MAX_USES, selenium_options)
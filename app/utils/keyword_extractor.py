@@ -0,0 +1,46 @@
+import re
+from collections import Counter
+
+# 영문/숫자 기술 용어(C++, C#, Node.js 등)와 한글 어절
+_TOKEN_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9+#.\-]*|[가-힣]+')
+
+# 어절 끝에서 떼어낼 조사/어미 (긴 것부터 비교)
+_SUFFIXES = sorted([
+    '해주십시오', '해주세요', '하십시오', '하세요',
+    '으로서', '으로써', '에서의', '에게서', '이라는', '라는', '에서', '에게', '으로', '로서', '로써', '부터', '까지',
+    '이며', '이고', '하고', '하는', '하여', '해서', '했던', '하신', '하실', '하며', '한', '할', '함', '된', '되는',
+    '및', '을', '를', '이', '가', '은', '는', '의', '에', '와', '과', '도', '로', '만',
+], key=len, reverse=True)
+
+_STOPWORDS = {
+    '경험', '경우', '관련', '대한', '대해', '통해', '위해', '있는', '있으신', '있습니다', '합니다', '해주세요', '주세요',
+    '무엇', '어떤', '어떻게', '본인', '자신', '우리', '당신', '지원자', '지원', '이유', '내용', '기술', '서술', '작성',
+    '이상', '이하', '내외', '분', '것', '등', '및', '또는', '그리고', '년', '자',
+    'and', 'or', 'the', 'of', 'to', 'in', 'with', 'for', 'a', 'an',
+}
+
+
+def _normalize(token: str) -> str:
+    if token[0].isascii():
+        return token.rstrip('.-').lower()
+    for suffix in _SUFFIXES:
+        # 어간이 두 글자 이상 남을 때만 조사/어미로 보고 제거
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """LLM 호출 없이 텍스트를 검색용 토큰으로 나눕니다. (조사 제거, 불용어/한 글자 토큰 제외)"""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text or ''):
+        token = _normalize(match.group())
+        if len(token) >= 2 and token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def extract_keywords(text: str, top_k: int) -> list[str]:
+    """빈도가 높은 순서(같으면 먼저 나온 순서)로 top_k개의 키워드를 반환합니다."""
+    counts = Counter(tokenize(text))
+    return [token for token, _ in counts.most_common(top_k)]
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """블록 안에서 engine이 실행한 SQL 문을 기록합니다."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine: Engine | AsyncEngine) -> Iterator[QueryCounter]:
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    counter = QueryCounter()
+    event.listen(sync_engine, 'before_cursor_execute', counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, 'before_cursor_execute', counter._on_execute)
+
+
+@contextmanager
+def assert_max_queries(engine: Engine | AsyncEngine, expected: int) -> Iterator[QueryCounter]:
+    """
+    블록 안에서 실행된 쿼리가 expected개를 넘으면 실행된 SQL 목록과 함께 AssertionError를 발생시킵니다.
+    N+1 lazy load가 다시 생기는 것을 잡기 위해 사용합니다.
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > expected:
+        statements = '\n'.join(f'  {i + 1}. {statement}' for i, statement in enumerate(counter.statements))
+        raise AssertionError(f'쿼리 {expected}개를 예상했지만 {counter.count}개가 실행되었습니다:\n{statements}')
@@ -0,0 +1,17 @@
+import json
+
+from pydantic import BaseModel
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # nginx 버퍼링 비활성화
+}
+
+
+def format_sse(event: str, data) -> str:
+    """Server-Sent Events 형식의 메시지 한 건을 만듭니다."""
+    if isinstance(data, BaseModel):
+        payload = data.model_dump_json()
+    else:
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class StageTimer:
+    """파이프라인 시작 시점을 기준으로 각 단계의 시작/종료 시간(ms)을 기록합니다."""
+
+    def __init__(self):
+        self._started_at = time.perf_counter()
+        self.stages: dict[str, tuple[float, float]] = {}
+
+    def elapsed(self) -> float:
+        return (time.perf_counter() - self._started_at) * 1000
+
+    def record(self, stage: str, start_ms: float, end_ms: float):
+        self.stages[stage] = (start_ms, end_ms)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start_ms = self.elapsed()
+        try:
+            yield
+        finally:
+            self.record(stage, start_ms, self.elapsed())
+
+    def last_finished(self, *stages: str) -> Optional[str]:
+        """주어진 단계 중 가장 늦게 끝난 단계 (다음 단계의 시작을 결정한 단계)"""
+        recorded = [stage for stage in stages if stage in self.stages]
+        if not recorded:
+            return None
+        return max(recorded, key=lambda stage: self.stages[stage][1])
+
+    def summary(self) -> str:
+        return ', '.join(f'{stage} {start:.0f}~{end:.0f}ms' for stage, (start, end) in self.stages.items())
+
+
+class PipelineStats:
+    """여러 번 실행된 파이프라인의 단계별 평균 시간과 critical path에 걸린 단계를 집계합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self._count: Counter = Counter()
+        self._total_ms: defaultdict[str, float] = defaultdict(float)
+        self._critical_stages: Counter = Counter()
+
+    def record(self, timer: StageTimer, critical_stage: Optional[str]):
+        with self._lock:
+            self.runs += 1
+            for stage, (start_ms, end_ms) in timer.stages.items():
+                self._count[stage] += 1
+                self._total_ms[stage] += end_ms - start_ms
+            if critical_stage is not None:
+                self._critical_stages[critical_stage] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'avg_stage_ms': {stage: round(self._total_ms[stage] / count, 1) for stage, count in self._count.items()},
+                'critical_stages': dict(self._critical_stages),
+            }
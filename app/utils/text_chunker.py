@@ -0,0 +1,37 @@
+import re
+
+# 문장 부호 또는 줄바꿈 기준으로 문장 분리
+_SENTENCE_PATTERN = re.compile(r'[^.!?\n]+[.!?]*')
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.findall(text) if sentence.strip()]
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> list[str]:
+    return [sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars)]
+
+
+def chunk_text(text: str, max_chars: int, overlap_sentences: int) -> list[str]:
+    """
+    문장 단위로 max_chars를 넘지 않게 묶어서 chunk를 만듭니다.
+    다음 chunk는 이전 chunk의 마지막 overlap_sentences개 문장으로 시작해서 문맥이 끊기지 않게 합니다.
+    max_chars보다 긴 문장은 글자 수 기준으로 자릅니다.
+    """
+    sentences = []
+    for sentence in split_sentences(text):
+        sentences.extend(_split_long_sentence(sentence, max_chars) if len(sentence) > max_chars else [sentence])
+
+    chunks = []
+    current: list[str] = []
+    for sentence in sentences:
+        if current and len(' '.join([*current, sentence])) > max_chars:
+            chunks.append(' '.join(current))
+            # overlap 문장을 넣으면 크기를 넘는 경우 overlap 없이 시작
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            if len(' '.join([*current, sentence])) > max_chars:
+                current = []
+        current.append(sentence)
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
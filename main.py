@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import sentry_sdk
@@ -9,7 +10,15 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 # from app.core.redis import init_redis, close_redis
+from app.core.security import crypto_executor
+from app.core.vectorstore import gemini_embeddings, get_vector_index, keyword_index_cache
 from app.routers import user, cover_letter, ai_cover_letter, auth, feedback
+from app.services.ai_cover_letter_job_service import start_ai_cover_letter_job_workers
+from app.services.ai_cover_letter_service import pipeline_stats as ai_cover_letter_pipeline_stats
+from app.services.embedding_outbox_service import start_embedding_outbox_worker, get_embedding_outbox_metrics
+from app.services.gemini_service import scheduler as gemini_scheduler
+from app.services.reference_packer import reference_packing_stats
+from app.utils.job_posting_crawlers.webdriver_pool import webdriver_pool, WEBDRIVER_POOL_PREWARM
 
 _ = load_dotenv()
 admin_id = os.getenv('ADMIN_ID')
@@ -52,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,  # 쿠키 포함 요청 허용 여부
     allow_methods=["*"],  # 허용할 메서드 (GET, POST 등)
     allow_headers=["*"],  # 허용할 헤더
+    expose_headers=["X-Next-Cursor"],  # 자소서 목록 다음 페이지 cursor를 브라우저에서 읽을 수 있도록 노출
 )
 
 
@@ -65,6 +75,28 @@ app.add_middleware(
 #     await close_redis()
 
 
+background_workers = []
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    # AI 자소서 생성 job worker 실행
+    background_workers.extend(start_ai_cover_letter_job_workers())
+    # 자소서 변경을 vector DB에 반영하는 embedding outbox worker 실행
+    background_workers.extend(start_embedding_outbox_worker())
+    # chrome cold start를 요청 경로에서 없애기 위해 미리 띄워둠
+    background_workers.append(asyncio.create_task(asyncio.to_thread(webdriver_pool.prewarm, WEBDRIVER_POOL_PREWARM)))
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    for task in background_workers:
+        task.cancel()
+    await asyncio.gather(*background_workers, return_exceptions=True)
+    await asyncio.to_thread(webdriver_pool.close)
+    crypto_executor.shutdown()
+
+
 app.include_router(user.router)
 app.include_router(cover_letter.router)
 app.include_router(ai_cover_letter.router)
@@ -72,6 +104,21 @@ app.include_router(auth.router)
 app.include_router(feedback.router)
 
 
+# 운영 지표 (admin 인증 필요)
+@app.get("/internal/metrics", dependencies=[Depends(admin_auth)])
+async def get_metrics():
+    return {
+        'gemini_scheduler': gemini_scheduler.get_stats(),
+        'vector_index': get_vector_index().get_stats(),
+        'embedding_cache': gemini_embeddings.get_stats(),
+        'keyword_index_cache': keyword_index_cache.get_stats(),
+        'crypto_executor': crypto_executor.get_stats(),
+        'ai_cover_letter_pipeline': ai_cover_letter_pipeline_stats.get_stats(),
+        'reference_packing': reference_packing_stats.get_stats(),
+        'embedding_outbox': await get_embedding_outbox_metrics(),
+    }
+
+
 @app.get("/sentry-debug")
 async def trigger_error():
     division_by_zero = 1 / 0
@@ -14,6 +14,7 @@ CREATE TABLE users (
 CREATE TABLE job_posting (
     id SERIAL PRIMARY KEY,
     url TEXT NOT NULL,
+    posting_key VARCHAR(255) UNIQUE,
     company_name VARCHAR(255),
     position_title VARCHAR(255),
     experience VARCHAR(50),
@@ -44,6 +45,10 @@ CREATE TABLE cover_letter (
     user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- 유저별 자소서 목록 keyset pagination
+CREATE INDEX ix_cover_letter_user_type_deleted_created
+    ON cover_letter (user_id, type, deleted_at, created_at DESC, id DESC);
+
 
 -- 6. cover_letter_item 테이블
 CREATE TABLE cover_letter_item (
@@ -54,3 +59,39 @@ CREATE TABLE cover_letter_item (
     deleted_at TIMESTAMP,
     cover_letter_id INT NOT NULL REFERENCES cover_letter(id) ON DELETE CASCADE
 );
+
+
+-- 7. ai_cover_letter_job 테이블 (AI 자소서 비동기 생성 큐)
+CREATE TABLE ai_cover_letter_job (
+    id VARCHAR(36) PRIMARY KEY,
+    status VARCHAR(50) NOT NULL,
+    stage VARCHAR(50) NOT NULL,
+    request JSON NOT NULL,
+    error TEXT,
+    attempts INT NOT NULL DEFAULT 0,
+    lease_expires_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    cover_letter_id INT REFERENCES cover_letter(id)
+);
+
+CREATE INDEX idx_ai_cover_letter_job_status_created_at ON ai_cover_letter_job (status, created_at);
+-- 유저별 진행 중인 job 수 (AI 자소서 생성 횟수 예약) 확인
+CREATE INDEX idx_ai_cover_letter_job_user_id_status ON ai_cover_letter_job (user_id, status);
+
+
+-- 8. embedding_outbox 테이블 (vector DB에 반영할 자소서 변경 event, 자소서 변경과 같은 transaction으로 저장)
+CREATE TABLE embedding_outbox (
+    id SERIAL PRIMARY KEY,
+    operation VARCHAR(50) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    user_id INT NOT NULL,
+    cover_letter_id INT NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_embedding_outbox_status_next_attempt_at ON embedding_outbox (status, next_attempt_at);
@@ -0,0 +1,39 @@
+-- job_posting 캐시 키(posting_key) 추가 및 기존 데이터 backfill
+-- app/utils/job_posting_crawlers/job_posting_url.py 의 extract_posting_key 와 같은 규칙을 사용
+-- (다시 실행해도 되므로, 원티드/직행 외 url을 채우지 않던 이전 버전을 적용한 DB에서도 다시 실행)
+
+BEGIN;
+
+ALTER TABLE job_posting ADD COLUMN IF NOT EXISTS posting_key VARCHAR(255);
+
+-- 원티드: wanted:{공고 id}
+UPDATE job_posting
+SET posting_key = 'wanted:' || substring(url from 'wanted\.co\.kr/wd/([0-9]+)'),
+    url = 'https://www.wanted.co.kr/wd/' || substring(url from 'wanted\.co\.kr/wd/([0-9]+)')
+WHERE posting_key IS NULL
+  AND url ~ 'wanted\.co\.kr/wd/[0-9]+';
+
+-- 직행: zighang:{공고 id}
+UPDATE job_posting
+SET posting_key = 'zighang:' || substring(url from 'zighang\.com/(?:recruitment|recruit)/([^/?#]+)'),
+    url = 'https://zighang.com/recruitment/' || substring(url from 'zighang\.com/(?:recruitment|recruit)/([^/?#]+)')
+WHERE posting_key IS NULL
+  AND url ~ 'zighang\.com/(recruitment|recruit)/[^/?#]+';
+
+-- 그 외 사이트: url:{url의 sha256} (길이 제한을 넘지 않도록 고정 길이)
+-- 기존 url은 정규화 전이라 새 요청의 키와 다를 수 있지만, 그 경우 다시 분석해서 새 키로 저장됨
+UPDATE job_posting
+SET posting_key = 'url:' || encode(sha256(convert_to(url, 'UTF8')), 'hex')
+WHERE posting_key IS NULL
+  AND url IS NOT NULL;
+
+-- 같은 공고가 여러 번 저장된 경우 가장 최근 분석 결과만 키를 가짐
+UPDATE job_posting older
+SET posting_key = NULL
+FROM job_posting newer
+WHERE older.posting_key = newer.posting_key
+  AND older.id < newer.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_job_posting_posting_key ON job_posting (posting_key);
+
+COMMIT;
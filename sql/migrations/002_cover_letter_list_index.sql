@@ -0,0 +1,6 @@
+-- 유저별 자소서 목록 keyset pagination 인덱스
+-- (user_id, type, deleted_at) 조건 후 (created_at, id) 내림차순으로 바로 읽을 수 있도록 구성
+-- 운영 중 테이블 lock을 피하기 위해 CONCURRENTLY로 생성 (트랜잭션 밖에서 실행)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cover_letter_user_type_deleted_created
+    ON cover_letter (user_id, type, deleted_at, created_at DESC, id DESC);
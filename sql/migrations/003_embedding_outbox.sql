@@ -0,0 +1,16 @@
+-- vector DB 동기화를 BackgroundTasks 대신 transactional outbox로 처리
+-- 자소서 변경과 같은 commit으로 event를 저장하고, embedding outbox worker가 batch로 처리
+
+CREATE TABLE IF NOT EXISTS embedding_outbox (
+    id SERIAL PRIMARY KEY,
+    operation VARCHAR(50) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    user_id INT NOT NULL,
+    cover_letter_id INT NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_embedding_outbox_status_next_attempt_at ON embedding_outbox (status, next_attempt_at);
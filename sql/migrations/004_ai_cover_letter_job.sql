@@ -0,0 +1,18 @@
+-- AI 자소서 생성을 요청 안에서 처리하지 않고 DB 큐(ai_cover_letter_job) + worker로 처리
+-- worker가 status, created_at 순서로 대기 중/lease 만료 job을 가져감
+
+CREATE TABLE IF NOT EXISTS ai_cover_letter_job (
+    id VARCHAR(36) PRIMARY KEY,
+    status VARCHAR(50) NOT NULL,
+    stage VARCHAR(50) NOT NULL,
+    request JSON NOT NULL,
+    error TEXT,
+    attempts INT NOT NULL DEFAULT 0,
+    lease_expires_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    cover_letter_id INT REFERENCES cover_letter(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_cover_letter_job_status_created_at ON ai_cover_letter_job (status, created_at);
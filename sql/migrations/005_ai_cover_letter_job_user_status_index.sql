@@ -0,0 +1,4 @@
+-- AI 자소서 생성 횟수 확인 시 유저의 진행 중인(PENDING, RUNNING) job도 예약된 횟수로 포함
+-- 접수할 때마다 유저별 진행 중인 job 수를 세므로 (user_id, status) 인덱스 추가
+
+CREATE INDEX IF NOT EXISTS idx_ai_cover_letter_job_user_id_status ON ai_cover_letter_job (user_id, status);
@@ -0,0 +1,51 @@
+# 자소서 조회 경로의 쿼리 개수 확인 (N+1 lazy load 회귀 방지)
+# - 자소서 상세 조회, 삭제/수정 전 조회는 항목까지 JOIN 쿼리 1개로 끝나야 함
+# - 자소서 목록 조회는 쿼리 1개
+#
+# 실행: QUERY_COUNT_COVER_LETTER_ID=1 python -m testing.cover_letter_query_count
+# (DB_URL의 DB에 해당 자소서가 있어야 하며, 데이터는 변경하지 않음)
+
+import asyncio
+import os
+
+from app.core.database import SessionLocal, engine
+from app.repositories.cover_letter import CoverLetterRepository
+from app.services.cover_letter_service import CoverLetterService
+from app.utils.query_counter import assert_max_queries
+
+COVER_LETTER_ID = int(os.getenv('QUERY_COUNT_COVER_LETTER_ID', '1'))
+
+
+async def main():
+    async with SessionLocal() as db:
+        repo = CoverLetterRepository(db)
+        cover_letter = await repo.find_by_id(COVER_LETTER_ID)
+        if cover_letter is None:
+            raise SystemExit(f'자소서 {COVER_LETTER_ID}가 없습니다.')
+        user_id, cover_letter_type = cover_letter.user_id, cover_letter.type
+        db.expunge_all()
+
+        service = CoverLetterService(repo, db)
+        with assert_max_queries(engine, 1) as counter:
+            response = await service.get_cover_letter(user_id, COVER_LETTER_ID)
+        print(f"get_cover_letter: 쿼리 {counter.count}개, 항목 {len(response.items)}개")
+        db.expunge_all()
+
+        # remove_cover_letter, edit_cover_letter가 사용하는 조회 경로
+        with assert_max_queries(engine, 1) as counter:
+            cover_letter = await repo.find_by_id_with_items(COVER_LETTER_ID)
+            for item in cover_letter.items:
+                _ = item.content, item.deleted_at
+        print(f"find_by_id_with_items: 쿼리 {counter.count}개")
+        db.expunge_all()
+
+        with assert_max_queries(engine, 1) as counter:
+            page = await service.get_cover_letters(user_id, cover_letter_type, limit=20)
+        print(f"get_cover_letters: 쿼리 {counter.count}개, 자소서 {len(page.items)}개")
+
+        await db.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+# dense 검색과 hybrid 검색(dense + BM25, RRF)의 recall@k, 검색 지연 비교
+# - fixture: testing/fixtures/search_query_eval.json (자소서 문서 + 항목별 정답)
+# - 검색 쿼리는 LLM 호출 없이 build_search_queries(LOCAL 모드)로 생성
+#
+# 실행: python -m testing.hybrid_retrieval_benchmark [fixture 경로]
+# (문서/쿼리 임베딩에 GEMINI_API_KEY 필요, 임베딩 캐시 덕분에 두 번째 실행부터는 API 호출 없음)
+
+import json
+import os
+import statistics
+import sys
+import time
+
+import chromadb
+
+from app.core.keyword_index import BM25Index, reciprocal_rank_fusion
+from app.core.vectorstore import gemini_embeddings, embed_queries, HYBRID_CANDIDATE_K
+from app.schemas.ai_cover_letter import AiCoverLetterItemGenerationRequest
+from app.services.rag_service import build_search_queries
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'search_query_eval.json')
+KS = (1, 2, 3)
+REPEAT = 20
+
+
+def _recall(retrieved: list[str], relevant: list[str]) -> float:
+    return len(set(retrieved) & set(relevant)) / len(relevant)
+
+
+def _dense_search(collection, query_embeddings, n: int) -> list[list[str]]:
+    return collection.query(query_embeddings=query_embeddings, n_results=n, include=[])['ids']
+
+
+def _hybrid_search(collection, index: BM25Index, queries: list[str], query_embeddings, k: int) -> list[list[str]]:
+    dense = _dense_search(collection, query_embeddings, max(k, HYBRID_CANDIDATE_K))
+    return [reciprocal_rank_fusion([dense_ids, index.search(query, max(k, HYBRID_CANDIDATE_K))], k)
+            for query, dense_ids in zip(queries, dense)]
+
+
+def _measure(search) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        search()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def main(fixture_path: str):
+    with open(fixture_path, encoding='utf-8') as f:
+        cases = json.load(f)
+
+    client = chromadb.EphemeralClient()
+    recalls = {(mode, k): [] for mode in ('dense', 'hybrid') for k in KS}
+    latency_ms = {'dense': [], 'hybrid': []}
+    for case in cases:
+        documents = case['documents']
+        collection = client.create_collection(case['name'])
+        collection.add(ids=[document['id'] for document in documents],
+                       documents=[document['text'] for document in documents],
+                       embeddings=gemini_embeddings.embed_documents([document['text'] for document in documents]))
+        index = BM25Index()
+        for document in documents:
+            index.add(document['id'], document['text'])
+
+        job_posting = case['job_posting']
+        items = [AiCoverLetterItemGenerationRequest(id=item['id'], question=item['question'],
+                                                    char_limit=item['char_limit']) for item in case['items']]
+        queries = [query.query for query in build_search_queries(items, job_posting['required_qualifications'],
+                                                                  job_posting['position_title'])]
+        query_embeddings = embed_queries(queries)
+
+        for k in KS:
+            dense = _dense_search(collection, query_embeddings, k)
+            hybrid = _hybrid_search(collection, index, queries, query_embeddings, k)
+            for item, dense_ids, hybrid_ids in zip(case['items'], dense, hybrid):
+                recalls[('dense', k)].append(_recall(dense_ids, item['relevant']))
+                recalls[('hybrid', k)].append(_recall(hybrid_ids, item['relevant']))
+
+        # 임베딩은 캐시되어 있으므로 검색 자체의 지연만 측정
+        latency_ms['dense'].append(_measure(lambda: _dense_search(collection, query_embeddings, max(KS))))
+        latency_ms['hybrid'].append(
+            _measure(lambda: _hybrid_search(collection, index, queries, query_embeddings, max(KS))))
+
+    print("=" * 60)
+    print(f"dense vs hybrid 검색 (케이스 {len(cases)}개, 항목 {len(recalls[('dense', 1)])}개)")
+    print("=" * 60)
+    for mode in ('dense', 'hybrid'):
+        recall_text = ', '.join(f"recall@{k}: {statistics.mean(recalls[(mode, k)]):.3f}" for k in KS)
+        print(f"{mode:<7} {recall_text}, 검색 평균: {statistics.mean(latency_ms[mode]):.2f}ms")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURE_PATH)
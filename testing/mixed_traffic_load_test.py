@@ -0,0 +1,108 @@
+# 혼합 트래픽에서 API 응답 지연 (p50/p95/p99) 측정
+# - 자소서 목록/상세 조회, 유저 조회, 피드백 등록을 섞어서 동시에 요청
+# - before: 동기 Session 기반 커밋에서 서버 실행 후 측정
+# - after: AsyncSession 기반 커밋에서 서버 실행 후 측정
+#
+# 실행:
+#   uvicorn main:app --port 8000                        (측정할 커밋에서 서버 실행)
+#   LOAD_TEST_USER_ID=1 python -m testing.mixed_traffic_load_test
+#
+# 세션 쿠키는 SessionMiddleware와 같은 방식으로 직접 서명해서 만듦
+# (LOAD_TEST_SESSION_SECRET이 서버의 secret_key와 같아야 함)
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from base64 import b64encode
+from collections import defaultdict
+
+import httpx
+from itsdangerous import TimestampSigner
+
+BASE_URL = os.getenv('LOAD_TEST_BASE_URL', 'http://localhost:8000')
+USER_ID = int(os.getenv('LOAD_TEST_USER_ID', '1'))
+SESSION_SECRET = os.getenv('LOAD_TEST_SESSION_SECRET', 'your_secret_key')
+CONCURRENCY = int(os.getenv('LOAD_TEST_CONCURRENCY', '50'))
+DURATION_SECONDS = float(os.getenv('LOAD_TEST_DURATION_SECONDS', '30'))
+
+# (이름, 가중치)
+TRAFFIC_MIX = [
+    ('list', 50),
+    ('detail', 30),
+    ('user', 15),
+    ('feedback', 5),
+]
+
+
+def _session_cookie(user_id: int) -> str:
+    data = b64encode(json.dumps({'user': {'username': user_id}}).encode())
+    return TimestampSigner(SESSION_SECRET).sign(data).decode()
+
+
+async def _request(client: httpx.AsyncClient, name: str, cover_letter_ids: list[int]) -> httpx.Response:
+    if name == 'list':
+        return await client.get('/api/cover-letters')
+    if name == 'detail':
+        return await client.get(f'/api/cover-letters/{random.choice(cover_letter_ids)}')
+    if name == 'user':
+        return await client.get(f'/api/users/{USER_ID}')
+    return await client.post('/api/feedbacks', json={'content': 'load test'})
+
+
+async def _worker(client: httpx.AsyncClient, deadline: float, cover_letter_ids: list[int],
+                  elapsed: dict[str, list[float]], errors: dict[str, int]):
+    names = [name for name, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight in TRAFFIC_MIX]
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await _request(client, name, cover_letter_ids)
+            if response.status_code >= 400:
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+        elapsed[name].append((time.perf_counter() - start) * 1000)
+
+
+def _percentile(values: list[float], p: float) -> float:
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def _print_result(name: str, values: list[float], error_count: int):
+    values = sorted(values)
+    print(f"{name:<10} 요청: {len(values):>6}, 에러: {error_count:>4}, "
+          f"평균: {statistics.mean(values):8.2f}ms, p50: {_percentile(values, 0.5):8.2f}ms, "
+          f"p95: {_percentile(values, 0.95):8.2f}ms, p99: {_percentile(values, 0.99):8.2f}ms")
+
+
+async def main():
+    cookies = {'session': _session_cookie(USER_ID)}
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, cookies=cookies, limits=limits, timeout=60) as client:
+        response = await client.get('/api/cover-letters')
+        response.raise_for_status()
+        cover_letter_ids = [cover_letter['id'] for cover_letter in response.json()]
+        if not cover_letter_ids:
+            raise SystemExit('측정할 유저의 자소서가 하나 이상 필요합니다.')
+
+        elapsed: dict[str, list[float]] = defaultdict(list)
+        errors: dict[str, int] = defaultdict(int)
+        deadline = time.perf_counter() + DURATION_SECONDS
+        await asyncio.gather(*[_worker(client, deadline, cover_letter_ids, elapsed, errors)
+                               for _ in range(CONCURRENCY)])
+
+    print("=" * 100)
+    print(f"혼합 트래픽 응답 지연 (동시 요청 {CONCURRENCY}, {DURATION_SECONDS:.0f}초)")
+    print("=" * 100)
+    for name, _ in TRAFFIC_MIX:
+        if elapsed[name]:
+            _print_result(name, elapsed[name], errors[name])
+    _print_result('total', [value for values in elapsed.values() for value in values], sum(errors.values()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
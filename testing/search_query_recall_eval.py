@@ -0,0 +1,88 @@
+# 참조 자소서 검색 쿼리 생성 방식별 recall@k 비교 (오프라인 평가)
+# - LLM: generate_search_query2 (Gemini로 검색 쿼리 생성)
+# - LOCAL: build_search_queries (항목 질문 + 요구 사항 키워드 조합, LLM 호출 없음)
+# 케이스마다 임시 collection에 fixture 자소서를 넣고, 항목별로 정답(relevant)을 몇 개나 찾는지 측정
+#
+# 실행: python -m testing.search_query_recall_eval [fixture 경로]
+# (임베딩, LLM 쿼리 생성에 GEMINI_API_KEY 필요)
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import chromadb
+
+from app.core.vectorstore import gemini_embeddings, embed_queries
+from app.models.job_posting import JobPosting
+from app.schemas.ai_cover_letter import AiCoverLetterItemGenerationRequest
+from app.services.rag_service import REFERENCE_K, build_search_queries, generate_search_query2
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'search_query_eval.json')
+
+
+def _recall(retrieved: list[str], relevant: list[str]) -> float:
+    return len(set(retrieved) & set(relevant)) / len(relevant)
+
+
+def _search(collection, queries: list[str]) -> list[list[str]]:
+    result = collection.query(query_embeddings=embed_queries(queries), n_results=REFERENCE_K, include=[])
+    return result['ids']
+
+
+async def _evaluate_case(client: chromadb.ClientAPI, case: dict) -> dict[str, tuple[list[float], float]]:
+    collection = client.create_collection(case['name'])
+    documents = case['documents']
+    collection.add(ids=[document['id'] for document in documents],
+                   documents=[document['text'] for document in documents],
+                   embeddings=gemini_embeddings.embed_documents([document['text'] for document in documents]))
+
+    job_posting = JobPosting(**case['job_posting'])
+    items = [AiCoverLetterItemGenerationRequest(id=item['id'], question=item['question'], char_limit=item['char_limit'])
+             for item in case['items']]
+    relevant = {item['id']: item['relevant'] for item in case['items']}
+
+    results = {}
+    for mode in ('LLM', 'LOCAL'):
+        start = time.perf_counter()
+        if mode == 'LLM':
+            search_queries = await generate_search_query2(job_posting, items)
+        else:
+            search_queries = build_search_queries(items, job_posting.required_qualifications,
+                                                  job_posting.position_title)
+        query_ms = (time.perf_counter() - start) * 1000
+
+        retrieved = _search(collection, [query.query for query in search_queries])
+        recalls = [_recall(ids, relevant[query.id]) for query, ids in zip(search_queries, retrieved)]
+        results[mode] = (recalls, query_ms)
+        for query, ids in zip(search_queries, retrieved):
+            print(f"  [{mode:<5}] {query.id}: {query.query[:60]!r} -> {ids} (정답 {relevant[query.id]})")
+    return results
+
+
+async def main(fixture_path: str):
+    with open(fixture_path, encoding='utf-8') as f:
+        cases = json.load(f)
+
+    client = chromadb.EphemeralClient()
+    recalls = {'LLM': [], 'LOCAL': []}
+    query_ms = {'LLM': [], 'LOCAL': []}
+    for case in cases:
+        print(f"케이스: {case['name']}")
+        for mode, (case_recalls, elapsed) in (await _evaluate_case(client, case)).items():
+            recalls[mode].extend(case_recalls)
+            query_ms[mode].append(elapsed)
+
+    print("=" * 60)
+    print(f"검색 쿼리 생성 방식별 recall@{REFERENCE_K} (항목 {len(recalls['LLM'])}개)")
+    print("=" * 60)
+    for mode in ('LLM', 'LOCAL'):
+        print(f"{mode:<6} recall@{REFERENCE_K}: {statistics.mean(recalls[mode]):.3f}, "
+              f"쿼리 생성 평균: {statistics.mean(query_ms[mode]):.1f}ms")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURE_PATH))
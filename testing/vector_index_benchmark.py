@@ -0,0 +1,90 @@
+# VectorIndex backend 비교: chroma(HNSW) vs numpy(float16, int8 행렬 + 정확한 top-k)
+# - 같은 VectorIndex 인터페이스로 유저마다 DOCS_PER_USER개의 랜덤 벡터를 저장하고 같은 쿼리로 검색
+# - 저장 시간, 디스크 크기, 검색 지연(유저 첫 검색 / 재검색), float32 정확 검색 대비 recall@k 비교
+#
+# 실행: GEMINI_API_KEY=dummy python -m testing.vector_index_benchmark [유저 수] [유저당 문서 수]
+# (기본 200명, 30개, 임베딩 API는 호출하지 않음)
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from app.core.vector_index import VectorIndex, NumpyVectorIndex
+from app.core.vectorstore import ChromaVectorIndex, VectorStoreCache
+
+DIMENSION = 768
+QUERIES = 1000
+K = 5
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else 0.0
+
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _exact_top_k(vectors: np.ndarray, query: np.ndarray) -> list[int]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:K])
+
+
+def _run(name: str, index: VectorIndex, path: str, corpus: dict[int, np.ndarray],
+         queries: list[tuple[int, np.ndarray]]):
+    start = time.perf_counter()
+    for user_id, vectors in corpus.items():
+        ids = [f'{user_id}:{i}' for i in range(len(vectors))]
+        index.upsert(user_id, ids, [f'문서 {doc_id}' for doc_id in ids],
+                     [{'user_id': user_id, 'item_id': i} for i in range(len(vectors))], vectors.tolist())
+    upsert_s = time.perf_counter() - start
+
+    cold_ms, warm_ms, recalls = [], [], []
+    seen = set()
+    for user_id, query in queries:
+        start = time.perf_counter()
+        hits = index.query(user_id, [query.tolist()], K)[0]
+        (warm_ms if user_id in seen else cold_ms).append((time.perf_counter() - start) * 1000)
+        seen.add(user_id)
+        expected = {f'{user_id}:{i}' for i in _exact_top_k(corpus[user_id], query)}
+        recalls.append(len(expected & {doc_id for doc_id, _, _ in hits}) / K)
+
+    print(f"{name:<16} 저장: {upsert_s:6.2f}s, 디스크: {_directory_size(path) / 1024 / 1024:7.2f}MB, "
+          f"첫 검색 p50: {_percentile(cold_ms, 0.5):6.3f}ms, "
+          f"재검색 p50/p95: {_percentile(warm_ms, 0.5):6.3f}/{_percentile(warm_ms, 0.95):6.3f}ms, "
+          f"recall@{K}: {statistics.mean(recalls):.3f}")
+
+
+def main(users: int, docs_per_user: int):
+    rng = np.random.default_rng(0)
+    corpus = {}
+    for user_id in range(users):
+        # 임베딩처럼 정규화된 벡터 사용 (chroma 기본 거리인 L2와 cosine 순위가 같도록)
+        vectors = rng.standard_normal((docs_per_user, DIMENSION)).astype(np.float32)
+        corpus[user_id] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = [(user_id, rng.standard_normal(DIMENSION).astype(np.float32))
+               for user_id in (random.randrange(users) for _ in range(QUERIES))]
+
+    print("=" * 100)
+    print(f"VectorIndex backend 비교 (유저 {users}명, 유저당 문서 {docs_per_user}개, {DIMENSION}차원, 검색 {QUERIES}회)")
+    print("=" * 100)
+    with tempfile.TemporaryDirectory() as path:
+        cache = VectorStoreCache(chromadb.PersistentClient(path=path), FakeEmbeddings(size=DIMENSION), users)
+        _run('chroma', ChromaVectorIndex(cache, layout='per_user'), path, corpus, queries)
+    for dtype in ('float16', 'int8'):
+        with tempfile.TemporaryDirectory() as path:
+            _run(f'numpy ({dtype})', NumpyVectorIndex(path, dtype, users), path, corpus, queries)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 30)
@@ -0,0 +1,115 @@
+# 유저별 collection(per_user)과 shard collection(sharded) 구성의 디스크, 메모리, 검색 지연 비교
+# - 유저마다 DOCS_PER_USER개의 랜덤 벡터를 저장한 chroma db를 구성별/유저 수별로 만든 뒤
+#   새 프로세스에서 열어서 랜덤 유저 검색 지연(처음 여는 collection 포함)과 최대 RSS를 측정
+# - sharded는 where={'user_id': ...} 필터로 검색
+#
+# 실행: GEMINI_API_KEY=dummy python -m testing.vectorstore_layout_benchmark [유저 수 ...]
+# (기본 1000 10000 50000, 임베딩 API는 호출하지 않음, 50000명은 생성에 오래 걸림)
+
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from app.core.vectorstore import collection_name
+
+DEFAULT_USER_COUNTS = (1_000, 10_000, 50_000)
+LAYOUTS = ('per_user', 'sharded')
+SHARDS = 16
+DOCS_PER_USER = 20
+DIMENSION = 768
+QUERIES = 500
+K = 10
+WRITE_BATCH_SIZE = 5_000
+
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _build(path: str, layout: str, users: int):
+    client = chromadb.PersistentClient(path=path)
+    rng = np.random.default_rng(0)
+    buffers: dict[str, list] = {}
+    for user_id in range(users):
+        name = collection_name(user_id, layout, SHARDS)
+        ids = [f'{user_id}:{i}' for i in range(DOCS_PER_USER)]
+        embeddings = rng.random((DOCS_PER_USER, DIMENSION), dtype=np.float32).tolist()
+        metadatas = [{'user_id': user_id, 'item_id': user_id * DOCS_PER_USER + i} for i in range(DOCS_PER_USER)]
+        if layout != 'sharded':
+            client.create_collection(name).add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+            continue
+        buffer = buffers.setdefault(name, [[], [], []])
+        buffer[0].extend(ids)
+        buffer[1].extend(embeddings)
+        buffer[2].extend(metadatas)
+        if len(buffer[0]) >= WRITE_BATCH_SIZE:
+            client.get_or_create_collection(name).add(ids=buffer[0], embeddings=buffer[1], metadatas=buffer[2])
+            buffers[name] = [[], [], []]
+    for name, (ids, embeddings, metadatas) in buffers.items():
+        if ids:
+            client.get_or_create_collection(name).add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+
+
+def _query(path: str, layout: str, users: int, results):
+    # 서버를 새로 띄운 상황을 가정해서 빈 프로세스에서 측정
+    client = chromadb.PersistentClient(path=path)
+    rng = np.random.default_rng(1)
+    collections = {}
+    cold_ms, warm_ms = [], []
+    for _ in range(QUERIES):
+        user_id = random.randrange(users)
+        name = collection_name(user_id, layout, SHARDS)
+        where = {'user_id': user_id} if layout == 'sharded' else None
+        query_embedding = rng.random(DIMENSION, dtype=np.float32).tolist()
+        cold = name not in collections
+        start = time.perf_counter()
+        if cold:
+            collections[name] = client.get_collection(name)
+        collections[name].query(query_embeddings=[query_embedding], n_results=K, where=where, include=[])
+        (cold_ms if cold else warm_ms).append((time.perf_counter() - start) * 1000)
+    # linux에서 ru_maxrss 단위는 KB
+    results.put((cold_ms, warm_ms, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else 0.0
+
+
+def main(user_counts: list[int]):
+    context = multiprocessing.get_context('spawn')
+    print("=" * 100)
+    print(f"vector store 구성 비교 (유저당 문서 {DOCS_PER_USER}개, {DIMENSION}차원, shard {SHARDS}개, 검색 {QUERIES}회)")
+    print("=" * 100)
+    for users in user_counts:
+        for layout in LAYOUTS:
+            with tempfile.TemporaryDirectory() as path:
+                start = time.perf_counter()
+                builder = context.Process(target=_build, args=(path, layout, users))
+                builder.start()
+                builder.join()
+                build_s = time.perf_counter() - start
+
+                results = context.Queue()
+                worker = context.Process(target=_query, args=(path, layout, users, results))
+                worker.start()
+                cold_ms, warm_ms, max_rss_mb = results.get()
+                worker.join()
+
+                print(f"유저 {users:>6} {layout:<9} 생성: {build_s:7.1f}s, "
+                      f"디스크: {_directory_size(path) / 1024 / 1024:8.1f}MB, RSS: {max_rss_mb:7.1f}MB, "
+                      f"첫 검색 p50/p95: {_percentile(cold_ms, 0.5):6.2f}/{_percentile(cold_ms, 0.95):6.2f}ms, "
+                      f"재검색 평균: {statistics.mean(warm_ms) if warm_ms else 0.0:6.2f}ms")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    main([int(arg) for arg in sys.argv[1:]] or list(DEFAULT_USER_COUNTS))
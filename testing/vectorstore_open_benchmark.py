@@ -0,0 +1,72 @@
+# get_vectorstore 호출 시 collection을 여는 비용 비교
+# - 기존: 호출마다 Chroma(persist_directory=...) 생성
+# - 변경: 하나의 PersistentClient + 유저별 collection 핸들 LRU 캐시
+#
+# 실행: GEMINI_API_KEY=dummy python -m testing.vectorstore_open_benchmark
+# (임베딩 API는 호출하지 않으므로 실제 키가 필요 없음)
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import FakeEmbeddings
+
+from app.core.vectorstore import VectorStoreCache
+
+USERS = 200
+CALLS = 2000
+CACHE_SIZE = 256
+
+embeddings = FakeEmbeddings(size=768)
+
+
+def _measure(open_vectorstore, user_ids: list[int]) -> list[float]:
+    elapsed = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        open_vectorstore(user_id)
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return elapsed
+
+
+def _print_result(name: str, elapsed: list[float]):
+    elapsed = sorted(elapsed)
+    print(f"{name:<10} 평균: {statistics.mean(elapsed):.3f}ms, "
+          f"p50: {elapsed[len(elapsed) // 2]:.3f}ms, p99: {elapsed[int(len(elapsed) * 0.99)]:.3f}ms")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        # 유저별 collection 미리 생성
+        client = chromadb.PersistentClient(path=path)
+        for user_id in range(USERS):
+            client.get_or_create_collection(f'cover_letters_{user_id}')
+
+        # 재방문 유저가 많은 트래픽을 가정
+        user_ids = [random.randrange(USERS) for _ in range(CALLS)]
+
+        def open_uncached(user_id: int) -> Chroma:
+            return Chroma(collection_name=f'cover_letters_{user_id}',
+                          embedding_function=embeddings,
+                          persist_directory=path)
+
+        cache = VectorStoreCache(client, embeddings, CACHE_SIZE)
+
+        def open_cached(user_id: int) -> Chroma:
+            return cache.get(f'cover_letters_{user_id}')
+
+        print("=" * 60)
+        print(f"collection open 비용 (유저 {USERS}명, 호출 {CALLS}회)")
+        print("=" * 60)
+        _print_result("before", _measure(open_uncached, user_ids))
+        _print_result("after", _measure(open_cached, user_ids))
+        print(f"cache: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    main()
@@ -0,0 +1,88 @@
+# 원티드 채용공고 http 파서 점검 (네트워크 호출 없음)
+# - 저장해 둔 채용공고 페이지(__NEXT_DATA__)와 상세 API 응답 fixture를 파싱해서 기대한 텍스트와 비교
+# - 경력 표시(_experience), url에서 공고 id 추출(extract_job_id) 케이스 확인
+# 원티드 페이지 구조가 바뀌면 fixture를 새로 저장하고 기대값을 갱신
+#
+# 실행: python -m testing.wanted_page_parser_check
+
+import json
+import os
+import sys
+
+from app.utils.job_posting_crawlers.wanted_page_parser import parse_wanted_job_html, parse_wanted_job_json, \
+    extract_job_id, _experience
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+EXPECTED_HTML_TEXT = (
+    "[company] 자소소랩 [position_name] 백엔드 개발자 (Python) [experience] 경력 3-7년 "
+    "[position_detail] 자소소랩은 AI로 자기소개서 작성을 돕는 서비스를 만듭니다. "
+    "[주요업무] • FastAPI 기반 API 서버 개발\n• PostgreSQL 스키마 설계 및 쿼리 튜닝\n• RAG 검색 파이프라인 운영 "
+    "[자격요건] • Python 백엔드 개발 경력 3년 이상\n• 비동기 프로그래밍에 대한 이해 "
+    "[우대사항] • 벡터 DB 운영 경험\n• LLM API 연동 경험 "
+    "[혜택 및 복지] • 유연 근무제\n• 도서 구입비 지원 "
+    "[채용 전형] 서류 전형 - 1차 인터뷰 - 2차 인터뷰 - 최종 합격"
+)
+EXPECTED_API_TEXT = (
+    "[company] 채용데이터 [position_name] 주니어 데이터 엔지니어 [experience] 경력 신입-3년 "
+    "[position_detail] 채용 데이터를 수집하고 분석하는 팀입니다. "
+    "[주요업무] • 데이터 수집 파이프라인 개발\n• 배치 작업 운영 "
+    "[자격요건] • SQL 활용 능력\n• Python 사용 경험 "
+    "[우대사항] • Airflow 사용 경험 "
+    "[혜택 및 복지] • 점심 식대 지원 "
+    "[채용 전형] 서류 전형 - 과제 - 인터뷰"
+)
+
+# (annual_from, annual_to, is_newbie) -> 경력 표시
+EXPERIENCE_CASES = [
+    ((None, None, False), ''),
+    ((None, None, True), '신입'),
+    ((0, 0, True), '신입'),
+    ((3, None, False), '경력 3년 이상'),
+    ((5, 100, False), '경력 5년 이상'),
+    ((None, 100, False), '경력 무관'),
+    ((None, 5, False), '경력 5년 이하'),
+    ((None, 3, True), '경력 신입-3년'),
+    ((0, 3, True), '경력 신입-3년'),
+    ((0, 3, False), '경력 0-3년'),
+    ((3, 7, False), '경력 3-7년'),
+]
+
+JOB_ID_CASES = [
+    ('https://www.wanted.co.kr/wd/123456', '123456'),
+    ('https://wanted.co.kr/wd/123456?utm_source=kakao', '123456'),
+    ('https://m.wanted.co.kr/wd/123456/', '123456'),
+    ('https://www.wanted.co.kr/company/7788', None),
+    ('https://zighang.com/recruitment/abc', None),
+    ('https://example.com/wd/123456', None),
+]
+
+
+def _check(name: str, actual, expected) -> bool:
+    if actual == expected:
+        print(f"[OK] {name}")
+        return True
+    print(f"[FAIL] {name}\n  기대: {expected!r}\n  결과: {actual!r}")
+    return False
+
+
+def main() -> bool:
+    results = []
+    with open(os.path.join(FIXTURE_DIR, 'wanted_job_next_data.html'), encoding='utf-8') as f:
+        results.append(_check('__NEXT_DATA__ 페이지', parse_wanted_job_html(f.read()), EXPECTED_HTML_TEXT))
+    with open(os.path.join(FIXTURE_DIR, 'wanted_job_api.json'), encoding='utf-8') as f:
+        results.append(_check('상세 API 응답', parse_wanted_job_json(json.load(f)), EXPECTED_API_TEXT))
+
+    for (annual_from, annual_to, is_newbie), expected in EXPERIENCE_CASES:
+        job = {'annual_from': annual_from, 'annual_to': annual_to, 'is_newbie': is_newbie}
+        results.append(_check(f'경력 {annual_from}, {annual_to}, 신입 {is_newbie}', _experience(job), expected))
+    for url, expected in JOB_ID_CASES:
+        results.append(_check(f'공고 id {url}', extract_job_id(url), expected))
+
+    print("=" * 60)
+    print(f"통과: {sum(results)}/{len(results)}")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)